@@ -0,0 +1,439 @@
+import base64
+import gzip
+import json
+import random
+import re
+import shlex
+import socket
+import struct
+import threading
+import time
+
+import paramiko
+
+# -------------------- Synthetic PM2 Host -------------------- #
+
+DEFAULT_PROCESS_COUNT = 100
+DEFAULT_LOG_LINES = 100
+DEFAULT_LOG_RATE = 200
+# paramiko sends the exec reply after check_channel_exec_request returns; answering
+# before that lands can close the channel ahead of the reply.
+EXEC_REPLY_GRACE = 0.002
+TICK_SEGMENT_PATTERN = re.compile(r"echo; echo '(@@PM2MON:\w+@@)'; \{ (.*?); \} 2>/dev/null(?:; |$)", re.DOTALL)
+STATUSES = ['online', 'online', 'online', 'online', 'stopped', 'errored']
+RPC_READY = b'PM2RPC\n'
+PM2_CLI_PATTERN = re.compile(r'\bpm2 ')
+
+class SyntheticHost:
+    def __init__(self, process_count=DEFAULT_PROCESS_COUNT, payload_bytes=0, seed=1, churn=1.0):
+        self.process_count = process_count
+        self.payload_bytes = payload_bytes
+        self.churn = churn
+        self.delta_states = {}
+        self.random = random.Random(seed)
+        self.started_at = int(time.time() * 1000)
+        self.cpu_ticks = [10000, 0, 5000, 80000, 500, 0, 100, 0]
+        self.disk_bytes = 0
+        self.net_bytes = 0
+        self.processes = [self.make_process(index) for index in range(process_count)]
+
+    def make_process(self, index):
+        name = f"app-{index // 4}"
+        filler = 'x' * self.payload_bytes
+        return {
+            'pid': 10000 + index,
+            'name': name,
+            'pm_id': index,
+            'monit': {
+                'memory': self.random.randint(20, 800) * 1024 * 1024,
+                'cpu': round(self.random.uniform(0, 100), 1)
+            },
+            'pm2_env': {
+                'version': f"1.{index % 10}.0",
+                'status': self.random.choice(STATUSES),
+                'pm_uptime': self.started_at - self.random.randint(0, 10 ** 9),
+                'pm_out_log_path': f"/home/pm2/.pm2/logs/{name}-out-{index}.log",
+                'pm_err_log_path': f"/home/pm2/.pm2/logs/{name}-error-{index}.log",
+                'PORT': 3000 + index,
+                'restart_time': self.random.randint(0, 5),
+                'unstable_restarts': 0,
+                'exec_mode': 'cluster_mode' if index % 4 else 'fork_mode',
+                'instances': 4,
+                'node_version': '20.11.1',
+                'max_memory_restart': 1024 * 1024 * 1024,
+                'axm_monitor': {
+                    'Heap Usage': {'value': round(self.random.uniform(10, 90), 2), 'unit': '%'},
+                    'Event Loop Latency': {'value': round(self.random.uniform(0, 5), 3), 'unit': 'ms'}
+                },
+                'env': {'FILLER': filler}
+            }
+        }
+
+    def tick(self):
+        for process in self.processes:
+            if self.churn < 1 and self.random.random() >= self.churn:
+                continue
+            process['monit']['cpu'] = round(self.random.uniform(0, 100), 1)
+            process['monit']['memory'] += self.random.randint(-1024, 4096) * 1024
+            if self.random.random() < 0.02:
+                process['pm2_env']['restart_time'] += 1
+        self.cpu_ticks = [value + self.random.randint(0, 100) for value in self.cpu_ticks]
+
+    def jlist(self):
+        return json.dumps(self.processes)
+
+    def proc_stat(self):
+        return "cpu  " + " ".join(str(value) for value in self.cpu_ticks) + "\n"
+
+    def loadavg(self):
+        return f"{self.random.uniform(0, 4):.2f} {self.random.uniform(0, 4):.2f} {self.random.uniform(0, 4):.2f} 3/512 {10000 + self.process_count}\n"
+
+    def diskstats(self):
+        self.disk_bytes += self.random.randint(0, 4 * 1024 * 1024)
+        sectors = self.disk_bytes // 512
+        return (
+            f"   8       0 sda 120000 300 {sectors // 3} 50000 90000 8000 {sectors} 70000 0 {sectors // 200} 120000 0 0 0 0\n"
+            f"   8       1 sda1 110000 300 {sectors // 3} 48000 85000 8000 {sectors} 68000 0 {sectors // 200} 115000 0 0 0 0\n"
+            "   7       0 loop0 50 0 400 10 0 0 0 0 0 20 10 0 0 0 0\n"
+        )
+
+    def net_dev(self):
+        self.net_bytes += self.random.randint(0, 2 * 1024 * 1024)
+        return (
+            "Inter-|   Receive                                                |  Transmit\n"
+            " face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed\n"
+            f"    lo: 9000 100 0 0 0 0 0 0 9000 100 0 0 0 0 0 0\n"
+            f"  eth0: {self.net_bytes} 80000 0 0 0 0 0 0 {self.net_bytes * 2} 90000 0 0 0 0 0 0\n"
+        )
+
+    def df(self, command):
+        lines = []
+        for directory in shlex.split(command[len('for d in '):command.index('; do')]):
+            lines.append(f"dir {directory}\n/dev/sda1 51475068 {40000000 + self.disk_bytes // 1024 % 5000000} 11475068 79% /\n")
+        return "".join(lines)
+
+    def free(self):
+        return (
+            "               total        used        free      shared  buff/cache   available\n"
+            "Mem:           15890        6123        2211         310        7555        9120\n"
+            "Swap:           2047          12        2035\n"
+        )
+
+    def tail(self, lines=DEFAULT_LOG_LINES):
+        return "".join(f"2026-01-01T00:00:{index % 60:02d} synthetic log line {index}\n" for index in range(lines))
+
+    def describe(self, pm_id):
+        process = self.processes[pm_id]
+        pm2_env = process['pm2_env']
+        rows = [
+            ('status', pm2_env['status']),
+            ('name', process['name']),
+            ('restarts', pm2_env['restart_time']),
+            ('exec mode', pm2_env['exec_mode']),
+            ('node.js version', pm2_env['node_version']),
+            ('out log path', pm2_env['pm_out_log_path']),
+            ('error log path', pm2_env['pm_err_log_path'])
+        ]
+        metrics = [(key, f"{value['value']} {value['unit']}") for key, value in pm2_env['axm_monitor'].items()]
+        return (
+            f" Describing process with id {pm_id} - name {process['name']}\n"
+            + "┌──┬──┐\n" + "".join(f"│ {key} │ {value} │\n" for key, value in rows) + "└──┴──┘\n"
+            + " Code metrics value\n"
+            + "┌──┬──┐\n" + "".join(f"│ {key} │ {value} │\n" for key, value in metrics) + "└──┴──┘\n"
+        )
+
+    def rpc(self, method, args):
+        # Answers the daemon RPC methods the monitor calls; returns the reply object axon-rpc would send.
+        if method == 'getMonitorData':
+            self.tick()
+            return {'args': [self.processes]}
+        if method in ('restartProcessId', 'stopProcessId'):
+            target = args[0]['id'] if isinstance(args[0], dict) else args[0]
+            if not 0 <= target < len(self.processes):
+                return {'error': f"Process {target} not found"}
+            pm2_env = self.processes[target]['pm2_env']
+            if method == 'stopProcessId':
+                pm2_env['status'] = 'stopped'
+            else:
+                pm2_env['status'] = 'online'
+                pm2_env['restart_time'] += 1
+                pm2_env['pm_uptime'] = int(time.time() * 1000)
+            return {'args': [self.processes[target]]}
+        if method == 'ping':
+            return {'args': [{'msg': 'pong'}]}
+        return {'error': f'method "{method}" does not exist'}
+
+    def log_event(self, sequence):
+        process = self.processes[sequence % len(self.processes)]
+        stream = 'err' if sequence % 7 == 0 else 'out'
+        level = 'ERROR' if stream == 'err' else ('WARN' if sequence % 5 == 0 else 'INFO')
+        return json.dumps({
+            'message': f"{level} synthetic request {sequence} handled\n",
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'type': stream,
+            'process_id': process['pm_id'],
+            'app_name': process['name']
+        }) + "\n"
+
+    def project(self, process, axm_keys=()):
+        pm2_env = process['pm2_env']
+        record = {
+            'pm_id': process['pm_id'], 'name': process['name'], 'version': pm2_env['version'], 'status': pm2_env['status'],
+            'cpu': process['monit']['cpu'], 'memory': process['monit']['memory'], 'pm_uptime': pm2_env['pm_uptime'],
+            'port': pm2_env['PORT'], 'pid': process['pid'], 'out': pm2_env['pm_out_log_path'], 'err': pm2_env['pm_err_log_path'],
+            'restarts': pm2_env['restart_time'], 'unstable': pm2_env['unstable_restarts'], 'maxmem': pm2_env['max_memory_restart']
+        }
+        if axm_keys:
+            axm = pm2_env['axm_monitor']
+            record['axm'] = json.dumps({key: axm[key]['value'] if key in axm else None for key in axm_keys}, separators=(',', ':'))
+        return record
+
+    def delta(self, command):
+        # Python port of the monitor's remote delta script, keyed by the client token.
+        args = shlex.split(command.split('|', 1)[1])[3:]
+        token, base, keyframe = args[:3]
+        axm_keys = json.loads(args[3]) if len(args) > 3 else []
+        self.tick()
+        current = {process['pm_id']: self.project(process, axm_keys) for process in self.processes}
+        previous = self.delta_states.get(token)
+        seq = (previous['seq'] if previous else 0) + 1
+        if keyframe == '1' or previous is None or str(previous['seq']) != base:
+            payload = {'seq': seq, 'full': 1, 'procs': list(current.values())}
+        else:
+            upsert = []
+            for pm_id, record in current.items():
+                old = previous['procs'].get(pm_id)
+                if old is None:
+                    upsert.append(record)
+                    continue
+                changed = {key: value for key, value in record.items() if old.get(key) != value}
+                if changed:
+                    upsert.append({'pm_id': pm_id, **changed})
+            removed = [pm_id for pm_id in previous['procs'] if pm_id not in current]
+            payload = {'seq': seq, 'base': int(base), 'upsert': upsert, 'removed': removed}
+        self.delta_states[token] = {'seq': seq, 'procs': current}
+        return json.dumps(payload)
+
+    def proc_metrics(self, command):
+        pids = {int(pid) for pid in command[len('for p in '):command.index('; do')].split()}
+        lines = []
+        for process in self.processes:
+            if process['pid'] not in pids:
+                continue
+            counter = process.setdefault('io_counter', 0) + self.random.randint(0, 65536)
+            process['io_counter'] = counter
+            lines.append(
+                f"pid {process['pid']}\nThreads: {11 + process['pm_id'] % 5}\n"
+                f"voluntary_ctxt_switches: {counter // 100}\nnonvoluntary_ctxt_switches: {counter // 1000}\n"
+                f"read_bytes: {counter * 4}\nwrite_bytes: {counter * 8}\nfds: {20 + process['pm_id'] % 30}\n"
+            )
+        return "".join(lines)
+
+    def respond_tick(self, command):
+        parts = []
+        for marker, inner in TICK_SEGMENT_PATTERN.findall(command):
+            output, _ = self.respond(inner)
+            parts.append(f"\n{marker}\n{output}")
+        return "".join(parts), 0
+
+    def probe(self):
+        commands = ['pm2', 'mpstat', 'free', 'top', 'awk', 'grep', 'tail']
+        return "".join(f"cmd:{cmd}=1\n" for cmd in commands) + (
+            "pm2_version=5.4.2\nkernel=Linux 6.1.0\nos=Synthetic Linux\nproc_stat=1\nnode=1\ngzip=1\n"
+        )
+
+    def respond(self, command):
+        if command.startswith("{ echo; echo '@@PM2MON:") and command.endswith('; } | gzip -c | base64'):
+            output, status = self.respond_tick(command[2:-len('; } | gzip -c | base64')])
+            return base64.encodebytes(gzip.compress(output.encode())).decode(), status
+        if command.startswith("echo; echo '@@PM2MON:"):
+            return self.respond_tick(command)
+        if command.startswith('for p in '):
+            return self.proc_metrics(command), 0
+        if command.startswith('for d in '):
+            return self.df(command), 0
+        if '/proc/loadavg' in command:
+            return self.loadavg(), 0
+        if '/proc/diskstats' in command:
+            return self.diskstats(), 0
+        if '/proc/net/dev' in command:
+            return self.net_dev(), 0
+        if command.startswith('pm2 jlist | node -e '):
+            return self.delta(command), 0
+        if 'command -v' in command:
+            return self.probe(), 0
+        if 'pm2 jlist' in command:
+            self.tick()
+            return self.jlist(), 0
+        if 'mpstat' in command:
+            return "7.25\n", 0
+        if '/proc/stat' in command:
+            return self.proc_stat(), 0
+        if 'free -m' in command:
+            return self.free(), 0
+        if command.startswith('tail'):
+            match = re.match(r'tail -n (\d+)', command)
+            return self.tail(int(match.group(1)) if match else DEFAULT_LOG_LINES), 0
+        if command.startswith('pm2 describe '):
+            pm_id = int(command.split()[2])
+            if 0 <= pm_id < len(self.processes):
+                return self.describe(pm_id), 0
+            return f"[PM2][WARN] {pm_id} doesn't exist\n", 0
+        if command.startswith('pm2 '):
+            return f"[PM2] {command[4:]} done\n", 0
+        return "", 127
+
+def amp_encode(args):
+    packed = [b's:' + arg.encode() if isinstance(arg, str) else b'j:' + json.dumps(arg).encode() for arg in args]
+    return bytes([0x10 | len(packed)]) + b''.join(struct.pack('>I', len(data)) + data for data in packed)
+
+def amp_decode(buffer):
+    # Returns the complete messages in buffer and the bytes left over.
+    messages = []
+    while buffer:
+        offset, args = 1, []
+        for _ in range(buffer[0] & 0x0f):
+            if len(buffer) < offset + 4:
+                return messages, buffer
+            length = struct.unpack_from('>I', buffer, offset)[0]
+            if len(buffer) < offset + 4 + length:
+                return messages, buffer
+            data = buffer[offset + 4:offset + 4 + length]
+            args.append(json.loads(data[2:]) if data[:2] == b'j:' else data[2:].decode())
+            offset += 4 + length
+        messages.append(args)
+        buffer = buffer[offset:]
+    return messages, buffer
+
+# -------------------- Paramiko Server -------------------- #
+
+class FakeServerInterface(paramiko.ServerInterface):
+    def __init__(self, server):
+        self.server = server
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=self.server.handle_exec, args=(channel, command.decode()), daemon=True).start()
+        return True
+
+class FakePM2Server:
+    def __init__(self, process_count=DEFAULT_PROCESS_COUNT, payload_bytes=0, latency=0.0, host='127.0.0.1', port=0, host_key=None, log_rate=DEFAULT_LOG_RATE, churn=1.0, cli_cost=0.0):
+        self.synthetic = SyntheticHost(process_count, payload_bytes, churn=churn)
+        self.latency = latency
+        self.cli_cost = cli_cost
+        self.log_rate = log_rate
+        self.host_key = host_key or paramiko.RSAKey.generate(2048)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.host, self.port = self.sock.getsockname()
+        self.transports = []
+        self.channels = set()
+        self.running = False
+        self.lock = threading.Lock()
+
+    def start(self):
+        self.running = True
+        self.sock.listen(16)
+        threading.Thread(target=self.accept_loop, daemon=True).start()
+        return self
+
+    def accept_loop(self):
+        while self.running:
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                break
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            transport = paramiko.Transport(client)
+            transport.add_server_key(self.host_key)
+            transport.start_server(server=FakeServerInterface(self))
+            self.transports.append(transport)
+            threading.Thread(target=self.drain_channels, args=(transport,), daemon=True).start()
+
+    def drain_channels(self, transport):
+        # Channels are served from check_channel_exec_request; accepting them here keeps a
+        # reference alive until the command finishes, since paramiko closes channels on GC.
+        while self.running and transport.is_active():
+            channel = transport.accept(timeout=1)
+            if channel is not None:
+                with self.lock:
+                    self.channels.add(channel)
+
+    def handle_exec(self, channel, command):
+        time.sleep(max(self.latency, EXEC_REPLY_GRACE) + self.cli_cost * len(PM2_CLI_PATTERN.findall(command)))
+        if command.startswith('pm2 logs') and '--json' in command:
+            return self.stream_logs(channel)
+        if command.startswith('node -e ') and 'rpc.sock' in command:
+            return self.serve_rpc(channel)
+        with self.lock:
+            output, status = self.synthetic.respond(command)
+        try:
+            channel.sendall(output.encode())
+            channel.send_exit_status(status)
+        except OSError:
+            pass
+        finally:
+            channel.close()
+            with self.lock:
+                self.channels.discard(channel)
+
+    def stream_logs(self, channel):
+        # Emits log lines in batches every 10 ms until the client closes the channel.
+        sequence = 0
+        batch = max(1, int(self.log_rate / 100))
+        try:
+            while self.running and not channel.closed:
+                channel.sendall("".join(self.synthetic.log_event(sequence + offset) for offset in range(batch)).encode())
+                sequence += batch
+                time.sleep(0.01)
+        except (OSError, EOFError):
+            pass
+        finally:
+            channel.close()
+            with self.lock:
+                self.channels.discard(channel)
+
+    def serve_rpc(self, channel):
+        # Stands in for the relay to ~/.pm2/rpc.sock: answers framed requests until the client closes.
+        buffer = b''
+        try:
+            channel.sendall(RPC_READY)
+            while self.running:
+                data = channel.recv(32768)
+                if not data:
+                    break
+                messages, buffer = amp_decode(buffer + data)
+                for request, call_id in messages:
+                    with self.lock:
+                        reply = self.synthetic.rpc(request['method'], request['args'])
+                    channel.sendall(amp_encode([reply, call_id]))
+        except (OSError, EOFError):
+            pass
+        finally:
+            try:
+                channel.close()
+            except EOFError:
+                pass
+            with self.lock:
+                self.channels.discard(channel)
+
+    def stop(self):
+        self.running = False
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        for transport in self.transports:
+            transport.close()
@@ -0,0 +1,343 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tkinter as tk
+import tracemalloc
+
+import paramiko
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(REPO_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import main
+from fake_server import FakePM2Server
+
+DEFAULT_PROCESS_COUNTS = '10,100,1000,5000'
+DEFAULT_ITERATIONS = 5
+DEFAULT_OUTPUT = 'bench_report.json'
+DEFAULT_THRESHOLD = 0.20
+
+# -------------------- Measurement Helpers -------------------- #
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'runs': len(ordered),
+        'min_ms': round(ordered[0], 3),
+        'median_ms': round(statistics.median(ordered), 3),
+        'p95_ms': round(main.percentile(ordered, 0.95), 3),
+        'max_ms': round(ordered[-1], 3),
+        'mean_ms': round(statistics.fmean(ordered), 3)
+    }
+
+def measure(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+def measure_record_memory(raw):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        services = main.parse_pm2_services(raw)
+        index = main.index_services(services)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return round((after - before) / (len(services) or 1), 1), services, index
+
+def lookup_all(index, ids):
+    for pm_id in ids:
+        index[pm_id]
+
+def create_root():
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return None, str(e)
+    root.withdraw()
+    return root, None
+
+def wait_for_idle_refresh(app, root, timeout=60):
+    deadline = time.time() + timeout
+    while str(app.refresh_button['state']) == 'disabled' and time.time() < deadline:
+        root.update()
+        time.sleep(0.01)
+
+# -------------------- Scenarios -------------------- #
+
+def tick_bytes(label='collect tick'):
+    stats = main.instrumentation.snapshot()['commands'].get(label)
+    return round(stats['bytes_in'] / stats['window']) if stats and stats['window'] else 0
+
+def run_scenario(process_count, payload_bytes, latency, iterations, host_key, root, churn=1.0, cli_cost=0.0):
+    server = FakePM2Server(process_count, payload_bytes, latency, host_key=host_key, churn=churn, cli_cost=cli_cost).start()
+    result = {
+        'processes': process_count,
+        'payload_bytes': payload_bytes,
+        'latency_ms': round(latency * 1000, 3),
+        'metrics': {},
+        'skipped': {}
+    }
+    metrics = result['metrics']
+    try:
+        started = time.perf_counter()
+        ssh_client = main.SSHClientWrapper(server.host, server.port, 'bench', 'bench')
+        metrics['connect_ms'] = summarize([(time.perf_counter() - started) * 1000])
+        # The CLI paths are measured first; the RPC backend gets its own metrics below.
+        ssh_client.rpc.enabled = False
+
+        raw = ssh_client.execute_command(main.PM2_LIST_COMMAND)
+        result['jlist_bytes'] = len(raw.encode())
+
+        metrics['parse_pm2_services_ms'] = measure(lambda: main.parse_pm2_services(raw), iterations)
+
+        result['service_bytes_per_process'], services, index = measure_record_memory(raw)
+        ids = [svc.pm_id for svc in services]
+        metrics['index_services_ms'] = measure(lambda: main.index_services(services), iterations)
+        metrics['service_lookup_all_ms'] = measure(lambda: lookup_all(index, ids), iterations)
+
+        main.instrumentation.reset()
+        full_collector = main.TickCollector(ssh_client)
+        full_collector.delta.enabled = False
+        full_collector.collect()
+        metrics['collect_tick_full_ms'] = measure(full_collector.collect, iterations)
+        result['tick_bytes_full'] = tick_bytes()
+
+        main.instrumentation.reset()
+        collector = main.TickCollector(ssh_client)
+        collector.collect_process_metrics = True
+        collector.collect()
+        metrics['collect_tick_ms'] = measure(collector.collect, iterations)
+        result['tick_bytes'] = tick_bytes()
+
+        ssh_client.rpc.enabled = True
+        main.instrumentation.reset()
+        rpc_collector = main.TickCollector(ssh_client)
+        rpc_collector.collect()
+        metrics['collect_tick_rpc_ms'] = measure(rpc_collector.collect, iterations)
+        result['tick_bytes_rpc'] = tick_bytes() + tick_bytes('rpc getMonitorData')
+        ssh_client.rpc.enabled = False
+
+        if root is None:
+            for name in ('fetch_and_display_ms', 'update_treeview_ms', 'update_treeview_cold_ms', 'filter_services_ms', 'sort_column_ms'):
+                result['skipped'][name] = 'no display available'
+        else:
+            run_gui_metrics(root, ssh_client, iterations, metrics)
+
+        ssh_client.close()
+    finally:
+        server.stop()
+    return result
+
+def run_replay_scenario(path, iterations, root):
+    ssh_client = main.ReplayClient(path, speed=0)
+    result = {
+        'processes': 0,
+        'payload_bytes': 0,
+        'latency_ms': 0,
+        'source': os.path.basename(path),
+        'metrics': {},
+        'skipped': {}
+    }
+    metrics = result['metrics']
+    try:
+        collector = main.TickCollector(ssh_client)
+        tick = collector.collect()
+        if tick is None or tick['services'] is None:
+            raise SystemExit(f"{path} does not contain a collect tick recording.")
+        sections = main.split_tick_sections(ssh_client.session.by_label['collect tick'][0]['o'])
+        result['processes'] = len(tick['services'])
+
+        raw = sections.get('jlist')
+        if raw is not None:
+            result['jlist_bytes'] = len(raw.encode())
+            metrics['parse_pm2_services_ms'] = measure(lambda: main.parse_pm2_services(raw), iterations)
+            result['service_bytes_per_process'], services, index = measure_record_memory(raw)
+        else:
+            # Sessions recorded with delta collection carry no raw jlist to parse.
+            result['skipped']['parse_pm2_services_ms'] = 'recorded with delta collection'
+            services = tick['services']
+            index = main.index_services(services)
+        ids = [svc.pm_id for svc in services]
+        metrics['index_services_ms'] = measure(lambda: main.index_services(services), iterations)
+        metrics['service_lookup_all_ms'] = measure(lambda: lookup_all(index, ids), iterations)
+        metrics['collect_tick_ms'] = measure(collector.collect, iterations)
+
+        if root is None:
+            for name in ('fetch_and_display_ms', 'update_treeview_ms', 'update_treeview_cold_ms', 'filter_services_ms', 'sort_column_ms'):
+                result['skipped'][name] = 'no display available'
+        else:
+            run_gui_metrics(root, ssh_client, iterations, metrics)
+    finally:
+        ssh_client.close()
+    return result
+
+def finish_render(app):
+    # Rendering is split across idle callbacks; measure the whole job.
+    if app.render_job is not None:
+        app.render_job.finish()
+
+def run_gui_metrics(root, ssh_client, iterations, metrics):
+    app = main.PM2MonitorApp(root, ssh_client=ssh_client)
+    wait_for_idle_refresh(app, root)
+
+    def fetch_and_display():
+        ssh_client.invalidate_reads()
+        app.fetch_and_display()
+        # The tick is displayed from an after(0) callback on the Tk thread.
+        root.update()
+        finish_render(app)
+        root.update_idletasks()
+
+    def update_treeview_cold():
+        app.tree.delete(*app.tree.get_children())
+        app.update_treeview()
+        finish_render(app)
+        root.update_idletasks()
+
+    def update_treeview():
+        app.update_treeview()
+        finish_render(app)
+        root.update_idletasks()
+
+    def filter_services():
+        app.search_var.set('app-1')
+        app.filter_services()
+        finish_render(app)
+        app.search_var.set('')
+        app.filter_services()
+        finish_render(app)
+        root.update_idletasks()
+
+    def sort_columns():
+        for col in app.columns:
+            app.sort_column(col, False)
+            finish_render(app)
+        root.update_idletasks()
+
+    metrics['fetch_and_display_ms'] = measure(fetch_and_display, iterations)
+    metrics['update_treeview_ms'] = measure(update_treeview, iterations)
+    metrics['update_treeview_cold_ms'] = measure(update_treeview_cold, iterations)
+    metrics['filter_services_ms'] = measure(filter_services, iterations)
+    metrics['sort_column_ms'] = measure(sort_columns, iterations)
+
+    for child in app.root.winfo_children():
+        child.destroy()
+
+# -------------------- Reporting -------------------- #
+
+def scenario_key(scenario):
+    return (scenario.get('source'), scenario['processes'], scenario['payload_bytes'], scenario['latency_ms'])
+
+def compare_reports(report, baseline, threshold):
+    regressions = []
+    baseline_scenarios = {scenario_key(s): s for s in baseline.get('scenarios', [])}
+    for scenario in report['scenarios']:
+        previous = baseline_scenarios.get(scenario_key(scenario))
+        if not previous:
+            continue
+        for name, stats in scenario['metrics'].items():
+            old = previous['metrics'].get(name)
+            if not old or not old['median_ms']:
+                continue
+            change = (stats['median_ms'] - old['median_ms']) / old['median_ms']
+            if change > threshold:
+                regressions.append({
+                    'processes': scenario['processes'],
+                    'payload_bytes': scenario['payload_bytes'],
+                    'latency_ms': scenario['latency_ms'],
+                    'metric': name,
+                    'baseline_median_ms': old['median_ms'],
+                    'median_ms': stats['median_ms'],
+                    'change': round(change, 4)
+                })
+    return regressions
+
+def print_summary(report):
+    for scenario in report['scenarios']:
+        if scenario.get('source'):
+            print(f"\nReplay of {scenario['source']}: {scenario['processes']} processes, jlist {scenario.get('jlist_bytes', 0)} bytes, {scenario.get('service_bytes_per_process', 0)} bytes per service record")
+        else:
+            print(f"\n{scenario['processes']} processes, {scenario['payload_bytes']} payload bytes, {scenario['latency_ms']} ms latency, jlist {scenario.get('jlist_bytes', 0)} bytes, tick {scenario.get('tick_bytes', 0)} bytes (full {scenario.get('tick_bytes_full', 0)}, rpc {scenario.get('tick_bytes_rpc', 0)}), {scenario.get('service_bytes_per_process', 0)} bytes per service record")
+        for name, stats in scenario['metrics'].items():
+            print(f"  {name:<28} median {stats['median_ms']:>10.3f}  p95 {stats['p95_ms']:>10.3f}  max {stats['max_ms']:>10.3f}")
+        for name, reason in scenario['skipped'].items():
+            print(f"  {name:<28} skipped ({reason})")
+    for regression in report.get('regressions', []):
+        print(f"REGRESSION {regression['metric']} @ {regression['processes']} processes: {regression['baseline_median_ms']} -> {regression['median_ms']} ms ({regression['change']:+.1%})")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark GUI PM2 Monitor against a local fake SSH/PM2 server.')
+    parser.add_argument('--processes', default=DEFAULT_PROCESS_COUNTS, help='Comma-separated process counts to simulate.')
+    parser.add_argument('--payload-bytes', type=int, default=0, help='Extra bytes of environment data per process in pm2 jlist.')
+    parser.add_argument('--churn', type=float, default=1.0, help='Fraction of processes whose CPU/memory change between ticks.')
+    parser.add_argument('--latency', type=float, default=0.0, help='Injected latency per remote command, in seconds.')
+    parser.add_argument('--pm2-cli-cost', type=float, default=0.0, help='Extra delay per pm2 CLI invocation, in seconds, to model Node.js startup on the server.')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help='Runs per measurement.')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Path of the JSON report.')
+    parser.add_argument('--compare', help='Baseline JSON report to compare against.')
+    parser.add_argument('--replay', action='append', default=[], help='Recorded session file (see main.py --record) to benchmark parsing and rendering against; repeatable.')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Relative median slowdown reported as a regression.')
+    return parser.parse_args()
+
+def main_benchmark():
+    args = parse_args()
+    main.logger.setLevel('WARNING')
+    main.capability_cache.cache_file = os.path.join(tempfile.mkdtemp(prefix='pm2-monitor-bench-'), 'capabilities.json')
+    main.capability_cache.entries = {}
+    main.config_handler.config['auto_refresh_interval'] = 0
+
+    host_key = paramiko.RSAKey.generate(2048)
+    root, display_error = create_root()
+    if root is None:
+        print(f"No display available, GUI metrics will be skipped: {display_error}")
+
+    report = {
+        'generated_at': time.time(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'paramiko': paramiko.__version__,
+            'display': root is not None
+        },
+        'settings': {
+            'iterations': args.iterations,
+            'payload_bytes': args.payload_bytes,
+            'latency_s': args.latency,
+            'pm2_cli_cost_s': args.pm2_cli_cost,
+            'churn': args.churn
+        },
+        'scenarios': []
+    }
+    for process_count in [int(value) for value in args.processes.split(',') if value.strip()]:
+        report['scenarios'].append(run_scenario(process_count, args.payload_bytes, args.latency, args.iterations, host_key, root, args.churn, args.pm2_cli_cost))
+    for path in args.replay:
+        report['scenarios'].append(run_replay_scenario(path, args.iterations, root))
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            regressions = compare_reports(report, json.load(f), args.threshold)
+        report['regressions'] = regressions
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print_summary(report)
+    print(f"\nReport written to {args.output}")
+
+    if root is not None:
+        root.destroy()
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main_benchmark())
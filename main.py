@@ -13,6 +13,39 @@ import os
 import platform
 import locale
 import sys
+import socket
+import random
+import logging
+import bisect
+import shutil
+import subprocess
+import urllib.request
+import math
+import csv
+import gzip
+import argparse
+import fnmatch
+import shlex
+import secrets
+import struct
+import mmap
+import select
+import signal
+import getpass
+import tempfile
+import atexit
+import posixpath
+import base64
+import zipfile
+from array import array
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from tkinter import filedialog
+
+try:
+    import keyring
+except ImportError:
+    keyring = None
 
 # -------------------- Constants and Globals -------------------- #
 
@@ -33,13 +66,88 @@ APP_NAME = 'GUI_PM2_Monitor'
 APPDATA_DIR = os.path.join(get_appdata_directory(), APP_NAME)
 os.makedirs(APPDATA_DIR, exist_ok=True)
 
+LOG_LEVEL = os.getenv('PM2_MONITOR_LOG_LEVEL', 'INFO').upper()
+logging.basicConfig(level=LOG_LEVEL, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger(APP_NAME)
+logging.getLogger('paramiko').setLevel(logging.WARNING)
+
 CONFIG_FILE = os.path.join(APPDATA_DIR, 'config.json')
+CONFIG_SAVE_DELAY = 0.5
+DEFAULT_PROFILE_NAME = 'default'
+KEYRING_SERVICE = APP_NAME
 TRANSLATIONS_DIR = os.path.join(base_path, 'translations')
 SUPPORTED_LANGUAGES = ['en', 'pt_br', 'es', 'fr', 'de']
 DEFAULT_AUTO_REFRESH_INTERVAL = 30
 DEFAULT_THEME = 'superhero'
 REQUIRED_COMMANDS = ['pm2', 'mpstat', 'free', 'top', 'awk', 'grep', 'tail']
 DEFAULT_FONT_SIZE = 12
+RECV_CHUNK_SIZE = 32768
+CONNECT_TIMEOUT = 10
+CHANNEL_OPEN_TIMEOUT = 10
+COMMAND_TIMEOUT = 30
+TERMINAL_COMMAND_TIMEOUT = 120
+CLEANUP_COMMAND_TIMEOUT = 5
+SUPERVISOR_CHECK_INTERVAL = 5
+RECONNECT_BACKOFF_BASE = 1
+RECONNECT_BACKOFF_MAX = 60
+LOCK_POLL_INTERVAL = 0.1
+HISTOGRAM_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+HISTOGRAM_WINDOW = 500
+RECENT_COMMANDS_LIMIT = 200
+DIAGNOSTICS_REFRESH_MS = 1000
+WATCHDOG_INTERVAL_MS = 100
+STALL_THRESHOLD_MS = 250
+STALL_HISTORY_LIMIT = 100
+FRAME_BUDGET_MS = 30
+DETAIL_CACHE_SIZE = 64
+DETAIL_CACHE_TTL = 5
+DETAIL_REFRESH_MS = 5000
+READ_CACHE_SIZE = 32
+READ_CACHE_TTL = 0.5
+ALERT_HYSTERESIS_RATIO = 0.85
+ALERT_HISTORY_LIMIT = 500
+ALERT_HOOK_TIMEOUT = 5
+RESTART_TIMELINE_LIMIT = 50
+LEAK_MIN_SAMPLES = 10
+LEAK_MIN_FIT = 0.8
+HISTORY_RETENTION = 7 * 24 * 3600
+HISTORY_CAPACITY = HISTORY_RETENTION // 5
+HISTORY_TRIM_FRACTION = 0.01
+CHART_REFRESH_MS = 1000
+CHART_RANGES = (('chart_range_5m', 300), ('chart_range_1h', 3600), ('chart_range_6h', 6 * 3600), ('chart_range_24h', 24 * 3600), ('chart_range_7d', 7 * 24 * 3600))
+DEFAULT_ALERT_SETTINGS = {
+    'enabled': True,
+    'cpu_threshold': 90,
+    'memory_threshold_mb': 1024,
+    'sustain_samples': 3,
+    'host_memory_threshold': 90,
+    'log_disk_threshold': 90,
+    'desktop_notifications': True,
+    'crash_loop_restarts': 3,
+    'restart_window': 300,
+    'restart_storm_restarts': 10,
+    'leak_slope_mb_per_hour': 20,
+    'leak_window': 1800,
+    'webhook_url': '',
+    'command_hook': ''
+}
+LOG_STREAM_BUFFER = 50000
+LOG_STREAM_RETRY = 5
+LOG_VIEW_LINES = 5000
+LOG_RENDER_MS = 100
+LOG_RENDER_CHUNK_LINES = 1000
+LOG_FILTER_DEBOUNCE_MS = 300
+LOG_PAGE_LINES = 100
+# Local mode relies on /bin/sh, process groups, select() on pipes and AF_UNIX sockets.
+LOCAL_MODE_SUPPORTED = os.name != 'nt'
+CUSTOM_METRIC_TIMEOUT = 2
+CUSTOM_METRIC_TIMEOUT_MAX = 10
+CUSTOM_METRIC_MAX_PROBES = 200
+CUSTOM_METRIC_OUTPUT_LIMIT = 4096
+HISTORY_DIR = os.path.join(APPDATA_DIR, 'history')
+DEFAULT_HISTORY_RETENTION_DAYS = 7
+CAPABILITY_CACHE_FILE = os.path.join(APPDATA_DIR, 'capabilities.json')
+CAPABILITY_CACHE_TTL = 24 * 60 * 60
 
 # -------------------- Internationalization (i18n) -------------------- #
 
@@ -80,16 +188,16 @@ class Translator:
     def load_translations(self, lang):
         translation_path = os.path.join(TRANSLATIONS_DIR, f"{lang}.json")
         if not os.path.exists(translation_path):
-            print(f"Translation file for '{lang}' not found. Falling back to English.")
+            logger.warning(f"Translation file for '{lang}' not found. Falling back to English.")
             translation_path = os.path.join(TRANSLATIONS_DIR, "en.json")
             if not os.path.exists(translation_path):
-                print("English translation file 'en.json' is missing. Please ensure it exists in the 'translations' directory.")
+                logger.error("English translation file 'en.json' is missing. Please ensure it exists in the 'translations' directory.")
                 sys.exit(1)
         try:
             with open(translation_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except json.JSONDecodeError:
-            print(f"Failed to parse the translation file '{translation_path}'. Please check its format.")
+            logger.error(f"Failed to parse the translation file '{translation_path}'. Please check its format.")
             sys.exit(1)
     
     def translate(self, key, **kwargs):
@@ -98,258 +206,3857 @@ class Translator:
             try:
                 text = text.format(**kwargs)
             except KeyError as e:
-                print(f"Missing translation key: {e}")
+                logger.warning(f"Missing translation key: {e}")
         return text
 
-translator = Translator()
+translator = Translator()
+
+# -------------------- Configuration Handling -------------------- #
+
+def write_file_atomic(path, data):
+    # Written to a temporary file next to `path` and renamed over it, so a crash mid-write leaves the old file intact.
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+def load_secret(name, profile):
+    if profile.get('password'):
+        return profile['password']
+    if not profile.get('password_in_keyring') or keyring is None:
+        return None
+    try:
+        return keyring.get_password(KEYRING_SERVICE, name)
+    except Exception as e:
+        logger.warning(f"Failed to read the password of profile '{name}' from the keyring: {e}")
+        return None
+
+def store_secret(name, profile, password):
+    profile.pop('password', None)
+    if profile.pop('password_in_keyring', False) and keyring is not None:
+        try:
+            keyring.delete_password(KEYRING_SERVICE, name)
+        except Exception:
+            pass
+    if not password:
+        return
+    if keyring is not None:
+        try:
+            keyring.set_password(KEYRING_SERVICE, name, password)
+            profile['password_in_keyring'] = True
+            return
+        except Exception as e:
+            logger.warning(f"The keyring is not usable ({e}); storing the password in 'config.json'.")
+    else:
+        logger.warning("The 'keyring' package is not installed; storing the password in 'config.json'. Install it or use key-based authentication.")
+    profile['password'] = password
+
+class ConfigHandler:
+    def __init__(self, config_file=CONFIG_FILE):
+        self.config_file = config_file
+        self.config = {}
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.pending = None
+        self.timer = None
+        self.load_config()
+        self.migrate_profiles()
+        atexit.register(self.flush)
+    
+    def load_config(self):
+        if os.path.exists(self.config_file):
+            try:
+                with open(self.config_file, 'r') as f:
+                    self.config = json.load(f)
+                logger.info("Configuration loaded successfully.")
+            except json.JSONDecodeError:
+                logger.error("Failed to parse 'config.json'. It might be corrupted.")
+                self.config = {}
+        else:
+            logger.info("'config.json' not found. A new one will be created after entering server details.")
+            self.config = {}
+    
+    def save_config(self):
+        # Serialized on the calling thread so later changes cannot race the writer; the write itself is
+        # debounced, so bursts such as zoom steps produce one write.
+        data = json.dumps(self.config, indent=4)
+        with self.lock:
+            self.pending = data
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = threading.Timer(CONFIG_SAVE_DELAY, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        with self.write_lock:
+            with self.lock:
+                data, self.pending = self.pending, None
+                if self.timer is not None:
+                    self.timer.cancel()
+                    self.timer = None
+            if data is None:
+                return
+            try:
+                write_file_atomic(self.config_file, data)
+                logger.debug("Configuration saved successfully.")
+            except OSError as e:
+                logger.error(f"Failed to save configuration: {e}")
+
+    # ---- Profiles ---- #
+
+    def migrate_profiles(self):
+        # Configurations from before profiles kept a single server at the top level.
+        if 'profiles' in self.config or not ('host' in self.config or 'backend' in self.config):
+            return
+        local = self.config.pop('backend', None) == 'local'
+        name = 'local' if local else self.config.get('host') or DEFAULT_PROFILE_NAME
+        profile = {
+            'backend': 'local' if local else 'ssh',
+            'host': self.config.pop('host', None),
+            'port': self.config.pop('port', 22),
+            'username': self.config.pop('username', None),
+            'key_filename': ''
+        }
+        store_secret(name, profile, self.config.pop('password', None))
+        self.config['profiles'] = {name: profile}
+        self.config['active_profile'] = name
+        logger.info(f"Moved the server details to profile '{name}'.")
+        self.save_config()
+
+    def profile_names(self):
+        return sorted(self.config.get('profiles', {}))
+
+    def active_profile_name(self):
+        return self.config.get('active_profile')
+
+    def get_profile(self, name=None):
+        return self.config.get('profiles', {}).get(name or self.active_profile_name())
+
+    def select_profile(self, name):
+        if name in self.config.get('profiles', {}) and name != self.active_profile_name():
+            self.config['active_profile'] = name
+            self.save_config()
+
+    def delete_profile(self, name):
+        profile = self.config.get('profiles', {}).pop(name, None)
+        if profile is None:
+            return
+        store_secret(name, profile, None)
+        if self.active_profile_name() == name:
+            self.config['active_profile'] = next(iter(self.profile_names()), None)
+        self.save_config()
+
+    def is_configured(self):
+        profile = self.get_profile()
+        return profile is not None and (profile.get('backend') == 'local' or bool(profile.get('host') and profile.get('username')))
+
+    def is_local(self):
+        profile = self.get_profile()
+        return profile is not None and profile.get('backend') == 'local'
+
+    def set_backend(self, backend):
+        name = self.active_profile_name() or ('local' if backend == 'local' else DEFAULT_PROFILE_NAME)
+        profile = self.config.setdefault('profiles', {}).setdefault(name, {'host': None, 'port': 22, 'username': None, 'key_filename': ''})
+        profile['backend'] = backend
+        self.config['active_profile'] = name
+        self.save_config()
+    
+    def get_server_details(self, name=None):
+        # The password is only looked up, possibly in the OS keyring, when a profile is connected.
+        name = name or self.active_profile_name()
+        profile = self.get_profile(name) or {}
+        return profile.get('host'), profile.get('port', 22), profile.get('username'), load_secret(name, profile)
+
+    def get_key_filename(self, name=None):
+        profile = self.get_profile(name) or {}
+        return profile.get('key_filename') or None
+    
+    def set_server_details(self, host, port, username, password, key_filename='', name=None):
+        name = name or host
+        profiles = self.config.setdefault('profiles', {})
+        profile = profiles.setdefault(name, {})
+        profile.update({'backend': 'ssh', 'host': host, 'port': port, 'username': username, 'key_filename': key_filename})
+        store_secret(name, profile, password)
+        if not self.active_profile_name():
+            self.config['active_profile'] = name
+        self.save_config()
+    
+    def get_preferences(self):
+        return {
+            'auto_refresh_interval': self.config.get('auto_refresh_interval', DEFAULT_AUTO_REFRESH_INTERVAL),
+            'theme': self.config.get('theme', DEFAULT_THEME),
+            'font_size': self.config.get('font_size', DEFAULT_FONT_SIZE),
+            'optional_columns': self.config.get('optional_columns', [])
+        }
+    
+    def set_preferences(self, auto_refresh_interval, theme):
+        self.config['auto_refresh_interval'] = auto_refresh_interval
+        self.config['theme'] = theme
+        self.save_config()
+
+    def get_custom_metrics(self):
+        return self.config.get('custom_metrics', [])
+
+    def set_custom_metrics(self, definitions):
+        self.config['custom_metrics'] = definitions
+        self.save_config()
+
+    def get_alert_settings(self):
+        return {**DEFAULT_ALERT_SETTINGS, **self.config.get('alerts', {})}
+
+    def set_alert_settings(self, settings):
+        self.config['alerts'] = settings
+        self.save_config()
+
+config_handler = ConfigHandler()
+
+# -------------------- Capability Probe -------------------- #
+
+CAPABILITY_PROBE_COMMAND = (
+    f'for c in {" ".join(REQUIRED_COMMANDS)}; do '
+    'if command -v "$c" >/dev/null 2>&1; then echo "cmd:$c=1"; else echo "cmd:$c=0"; fi; '
+    'done; '
+    'echo "pm2_version=$(pm2 --version 2>/dev/null | tail -n 1)"; '
+    'echo "kernel=$(uname -sr 2>/dev/null)"; '
+    'echo "os=$( (. /etc/os-release && echo "$PRETTY_NAME") 2>/dev/null)"; '
+    'if [ -r /proc/stat ]; then echo "proc_stat=1"; else echo "proc_stat=0"; fi; '
+    'if command -v node >/dev/null 2>&1; then echo "node=1"; else echo "node=0"; fi; '
+    'if command -v gzip >/dev/null 2>&1 && command -v base64 >/dev/null 2>&1; then echo "gzip=1"; else echo "gzip=0"; fi; '
+    'if command -v timeout >/dev/null 2>&1; then echo "timeout=1"; else echo "timeout=0"; fi'
+)
+
+def parse_capabilities(output):
+    capabilities = {
+        'commands': {cmd: False for cmd in REQUIRED_COMMANDS},
+        'pm2_version': '',
+        'kernel': '',
+        'os': '',
+        'proc_stat': False,
+        'node': False,
+        'gzip': False,
+        'timeout': False
+    }
+    for line in (output or '').splitlines():
+        key, sep, value = line.strip().partition('=')
+        if not sep:
+            continue
+        if key.startswith('cmd:'):
+            capabilities['commands'][key[4:]] = value == '1'
+        elif key in ('proc_stat', 'node', 'gzip', 'timeout'):
+            capabilities[key] = value == '1'
+        elif key in capabilities:
+            capabilities[key] = value.strip()
+    capabilities['cpu_backend'] = select_cpu_backend(capabilities)
+    capabilities['probed_at'] = time.time()
+    return capabilities
+
+def select_cpu_backend(capabilities):
+    commands = capabilities.get('commands', {})
+    if capabilities.get('proc_stat'):
+        return 'proc'
+    if commands.get('mpstat') and commands.get('awk'):
+        return 'mpstat'
+    if commands.get('top') and commands.get('grep'):
+        return 'top'
+    return None
+
+class CapabilityCache:
+    def __init__(self, cache_file=CAPABILITY_CACHE_FILE, ttl=CAPABILITY_CACHE_TTL):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r') as f:
+                self.entries = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            logger.warning("Failed to load the capability cache. It will be rebuilt.")
+            self.entries = {}
+
+    def save(self):
+        try:
+            write_file_atomic(self.cache_file, json.dumps(self.entries, indent=4))
+        except OSError as e:
+            logger.warning(f"Failed to save the capability cache: {e}")
+
+    def get(self, fingerprint):
+        with self.lock:
+            entry = self.entries.get(fingerprint)
+            if not entry:
+                return None
+            if time.time() - entry.get('probed_at', 0) > self.ttl:
+                del self.entries[fingerprint]
+                return None
+            return entry
+
+    def set(self, fingerprint, capabilities):
+        with self.lock:
+            self.entries[fingerprint] = capabilities
+            self.save()
+
+    def invalidate(self, fingerprint):
+        with self.lock:
+            if self.entries.pop(fingerprint, None) is not None:
+                self.save()
+
+capability_cache = CapabilityCache()
+
+# -------------------- Caching -------------------- #
+
+class TTLCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, stored_at=None):
+        with self.lock:
+            self.entries[key] = (time.monotonic() if stored_at is None else stored_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+
+class ReadFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+class ReadCache:
+    # Read-through layer for idempotent remote reads. Identical requests made while one is in flight wait
+    # for and share its result, which is then reused until it is `ttl` seconds old. Entries age from when
+    # the read started, so a periodic refresh is never served its own previous result. invalidate() drops
+    # cached results and detaches in-flight reads so mutating actions are always followed by fresh data.
+    def __init__(self, ttl=READ_CACHE_TTL, maxsize=READ_CACHE_SIZE):
+        self.cache = TTLCache(maxsize, ttl)
+        self.lock = threading.Lock()
+        self.flights = {}
+        self.generation = 0
+
+    def get(self, key, load, label=None):
+        with self.lock:
+            value = self.cache.get(key)
+            flight = self.flights.get(key) if value is None else None
+            leader = value is None and flight is None
+            if leader:
+                flight = self.flights[key] = ReadFlight()
+                generation = self.generation
+        if value is not None:
+            instrumentation.record_reused(label or key)
+            return value
+        if not leader:
+            flight.done.wait()
+            instrumentation.record_reused(label or key)
+            return flight.value
+        started = time.monotonic()
+        try:
+            flight.value = load()
+        finally:
+            with self.lock:
+                if self.flights.get(key) is flight:
+                    del self.flights[key]
+                if flight.value is not None and generation == self.generation:
+                    self.cache.set(key, flight.value, started)
+            flight.done.set()
+        return flight.value
+
+    def invalidate(self):
+        with self.lock:
+            self.generation += 1
+            self.flights.clear()
+            self.cache.invalidate()
+
+# -------------------- Instrumentation -------------------- #
+
+def command_label(command):
+    parts = command.split()
+    if not parts:
+        return ''
+    if parts[0] == 'pm2' and len(parts) > 1:
+        return f"pm2 {parts[1]}"
+    return parts[0]
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class CommandMetrics:
+    def __init__(self, command, label=None):
+        self.command = command
+        self.label = label or command_label(command)
+        self.timestamp = time.time()
+        self.started = time.perf_counter()
+        self.lock_wait = 0.0
+        self.channel_open = 0.0
+        self.first_byte = None
+        self.total = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.retries = 0
+        self.error = None
+
+    def lock_acquired(self):
+        self.lock_wait = time.perf_counter() - self.started
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+        return self
+
+    def to_dict(self):
+        return {
+            'timestamp': self.timestamp,
+            'label': self.label,
+            'command': self.command[:200],
+            'lock_wait_ms': round(self.lock_wait * 1000, 3),
+            'channel_open_ms': round(self.channel_open * 1000, 3),
+            'first_byte_ms': round(self.first_byte * 1000, 3) if self.first_byte is not None else None,
+            'total_ms': round((self.total or 0) * 1000, 3),
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'retries': self.retries,
+            'error': self.error
+        }
+
+class LatencyHistogram:
+    def __init__(self, window=HISTOGRAM_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.errors = 0
+        self.reused = 0
+
+    def add(self, metrics):
+        self.samples.append(metrics)
+        self.count += 1
+        if metrics.error:
+            self.errors += 1
+
+    def snapshot(self):
+        samples = list(self.samples)
+        totals = sorted(m.total * 1000 for m in samples)
+        buckets = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        for value in totals:
+            buckets[bisect.bisect_left(HISTOGRAM_BUCKETS_MS, value)] += 1
+        window = len(samples) or 1
+        first_bytes = [m.first_byte for m in samples if m.first_byte is not None]
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'reused': self.reused,
+            'window': len(samples),
+            'retries': sum(m.retries for m in samples),
+            'lock_wait_ms_avg': round(sum(m.lock_wait for m in samples) * 1000 / window, 3),
+            'channel_open_ms_avg': round(sum(m.channel_open for m in samples) * 1000 / window, 3),
+            'first_byte_ms_avg': round(sum(first_bytes) * 1000 / (len(first_bytes) or 1), 3),
+            'total_ms_p50': round(percentile(totals, 0.50), 3),
+            'total_ms_p95': round(percentile(totals, 0.95), 3),
+            'total_ms_p99': round(percentile(totals, 0.99), 3),
+            'total_ms_max': round(totals[-1], 3) if totals else 0.0,
+            'bytes_in': sum(m.bytes_in for m in samples),
+            'bytes_out': sum(m.bytes_out for m in samples),
+            'bucket_bounds_ms': HISTOGRAM_BUCKETS_MS,
+            'buckets': buckets
+        }
+
+class StallEvent:
+    __slots__ = ('timestamp', 'duration', 'handler')
+
+    def __init__(self, timestamp, duration, handler):
+        self.timestamp = timestamp
+        self.duration = duration
+        self.handler = handler
+
+    def to_dict(self):
+        return {'timestamp': self.timestamp, 'duration_ms': round(self.duration * 1000, 1), 'handler': self.handler}
+
+class UIWatchdog:
+    # A heartbeat scheduled with `after` measures how late the Tk main loop runs it. A monitor thread
+    # notices a stall while it is still in progress and records which handler the main thread is in.
+    def __init__(self, interval_ms=WATCHDOG_INTERVAL_MS, threshold_ms=STALL_THRESHOLD_MS):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.lock = threading.Lock()
+        self.lateness = deque(maxlen=HISTOGRAM_WINDOW)
+        self.stalls = deque(maxlen=STALL_HISTORY_LIMIT)
+        self.handlers = {}
+        self.stall_count = 0
+        self.stalled_total = 0.0
+        self.current = None
+        self.stall_handler = None
+        self.expected = None
+        self.root = None
+        self.main_thread_id = threading.main_thread().ident
+
+    def start(self, root):
+        if self.root is not None:
+            return
+        self.root = root
+        self.expected = time.perf_counter() + self.interval
+        root.after(int(self.interval * 1000), self.beat)
+        threading.Thread(target=self.monitor, daemon=True).start()
+
+    def beat(self):
+        now = time.perf_counter()
+        late = max(0.0, now - self.expected)
+        event = None
+        with self.lock:
+            self.lateness.append(late)
+            handler, self.stall_handler = self.stall_handler, None
+            if late >= self.threshold:
+                event = StallEvent(time.time(), late, handler or self.current or 'unknown')
+                self.stalls.append(event)
+                self.stall_count += 1
+                self.stalled_total += late
+        if event is not None:
+            logger.warning(f"UI stalled for {late * 1000:.0f}ms in {event.handler}.")
+        self.expected = now + self.interval
+        try:
+            self.root.after(int(self.interval * 1000), self.beat)
+        except tk.TclError:
+            self.root = None
+
+    def monitor(self):
+        while self.root is not None:
+            time.sleep(self.interval / 2)
+            if self.expected is None or time.perf_counter() - self.expected < self.threshold:
+                continue
+            with self.lock:
+                if self.stall_handler is None:
+                    self.stall_handler = self.current or self.main_thread_location()
+
+    def main_thread_location(self):
+        innermost = frame = sys._current_frames().get(self.main_thread_id)
+        while frame is not None and frame.f_code.co_filename != __file__:
+            frame = frame.f_back
+        frame = frame or innermost
+        if frame is None:
+            return None
+        return f"{frame.f_code.co_name} (line {frame.f_lineno})"
+
+    @contextmanager
+    def track(self, label):
+        on_main_thread = threading.get_ident() == self.main_thread_id
+        previous = self.current
+        if on_main_thread:
+            self.current = label
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if on_main_thread:
+                self.current = previous
+            with self.lock:
+                stats = self.handlers.get(label)
+                if stats is None:
+                    stats = self.handlers[label] = [0, 0.0, 0.0]
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] = max(stats[2], elapsed)
+
+    def snapshot(self):
+        with self.lock:
+            lateness = sorted(self.lateness)
+            stalls = [event.to_dict() for event in self.stalls]
+            handlers = {
+                label: {'count': count, 'total_ms': round(total * 1000, 1), 'max_ms': round(peak * 1000, 1)}
+                for label, (count, total, peak) in self.handlers.items()
+            }
+            stall_count, stalled_total = self.stall_count, self.stalled_total
+        return {
+            'lateness_ms_p50': round(percentile(lateness, 0.5) * 1000, 1),
+            'lateness_ms_p95': round(percentile(lateness, 0.95) * 1000, 1),
+            'lateness_ms_max': round(lateness[-1] * 1000, 1) if lateness else 0,
+            'stalls': stall_count,
+            'stalled_ms_total': round(stalled_total * 1000, 1),
+            'recent_stalls': stalls,
+            'handlers': handlers
+        }
+
+class Instrumentation:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.recent = deque(maxlen=RECENT_COMMANDS_LIMIT)
+        self.started_at = time.time()
+        self.watchdog = UIWatchdog()
+
+    def record(self, metrics):
+        with self.lock:
+            histogram = self.histograms.get(metrics.label)
+            if histogram is None:
+                histogram = self.histograms[metrics.label] = LatencyHistogram()
+            histogram.add(metrics)
+            self.recent.append(metrics)
+        logger.debug(
+            "command=%r lock_wait=%.1fms channel_open=%.1fms first_byte=%s total=%.1fms bytes_in=%d bytes_out=%d retries=%d error=%s",
+            metrics.label, metrics.lock_wait * 1000, metrics.channel_open * 1000,
+            f"{metrics.first_byte * 1000:.1f}ms" if metrics.first_byte is not None else 'N/A',
+            metrics.total * 1000, metrics.bytes_in, metrics.bytes_out, metrics.retries, metrics.error
+        )
+
+    def record_reused(self, label):
+        with self.lock:
+            histogram = self.histograms.get(label)
+            if histogram is None:
+                histogram = self.histograms[label] = LatencyHistogram()
+            histogram.reused += 1
+
+    def snapshot(self):
+        with self.lock:
+            commands = {label: histogram.snapshot() for label, histogram in self.histograms.items()}
+            recent = [m.to_dict() for m in self.recent]
+        return {
+            'generated_at': time.time(),
+            'started_at': self.started_at,
+            'commands': commands,
+            'recent': recent,
+            'ui': self.watchdog.snapshot()
+        }
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.recent.clear()
+
+    def dump_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=4)
+        logger.info("Diagnostics written to %s", path)
+
+instrumentation = Instrumentation()
+
+# -------------------- SSH Client Wrapper -------------------- #
+
+STATE_CONNECTED = 'connected'
+STATE_DEGRADED = 'degraded'
+STATE_RECONNECTING = 'reconnecting'
+STATE_DISCONNECTED = 'disconnected'
+
+class CommandTimeout(Exception):
+    pass
+
+class HostUnavailable(Exception):
+    pass
+
+class CommandCancelled(Exception):
+    pass
+
+class CommandHandle:
+    def __init__(self, label=None):
+        self.label = label
+        self.lock = threading.Lock()
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+        self.channel = None
+        self.result = None
+
+    def attach(self, channel):
+        with self.lock:
+            self.channel = channel
+            cancelled = self.cancelled.is_set()
+        if cancelled:
+            channel.close()
+            raise CommandCancelled()
+
+    def detach(self):
+        with self.lock:
+            self.channel = None
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise CommandCancelled()
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled.set()
+            channel = self.channel
+        if channel is not None:
+            channel.close()
+
+    def finish(self, result):
+        self.result = result
+        self.done.set()
+
+class HandleGroup:
+    def __init__(self, ssh_client):
+        self.ssh_client = ssh_client
+        self.handles = set()
+
+    def start(self, command, callback=None, label=None, timeout=COMMAND_TIMEOUT):
+        return self.track(self.ssh_client.start_command(command, callback, label, timeout))
+
+    def start_task(self, label, work, callback=None):
+        return self.track(self.ssh_client.start_task(label, work, callback))
+
+    def track(self, handle):
+        self.handles = {h for h in self.handles if not h.done.is_set()}
+        self.handles.add(handle)
+        return handle
+
+    def cancel(self):
+        for handle in list(self.handles):
+            handle.cancel()
+        self.handles.clear()
+
+def backoff_delay(attempt, base=RECONNECT_BACKOFF_BASE, maximum=RECONNECT_BACKOFF_MAX):
+    delay = min(maximum, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+class SSHClientWrapper:
+    def __init__(self, host, port, username, password, recorder=None, key_filename=None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.key_filename = key_filename
+        self.recorder = recorder
+        if recorder is not None:
+            recorder.start(host, port, username)
+        self.client = None
+        self.lock = threading.Lock()
+        self.handles = set()
+        self.handles_lock = threading.Lock()
+        self.reads = ReadCache()
+        self.cleanup_commands = []
+        # Recorded sessions must be replayable, so they keep every PM2 call on the CLI.
+        self.rpc = PM2RPCClient(self) if recorder is None else None
+        self.host_key_fingerprint = None
+        self.capabilities = {}
+        self.missing_commands = []
+        self.cpu_times = None
+        self.state = STATE_DISCONNECTED
+        self.state_detail = ''
+        self.state_listeners = []
+        self.last_error = None
+        self.last_error_kind = None
+        self.auth_failed = False
+        self.closed = False
+        self.wake_supervisor = threading.Event()
+        self.supervisor_thread = None
+        if self.connect():
+            self.set_state(STATE_CONNECTED)
+        self.start_supervisor()
+
+    # ---- Connection state ---- #
+
+    def add_state_listener(self, callback):
+        self.state_listeners.append(callback)
+
+    def set_state(self, state, detail=''):
+        if state == self.state and detail == self.state_detail:
+            return
+        logger.info(f"Connection state for {self.host}: {state} {detail}".rstrip())
+        self.state = state
+        self.state_detail = detail
+        for callback in list(self.state_listeners):
+            try:
+                callback(state, detail)
+            except Exception as e:
+                logger.warning(f"Connection state listener failed: {e}")
+
+    def is_available(self):
+        return self.state in (STATE_CONNECTED, STATE_DEGRADED)
+
+    def transport_active(self):
+        client = self.client
+        transport = client.get_transport() if client is not None else None
+        return transport is not None and transport.is_active()
+
+    def connect(self):
+        client = paramiko.SSHClient()
+        try:
+            logger.info(f"Attempting to connect to {self.host}:{self.port} as {self.username}...")
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect(
+                hostname=self.host,
+                port=self.port,
+                username=self.username,
+                password=self.password or None,
+                key_filename=self.key_filename or None,
+                timeout=CONNECT_TIMEOUT,
+                banner_timeout=CONNECT_TIMEOUT,
+                auth_timeout=CONNECT_TIMEOUT
+            )
+            client.get_transport().set_keepalive(30)
+        except paramiko.AuthenticationException as e:
+            return self.connect_failed(client, 'auth', e, "Authentication failed.")
+        except paramiko.SSHException as e:
+            return self.connect_failed(client, 'ssh', e, f"SSH connection failed: {e}")
+        except Exception as e:
+            return self.connect_failed(client, 'other', e, f"An unexpected error occurred while connecting: {e}")
+        previous, self.client = self.client, client
+        if previous is not None:
+            previous.close()
+        self.last_error = None
+        self.last_error_kind = None
+        self.auth_failed = False
+        self.load_capabilities()
+        return True
+
+    def connect_failed(self, client, kind, error, message):
+        client.close()
+        self.last_error = error
+        self.last_error_kind = kind
+        self.auth_failed = kind == 'auth'
+        logger.warning(message)
+        return False
+
+    # ---- Supervisor ---- #
+
+    def start_supervisor(self):
+        self.supervisor_thread = threading.Thread(target=self.supervise, daemon=True)
+        self.supervisor_thread.start()
+
+    def request_reconnect(self):
+        # Also retries after an authentication failure, which the supervisor otherwise leaves alone.
+        self.auth_failed = False
+        if not self.closed and self.state != STATE_RECONNECTING:
+            self.set_state(STATE_RECONNECTING)
+        self.wake_supervisor.set()
+
+    def connection_lost(self):
+        # Rejected credentials are not retried in the background, to avoid locking out the account.
+        if not self.auth_failed:
+            self.request_reconnect()
+
+    def supervise(self):
+        while not self.closed:
+            self.wake_supervisor.wait(SUPERVISOR_CHECK_INTERVAL)
+            self.wake_supervisor.clear()
+            if self.closed:
+                break
+            if self.transport_active() or self.auth_failed:
+                continue
+            self.reconnect_with_backoff()
+
+    def reconnect_with_backoff(self):
+        attempt = 0
+        while not self.closed:
+            self.set_state(STATE_RECONNECTING, translator.translate("reconnect_attempt", attempt=attempt + 1))
+            if self.connect():
+                self.set_state(STATE_CONNECTED)
+                return
+            if self.last_error_kind == 'auth':
+                self.set_state(STATE_DISCONNECTED, translator.translate("auth_error_message"))
+                return
+            delay = backoff_delay(attempt)
+            attempt += 1
+            self.set_state(STATE_RECONNECTING, translator.translate("reconnect_wait", attempt=attempt, delay=round(delay, 1)))
+            if self.wake_supervisor.wait(delay):
+                self.wake_supervisor.clear()
+
+    # ---- Capabilities ---- #
+
+    def get_host_key_fingerprint(self):
+        host_key = self.client.get_transport().get_remote_server_key()
+        return f"{host_key.get_name()}:{host_key.get_fingerprint().hex()}"
+
+    def load_capabilities(self):
+        self.host_key_fingerprint = self.get_host_key_fingerprint()
+        cached = capability_cache.get(self.host_key_fingerprint)
+        if cached:
+            self.capabilities = cached
+            logger.info(f"Using cached capabilities for {self.host} (CPU backend: {cached.get('cpu_backend')}).")
+            return
+        self.check_required_commands()
+
+    def check_required_commands(self):
+        output = self.run_command(CAPABILITY_PROBE_COMMAND, label='capability probe')
+        if output is None:
+            logger.warning("Capability probe failed.")
+            return
+        self.capabilities = parse_capabilities(output)
+        capability_cache.set(self.host_key_fingerprint, self.capabilities)
+        logger.info(f"Capabilities for {self.host}: PM2 {self.capabilities['pm2_version'] or 'N/A'}, {self.capabilities['os'] or self.capabilities['kernel'] or 'unknown OS'}, CPU backend: {self.capabilities['cpu_backend']}.")
+        self.missing_commands = [cmd for cmd, available in self.capabilities['commands'].items() if not available]
+        if self.missing_commands:
+            logger.warning(f"Missing commands: {', '.join(self.missing_commands)}")
+
+    # ---- Command execution ---- #
+
+    def exec_channel(self, command, metrics, deadline, handle=None):
+        if self.recorder is None:
+            return self.exec_remote(command, metrics, deadline, handle)
+        started = time.perf_counter()
+        try:
+            output, error = self.exec_remote(command, metrics, deadline, handle)
+        except CommandTimeout:
+            self.recorder.record(command, metrics.label, started, time.perf_counter() - started, failure='timeout')
+            raise
+        except Exception as e:
+            self.recorder.record(command, metrics.label, started, time.perf_counter() - started, failure=str(e) or type(e).__name__)
+            raise
+        self.recorder.record(command, metrics.label, started, time.perf_counter() - started, output, error)
+        return output, error
+
+    def exec_remote(self, command, metrics, deadline, handle=None):
+        transport = self.client.get_transport()
+        opened = time.perf_counter()
+        channel = transport.open_session(timeout=min(CHANNEL_OPEN_TIMEOUT, max(0.1, deadline - opened)))
+        try:
+            if handle is not None:
+                handle.attach(channel)
+            metrics.channel_open = time.perf_counter() - opened
+            channel.exec_command(command)
+            metrics.bytes_out += len(command.encode())
+            sent = time.perf_counter()
+            output_chunks = []
+            chunk = self.recv_before(channel.recv, channel, deadline)
+            metrics.first_byte = time.perf_counter() - sent
+            while chunk:
+                output_chunks.append(chunk)
+                chunk = self.recv_before(channel.recv, channel, deadline)
+            error_chunks = []
+            chunk = self.recv_before(channel.recv_stderr, channel, deadline)
+            while chunk:
+                error_chunks.append(chunk)
+                chunk = self.recv_before(channel.recv_stderr, channel, deadline)
+        except (paramiko.SSHException, EOFError, OSError):
+            if handle is not None:
+                handle.check()
+            raise
+        finally:
+            if handle is not None:
+                handle.detach()
+            channel.close()
+        if handle is not None:
+            handle.check()
+        output = b''.join(output_chunks)
+        error = b''.join(error_chunks)
+        metrics.bytes_in += len(output) + len(error)
+        return output.decode(errors='replace'), error.decode(errors='replace')
+
+    def recv_before(self, recv, channel, deadline):
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            raise CommandTimeout()
+        channel.settimeout(remaining)
+        try:
+            return recv(RECV_CHUNK_SIZE)
+        except socket.timeout:
+            raise CommandTimeout()
+
+    def run_command(self, command, label=None, timeout=COMMAND_TIMEOUT):
+        metrics = CommandMetrics(command, label)
+        try:
+            output, error = self.exec_channel(command, metrics, metrics.started + timeout)
+            return output
+        except Exception as e:
+            metrics.error = str(e) or type(e).__name__
+            logger.warning("Error executing command '%s': %s", metrics.label, metrics.error)
+            return None
+        finally:
+            instrumentation.record(metrics.finish())
+
+    def start_command(self, command, callback=None, label=None, timeout=COMMAND_TIMEOUT):
+        return self.start_task(label or command_label(command), lambda handle: self.execute_command(command, label, timeout, handle), callback)
+
+    def start_task(self, label, work, callback=None):
+        handle = CommandHandle(label)
+
+        def run():
+            result = work(handle)
+            handle.finish(result)
+            if callback is not None and not handle.cancelled.is_set():
+                callback(result)
+
+        threading.Thread(target=run, daemon=True).start()
+        return handle
+
+    def cancel_all(self):
+        with self.handles_lock:
+            handles = list(self.handles)
+        for handle in handles:
+            handle.cancel()
+        if handles:
+            logger.info(f"Cancelled {len(handles)} in-flight command(s).")
+
+    def acquire_lock(self, deadline, handle):
+        # Waits in short slices so a cancelled command leaves the queue without waiting for the holder.
+        while True:
+            handle.check()
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return False
+            if self.lock.acquire(timeout=min(LOCK_POLL_INTERVAL, remaining)):
+                if handle.cancelled.is_set():
+                    self.lock.release()
+                    raise CommandCancelled()
+                return True
+
+    def execute_command(self, command, label=None, timeout=COMMAND_TIMEOUT, handle=None):
+        metrics = CommandMetrics(command, label)
+        deadline = metrics.started + timeout
+        if handle is None:
+            handle = CommandHandle(metrics.label)
+        with self.handles_lock:
+            self.handles.add(handle)
+        try:
+            if not self.is_available():
+                raise HostUnavailable(self.state)
+            if not self.acquire_lock(deadline, handle):
+                raise CommandTimeout()
+            try:
+                metrics.lock_acquired()
+                if not self.is_available():
+                    raise HostUnavailable(self.state)
+                return self.execute_locked(command, metrics, deadline, handle)
+            finally:
+                self.lock.release()
+        except CommandCancelled:
+            metrics.error = "cancelled"
+            logger.info(f"Command '{metrics.label}' was cancelled.")
+            return None
+        except HostUnavailable as e:
+            metrics.error = f"host unavailable ({e})"
+            logger.debug(f"Skipping command '{metrics.label}': host is {e}.")
+            return None
+        except CommandTimeout:
+            metrics.error = "timeout"
+            logger.warning(f"Command '{metrics.label}' exceeded its {timeout}s deadline and was aborted.")
+            if self.transport_active():
+                self.set_state(STATE_DEGRADED, translator.translate("command_timed_out", command=metrics.label))
+            else:
+                self.connection_lost()
+            return None
+        finally:
+            with self.handles_lock:
+                self.handles.discard(handle)
+            instrumentation.record(metrics.finish())
+
+    def read_command(self, command, label=None, timeout=COMMAND_TIMEOUT):
+        # Only for commands without side effects; see ReadCache.
+        return self.reads.get(command, lambda: self.execute_command(command, label, timeout), label or command_label(command))
+
+    def invalidate_reads(self):
+        self.reads.invalidate()
+
+    def execute_locked(self, command, metrics, deadline, handle=None):
+        while True:
+            if not self.transport_active():
+                self.connection_lost()
+                raise HostUnavailable(self.state)
+            try:
+                logger.debug("Executing command: %s", command)
+                output, error = self.exec_channel(command, metrics, deadline, handle)
+            except (CommandTimeout, CommandCancelled):
+                raise
+            except (paramiko.SSHException, EOFError, OSError) as e:
+                logger.warning("Error executing command '%s': %s", metrics.label, e)
+                if self.transport_active() and metrics.retries == 0 and time.perf_counter() < deadline:
+                    metrics.retries += 1
+                    continue
+                metrics.error = str(e) or type(e).__name__
+                if self.transport_active():
+                    self.set_state(STATE_DEGRADED, translator.translate("command_failed", command=metrics.label))
+                else:
+                    self.connection_lost()
+                return None
+            if error and not command.startswith('pm2 '):
+                metrics.error = error.strip()[:200]
+                logger.warning("Command '%s' wrote to stderr: %s", metrics.label, error.strip())
+                return None
+            if self.state == STATE_DEGRADED:
+                self.set_state(STATE_CONNECTED)
+            logger.debug("Command '%s' returned %d bytes.", metrics.label, len(output))
+            return output
+
+    def open_stream(self, command):
+        if not self.is_available() or not self.transport_active():
+            return None
+        try:
+            channel = self.client.get_transport().open_session(timeout=CHANNEL_OPEN_TIMEOUT)
+            channel.exec_command(command)
+        except (paramiko.SSHException, EOFError, OSError) as e:
+            logger.warning("Failed to open stream '%s': %s", command_label(command), e)
+            return None
+        logger.info("Opened stream '%s'.", command_label(command))
+        return channel
+
+    def open_rpc_channel(self):
+        return open_rpc_relay(self)
+
+    def read_log(self, path, lines, skip=0, handle=None):
+        # Up to `lines` lines ending `skip` lines before the end of the file, and whether older lines exist.
+        output = self.execute_command(f"tail -n {skip + lines + 1} -- {shlex.quote(path)}", label='tail', handle=handle)
+        if output is None:
+            return None
+        available = output.split('\n')
+        if available[-1] == '':
+            available.pop()
+        end = max(0, len(available) - skip)
+        start = max(0, end - lines)
+        return ''.join(line + '\n' for line in available[start:end]), start > 0
+
+    def add_cleanup_command(self, command):
+        if command not in self.cleanup_commands:
+            self.cleanup_commands.append(command)
+
+    def run_cleanup_commands(self):
+        # Removes what the monitor left on the server, e.g. the delta snapshot; best effort with a short deadline.
+        if not self.transport_active():
+            return
+        for command in self.cleanup_commands:
+            self.execute_command(command, label='cleanup', timeout=CLEANUP_COMMAND_TIMEOUT)
+
+    def close(self):
+        if not self.closed:
+            # In-flight commands are cancelled first so the cleanup does not queue behind them.
+            self.cancel_all()
+            self.run_cleanup_commands()
+        self.closed = True
+        self.cancel_all()
+        if self.rpc is not None:
+            self.rpc.close()
+        self.wake_supervisor.set()
+        self.set_state(STATE_DISCONNECTED)
+        if self.client:
+            self.client.close()
+            self.client = None
+            logger.info("SSH connection closed.")
+        if self.recorder is not None:
+            self.recorder.close()
+
+# -------------------- Record and Replay -------------------- #
+
+SESSION_FORMAT_VERSION = 1
+
+class SessionRecorder:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.handle = None
+        self.started = None
+        self.count = 0
+
+    def start(self, host, port, username):
+        with self.lock:
+            self.handle = gzip.open(self.path, 'wt', encoding='utf-8')
+            self.started = time.perf_counter()
+            self.write({
+                'version': SESSION_FORMAT_VERSION,
+                'host': host,
+                'port': port,
+                'username': username,
+                'recorded_at': time.time()
+            })
+        logger.info(f"Recording remote commands to '{self.path}'.")
+
+    def record(self, command, label, started, duration, output='', error='', failure=None):
+        entry = {
+            't': round(started - self.started, 6),
+            'd': round(duration, 6),
+            'c': command,
+            'l': label,
+            'o': output,
+            'e': error
+        }
+        if failure is not None:
+            entry['f'] = failure
+        with self.lock:
+            if self.handle is not None:
+                self.write(entry)
+                self.count += 1
+
+    def write(self, entry):
+        self.handle.write(json.dumps(entry, separators=(',', ':')) + '\n')
+
+    def close(self):
+        with self.lock:
+            if self.handle is not None:
+                self.handle.close()
+                self.handle = None
+                logger.info(f"Recorded {self.count} commands to '{self.path}'.")
+
+class ReplaySession:
+    def __init__(self, path):
+        self.path = path
+        self.by_command = {}
+        self.by_label = {}
+        self.count = 0
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            self.header = json.loads(f.readline())
+            if self.header.get('version') != SESSION_FORMAT_VERSION:
+                raise ValueError(f"Unsupported session format version: {self.header.get('version')}")
+            for line in f:
+                entry = json.loads(line)
+                self.by_command.setdefault(entry['c'], deque()).append(entry)
+                self.by_label.setdefault(entry['l'], deque()).append(entry)
+                self.count += 1
+
+    def next_entry(self, command, label):
+        # Responses are served in recorded order; the last one is repeated once a command runs out.
+        for queue, key in ((self.by_command, command), (self.by_label, label)):
+            entries = queue.get(key)
+            if entries:
+                return entries.popleft() if len(entries) > 1 else entries[0]
+        return None
+
+    def close(self):
+        pass
+
+class ReplayClient(SSHClientWrapper):
+    def __init__(self, path, speed=1.0):
+        self.session = ReplaySession(path)
+        self.speed = speed
+        header = self.session.header
+        logger.info(f"Replaying {self.session.count} commands recorded from {header.get('host')} at {speed}x speed.")
+        SSHClientWrapper.__init__(self, header.get('host'), header.get('port'), header.get('username'), None)
+        self.rpc = None
+
+    def connect(self):
+        self.client = self.session
+        self.host_key_fingerprint = f"replay:{self.session.path}"
+        self.check_required_commands()
+        return True
+
+    def start_supervisor(self):
+        pass
+
+    def transport_active(self):
+        return not self.closed
+
+    def request_reconnect(self):
+        pass
+
+    def run_cleanup_commands(self):
+        pass
+
+    def open_stream(self, command):
+        logger.warning("Streams are not available while replaying a recorded session.")
+        return None
+
+    def exec_remote(self, command, metrics, deadline, handle=None):
+        entry = self.session.next_entry(command, metrics.label)
+        if entry is None:
+            raise paramiko.SSHException("command not present in the recorded session")
+        cancelled = handle.cancelled if handle is not None else threading.Event()
+        if self.speed > 0:
+            delay = entry['d'] / self.speed
+            if time.perf_counter() + delay > deadline:
+                cancelled.wait(max(0, deadline - time.perf_counter()))
+                if handle is not None:
+                    handle.check()
+                raise CommandTimeout()
+            cancelled.wait(delay)
+        if handle is not None:
+            handle.check()
+        metrics.channel_open = 0
+        metrics.first_byte = 0
+        metrics.bytes_out += len(command.encode())
+        metrics.bytes_in += len(entry['o'].encode()) + len(entry['e'].encode())
+        failure = entry.get('f')
+        if failure == 'timeout':
+            raise CommandTimeout()
+        if failure is not None:
+            raise paramiko.SSHException(failure)
+        return entry['o'], entry['e']
+
+# -------------------- Local Execution -------------------- #
+
+def kill_process_group(process):
+    if process.poll() is None:
+        try:
+            if hasattr(os, 'killpg'):
+                os.killpg(process.pid, signal.SIGTERM)
+            else:
+                process.kill()
+        except OSError:
+            pass
+
+class LocalProcess:
+    # Stands in for a channel in CommandHandle: closing it stops the command and anything it started.
+    def __init__(self, process):
+        self.process = process
+
+    def close(self):
+        kill_process_group(self.process)
+
+class LocalChannel(LocalProcess):
+    # The parts of a paramiko channel that streams and the RPC client use, backed by a local process.
+    def __init__(self, command):
+        LocalProcess.__init__(self, subprocess.Popen(
+            command, shell=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True
+        ))
+        self.timeout = None
+        self.closed = False
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def recv(self, size):
+        return self.read(self.process.stdout, size)
+
+    def recv_stderr(self, size):
+        return self.read(self.process.stderr, size)
+
+    def recv_stderr_ready(self):
+        try:
+            return bool(select.select([self.process.stderr], [], [], 0)[0])
+        except ValueError:
+            return False
+
+    def read(self, stream, size):
+        try:
+            if self.timeout is not None and not select.select([stream], [], [], self.timeout)[0]:
+                raise socket.timeout()
+            return os.read(stream.fileno(), size)
+        except ValueError:
+            return b''
+
+    def sendall(self, data):
+        try:
+            self.process.stdin.write(data)
+            self.process.stdin.flush()
+        except ValueError:
+            raise OSError("channel is closed")
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        LocalProcess.close(self)
+        for stream in (self.process.stdin, self.process.stdout, self.process.stderr):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            pass
+
+class LocalSession:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.channels = set()
+
+    def add(self, channel):
+        with self.lock:
+            self.channels = {c for c in self.channels if not c.closed}
+            self.channels.add(channel)
+
+    def close(self):
+        with self.lock:
+            channels, self.channels = self.channels, set()
+        for channel in channels:
+            channel.close()
+
+def tail_file_lines(path, lines, skip=0):
+    # Pages backwards from the end of the file through a memory map, so only the pages holding the
+    # requested lines are read however large the log has grown.
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return '', False
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            end = size - 1 if view[size - 1] == 0x0a else size
+            for _ in range(skip):
+                end = view.rfind(b'\n', 0, end)
+                if end < 0:
+                    return '', False
+            start = end
+            for _ in range(lines):
+                start = view.rfind(b'\n', 0, start)
+                if start < 0:
+                    break
+            return view[start + 1:end].decode(errors='replace') + '\n', start >= 0
+
+class LocalClient(SSHClientWrapper):
+    # Runs commands on this machine instead of over SSH, for monitors running on the PM2 host itself.
+    # Everything built on execute_command (instrumentation, cancellation, shared reads) works unchanged.
+    def __init__(self, recorder=None):
+        SSHClientWrapper.__init__(self, socket.gethostname(), None, getpass.getuser(), None, recorder=recorder)
+
+    def connect(self):
+        self.client = LocalSession()
+        logger.info(f"Monitoring PM2 on this machine ({self.host}) without SSH.")
+        self.load_capabilities()
+        return True
+
+    def get_host_key_fingerprint(self):
+        return f"local:{self.host}"
+
+    def start_supervisor(self):
+        pass
+
+    def transport_active(self):
+        return not self.closed
+
+    def request_reconnect(self):
+        pass
+
+    def exec_remote(self, command, metrics, deadline, handle=None):
+        started = time.perf_counter()
+        process = subprocess.Popen(command, shell=True, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True)
+        metrics.channel_open = time.perf_counter() - started
+        try:
+            if handle is not None:
+                handle.attach(LocalProcess(process))
+            try:
+                output, error = process.communicate(timeout=max(0, deadline - time.perf_counter()))
+            except subprocess.TimeoutExpired:
+                raise CommandTimeout()
+        finally:
+            if handle is not None:
+                handle.detach()
+            kill_process_group(process)
+        if handle is not None:
+            handle.check()
+        metrics.first_byte = time.perf_counter() - started
+        metrics.bytes_out += len(command.encode())
+        metrics.bytes_in += len(output) + len(error)
+        return output.decode(errors='replace'), error.decode(errors='replace')
+
+    def open_stream(self, command):
+        if self.closed:
+            return None
+        try:
+            channel = LocalChannel(command)
+        except OSError as e:
+            logger.warning("Failed to open stream '%s': %s", command_label(command), e)
+            return None
+        self.client.add(channel)
+        logger.info("Opened stream '%s'.", command_label(command))
+        return channel
+
+    def open_rpc_channel(self):
+        # The daemon's socket is on this machine, so no relay is needed.
+        path = os.path.join(os.environ.get('PM2_HOME') or os.path.expanduser('~/.pm2'), 'rpc.sock')
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(PM2_RPC_CONNECT_TIMEOUT)
+            sock.connect(path)
+            sock.settimeout(None)
+        except OSError as e:
+            sock.close()
+            raise PM2RPCUnavailable(f"{path}: {e.strerror or e}")
+        return sock
+
+    def read_log(self, path, lines, skip=0, handle=None):
+        metrics = CommandMetrics(f"read {path}", 'read log')
+        try:
+            if handle is not None:
+                handle.check()
+            text, more = tail_file_lines(path, lines, skip)
+            metrics.bytes_in = len(text)
+            return text, more
+        except CommandCancelled:
+            metrics.error = "cancelled"
+            return None
+        except (OSError, ValueError) as e:
+            metrics.error = str(e) or type(e).__name__
+            logger.warning(f"Reading log '{path}' failed: {metrics.error}")
+            return None
+        finally:
+            instrumentation.record(metrics.finish())
+
+# -------------------- PM2 RPC -------------------- #
+
+PM2_RPC_READY = b'PM2RPC\n'
+# Runs on the server: pipes the SSH channel to the PM2 daemon's RPC socket once it is connected.
+PM2_RPC_RELAY_SCRIPT = (
+    'const s=require("net").connect(process.argv[1]);'
+    's.on("connect",()=>{process.stdout.write("PM2RPC\\n");process.stdin.pipe(s);s.pipe(process.stdout);});'
+    's.on("error",e=>{process.stderr.write(e.message);process.exit(1);});'
+    's.on("close",()=>process.exit(0));'
+)
+PM2_RPC_RELAY_COMMAND = f'node -e {shlex.quote(PM2_RPC_RELAY_SCRIPT)} "${{PM2_HOME:-$HOME/.pm2}}/rpc.sock"'
+PM2_RPC_CONNECT_TIMEOUT = 5
+PM2_RPC_RETRY_INTERVAL = 300
+# `pm2 start <id>` on an existing process is a restart as far as the daemon is concerned.
+PM2_RPC_ACTIONS = {'start': 'restartProcessId', 'restart': 'restartProcessId', 'stop': 'stopProcessId'}
+AMP_VERSION = 1
+
+class PM2RPCError(Exception):
+    pass
+
+class PM2RPCUnavailable(PM2RPCError):
+    pass
+
+def amp_pack(value):
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return b's:' + value.encode()
+    return b'j:' + json.dumps(value, separators=(',', ':')).encode()
+
+def amp_unpack(data):
+    if data[:2] == b'j:':
+        return json.loads(data[2:])
+    if data[:2] == b's:':
+        return data[2:].decode(errors='replace')
+    return data
+
+def amp_encode(args):
+    packed = [amp_pack(arg) for arg in args]
+    parts = [bytes([AMP_VERSION << 4 | len(packed)])]
+    for data in packed:
+        parts.append(struct.pack('>I', len(data)))
+        parts.append(data)
+    return b''.join(parts)
+
+class AmpDecoder:
+    # Frames used by PM2's axon sockets: one byte holding the protocol version and argument count, then
+    # each argument as a 32-bit big-endian length and its bytes. Partial frames wait for more data.
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        self.buffer.extend(data)
+        messages = []
+        while self.buffer:
+            if self.buffer[0] >> 4 != AMP_VERSION:
+                raise PM2RPCError(f"unexpected frame version {self.buffer[0] >> 4}")
+            offset = 1
+            args = []
+            for _ in range(self.buffer[0] & 0x0f):
+                if len(self.buffer) < offset + 4:
+                    return messages
+                length = struct.unpack_from('>I', self.buffer, offset)[0]
+                offset += 4
+                if len(self.buffer) < offset + length:
+                    return messages
+                args.append(bytes(self.buffer[offset:offset + length]))
+                offset += length
+            del self.buffer[:offset]
+            messages.append(([amp_unpack(arg) for arg in args], offset))
+        return messages
+
+class PM2RPCCall:
+    def __init__(self, client, call_id, metrics):
+        self.client = client
+        self.call_id = call_id
+        self.metrics = metrics
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+    def settle(self, value=None, error=None):
+        with self.lock:
+            if self.done.is_set():
+                return
+            self.value = value
+            self.error = error
+            self.metrics.error = str(error) if error is not None else None
+            self.done.set()
+        instrumentation.record(self.metrics.finish())
+
+    def result(self, timeout=COMMAND_TIMEOUT):
+        if not self.done.wait(timeout):
+            self.client.forget(self)
+            self.settle(error="timeout")
+        if isinstance(self.error, PM2RPCError):
+            raise self.error
+        if self.error is not None:
+            self.client.call_failed(self.error)
+            raise PM2RPCUnavailable(self.error)
+        return self.value
+
+class PM2RPCClient:
+    # Speaks PM2's daemon RPC protocol through a relay started once over the existing SSH transport, so
+    # listing and controlling processes no longer starts the pm2 CLI (a full Node.js process) per call.
+    # Requests are tagged with ids and may overlap; replies are matched back by a reader thread.
+    def __init__(self, ssh_client):
+        self.ssh_client = ssh_client
+        self.enabled = True
+        self.lock = threading.Lock()
+        self.channel = None
+        self.pending = {}
+        self.identity = secrets.token_hex(4)
+        self.ids = 0
+        self.failed_at = None
+
+    def available(self):
+        if not self.enabled or not self.ssh_client.capabilities.get('node', False):
+            return False
+        return self.failed_at is None or time.monotonic() - self.failed_at > PM2_RPC_RETRY_INTERVAL
+
+    def connect(self):
+        channel = self.channel = self.ssh_client.open_rpc_channel()
+        threading.Thread(target=self.read_loop, args=(channel,), daemon=True).start()
+        logger.info(f"Connected to the PM2 daemon on {self.ssh_client.host} over RPC.")
+
+    def request(self, method, *args):
+        if not self.ssh_client.is_available():
+            raise PM2RPCUnavailable(f"host is {self.ssh_client.state}")
+        metrics = CommandMetrics(f"rpc {method}", f"rpc {method}")
+        with self.lock:
+            if self.channel is None:
+                try:
+                    self.connect()
+                except (PM2RPCError, paramiko.SSHException, EOFError, OSError) as e:
+                    self.failed_at = time.monotonic()
+                    logger.warning(f"PM2 RPC is unavailable on {self.ssh_client.host} ({e}); using the pm2 CLI.")
+                    raise PM2RPCUnavailable(str(e) or type(e).__name__)
+            metrics.lock_acquired()
+            self.ids += 1
+            call = PM2RPCCall(self, f"{self.identity}:{self.ids}", metrics)
+            frame = amp_encode([{'type': 'call', 'method': method, 'args': list(args)}, call.call_id])
+            self.pending[call.call_id] = call
+            error = None
+            try:
+                self.channel.sendall(frame)
+            except (paramiko.SSHException, EOFError, OSError) as e:
+                self.pending.pop(call.call_id, None)
+                error = str(e) or type(e).__name__
+                call.settle(error=error)
+        if error is not None:
+            self.call_failed(error)
+            raise PM2RPCUnavailable(error)
+        metrics.bytes_out += len(frame)
+        return call
+
+    def call_failed(self, error):
+        # A daemon that accepts the relay but stalls would otherwise cost every call a full timeout,
+        # so the CLI is used until the retry interval has passed and the relay is reopened then.
+        with self.lock:
+            self.failed_at = time.monotonic()
+            channel = self.channel
+        if channel is not None:
+            channel.close()
+        logger.warning(f"PM2 RPC call failed on {self.ssh_client.host} ({error}); using the pm2 CLI for {PM2_RPC_RETRY_INTERVAL}s.")
+
+    def call(self, method, *args, timeout=COMMAND_TIMEOUT):
+        return self.request(method, *args).result(timeout)
+
+    def try_call(self, method, *args):
+        try:
+            return self.call(method, *args)
+        except PM2RPCError as e:
+            logger.warning(f"PM2 RPC '{method}' failed: {e}")
+            return None
+
+    def forget(self, call):
+        with self.lock:
+            self.pending.pop(call.call_id, None)
+
+    def read_loop(self, channel):
+        decoder = AmpDecoder()
+        error = "end of stream"
+        try:
+            while True:
+                data = channel.recv(RECV_CHUNK_SIZE)
+                if not data:
+                    break
+                for message, size in decoder.feed(data):
+                    self.dispatch(message, size)
+        except (PM2RPCError, ValueError, paramiko.SSHException, EOFError, OSError) as e:
+            error = str(e) or type(e).__name__
+        self.disconnect(channel, error)
+
+    def dispatch(self, message, size):
+        if len(message) < 2:
+            return
+        with self.lock:
+            call = self.pending.pop(message[-1], None)
+        if call is None:
+            return
+        call.metrics.bytes_in += size
+        reply = message[0]
+        if not isinstance(reply, dict):
+            call.settle(error="malformed reply")
+        elif reply.get('error'):
+            error = reply['error']
+            call.settle(error=PM2RPCError(error.get('message', error) if isinstance(error, dict) else error))
+        else:
+            values = reply.get('args') or [None]
+            call.settle(values[0])
+
+    def disconnect(self, channel, error):
+        with self.lock:
+            if self.channel is channel:
+                self.channel = None
+            pending, self.pending = self.pending, {}
+        channel.close()
+        for call in pending.values():
+            call.settle(error=error)
+        if pending or not self.ssh_client.closed:
+            logger.info(f"PM2 RPC relay closed: {error}.")
+
+    def close(self):
+        self.enabled = False
+        with self.lock:
+            channel = self.channel
+        if channel is not None:
+            channel.close()
+
+def open_rpc_relay(ssh_client):
+    channel = ssh_client.open_stream(PM2_RPC_RELAY_COMMAND)
+    if channel is None:
+        raise PM2RPCUnavailable("relay channel could not be opened")
+    try:
+        channel.settimeout(PM2_RPC_CONNECT_TIMEOUT)
+        ready = b''
+        while len(ready) < len(PM2_RPC_READY):
+            chunk = channel.recv(len(PM2_RPC_READY) - len(ready))
+            if not chunk:
+                break
+            ready += chunk
+        if ready != PM2_RPC_READY:
+            error = channel.recv_stderr(RECV_CHUNK_SIZE) if channel.recv_stderr_ready() else b''
+            raise PM2RPCUnavailable(error.decode(errors='replace').strip() or "relay exited")
+        channel.settimeout(None)
+    except socket.timeout:
+        channel.close()
+        raise PM2RPCUnavailable("relay did not connect to the daemon")
+    except (PM2RPCError, paramiko.SSHException, EOFError, OSError):
+        channel.close()
+        raise
+    return channel
+
+def pm2_rpc(ssh_client):
+    rpc = getattr(ssh_client, 'rpc', None)
+    return rpc if rpc is not None and rpc.available() else None
+
+def fetch_monitor_data(ssh_client):
+    # The process list `pm2 jlist` prints, read from the daemon directly; None when RPC cannot be used.
+    rpc = pm2_rpc(ssh_client)
+    if rpc is None:
+        return None
+    return ssh_client.reads.get('rpc getMonitorData', lambda: rpc.try_call('getMonitorData', {}), 'rpc getMonitorData')
+
+def rpc_target_ids(processes, app_id):
+    target = str(app_id)
+    if target.lower() == 'all':
+        return [process['pm_id'] for process in processes]
+    if target.isdigit():
+        return [int(target)] if any(process['pm_id'] == int(target) for process in processes) else []
+    name = shlex.split(target)[0] if target else ''
+    return [process['pm_id'] for process in processes if process.get('name') == name]
+
+def control_service_rpc(ssh_client, action, app_id):
+    # True or False once the daemon has handled the action; None to fall back to the pm2 CLI.
+    method = PM2_RPC_ACTIONS.get(action)
+    rpc = pm2_rpc(ssh_client) if method is not None else None
+    if rpc is None:
+        return None
+    try:
+        ids = rpc_target_ids(rpc.call('getMonitorData', {}), app_id)
+    except PM2RPCError as e:
+        logger.warning(f"PM2 RPC could not resolve '{app_id}': {e}")
+        return None
+    if not ids:
+        return None
+    calls = []
+    try:
+        for pm_id in ids:
+            calls.append(rpc.request(method, {'id': pm_id, 'env': {}}))
+        for call in calls:
+            call.result()
+    except PM2RPCError as e:
+        # Some processes may already have been acted on, so the CLI is not retried.
+        logger.error(f"PM2 RPC {action} of '{app_id}' failed: {e}")
+        return False
+    logger.info(f"Applied {action} to {len(ids)} process(es) over PM2 RPC.")
+    return True
+
+def describe_process(process):
+    # Mirrors the tables of `pm2 describe` for processes read over RPC.
+    env = process.get('pm2_env') or {}
+    created_at = env.get('created_at')
+    fields = [
+        ('status', env.get('status')),
+        ('name', process.get('name')),
+        ('namespace', env.get('namespace')),
+        ('version', env.get('version')),
+        ('restarts', env.get('restart_time')),
+        ('uptime', format_uptime(env.get('pm_uptime')) if env.get('status') == 'online' else 0),
+        ('script path', env.get('pm_exec_path')),
+        ('script args', ' '.join(str(arg) for arg in env.get('args') or []) or None),
+        ('error log path', env.get('pm_err_log_path')),
+        ('out log path', env.get('pm_out_log_path')),
+        ('pid path', env.get('pm_pid_path')),
+        ('interpreter', env.get('exec_interpreter')),
+        ('interpreter args', ' '.join(str(arg) for arg in env.get('node_args') or []) or None),
+        ('script id', process.get('pm_id')),
+        ('exec cwd', env.get('pm_cwd')),
+        ('exec mode', env.get('exec_mode')),
+        ('node.js version', env.get('node_version')),
+        ('node env', env.get('NODE_ENV')),
+        ('watch & reload', '✔' if env.get('watch') else '✘'),
+        ('unstable restarts', env.get('unstable_restarts')),
+        ('created at', datetime.fromtimestamp(created_at / 1000).isoformat() if created_at else None)
+    ]
+    sections = [(
+        f"Describing process with id {process.get('pm_id')} - name {process.get('name')}",
+        [(key, str(value)) for key, value in fields if value is not None]
+    )]
+    monitors = env.get('axm_monitor') or {}
+    if monitors:
+        sections.append(('Code metrics value', [
+            (key, f"{metric.get('value')} {metric.get('unit') or ''}".strip() if isinstance(metric, dict) else str(metric))
+            for key, metric in monitors.items()
+        ]))
+    return sections
+
+# -------------------- PM2 and System Resource Retrieval -------------------- #
+
+PM2_LIST_COMMAND = 'pm2 jlist'
+CPU_USAGE_COMMAND_MPSTAT = "mpstat 1 1 | awk '/Average/ {print 100 - $12}'"
+CPU_USAGE_COMMAND_TOP = 'top -bn1 | grep -i "Cpu(s)"'
+CPU_USAGE_COMMAND_PROC = 'head -n 1 /proc/stat'
+MEMORY_USAGE_COMMAND = 'free -m'
+
+BYTES_PER_MB = 1024 * 1024
+SERVICE_COLUMNS = ('ID', 'App Name', 'Version', 'PORT', 'Status', 'CPU (%)', 'Memory (MB)', 'Uptime', 'Restarts')
+PROCESS_METRIC_COLUMNS = ('Threads', 'FDs', 'Read (KB/s)', 'Write (KB/s)', 'Ctx Switches/s')
+DELTA_FIELDS = {
+    'name': 'name',
+    'version': 'version',
+    'status': 'status',
+    'cpu': 'cpu',
+    'memory': 'memory',
+    'pm_uptime': 'pm_uptime',
+    'port': 'port',
+    'pid': 'pid',
+    'out': 'out_log_path',
+    'err': 'err_log_path',
+    'restarts': 'restarts',
+    'unstable': 'unstable_restarts',
+    'maxmem': 'max_memory',
+    'axm': 'axm'
+}
+DELTA_NUMERIC_FIELDS = {'cpu', 'memory', 'restarts', 'unstable_restarts'}
+DELTA_TEXT_FIELDS = {'name', 'out_log_path', 'err_log_path'}
+DELTA_JSON_FIELDS = {'axm'}
+
+class ServiceRecord:
+    __slots__ = (
+        'pm_id', 'name', 'version', 'status', 'cpu', 'memory', 'pm_uptime', 'port', 'pid', 'out_log_path', 'err_log_path',
+        'restarts', 'unstable_restarts', 'max_memory', 'threads', 'fds', 'read_rate', 'write_rate', 'ctx_rate', 'axm', 'custom'
+    )
+
+    def __init__(self, pm_id, name, version, status, cpu, memory, pm_uptime, port, pid, out_log_path, err_log_path, restarts=0, unstable_restarts=0, max_memory=0):
+        self.pm_id = pm_id
+        self.name = name
+        self.version = version
+        self.status = status
+        self.cpu = cpu
+        self.memory = memory
+        self.pm_uptime = pm_uptime
+        self.port = port
+        self.pid = pid
+        self.out_log_path = out_log_path
+        self.err_log_path = err_log_path
+        self.restarts = restarts
+        self.unstable_restarts = unstable_restarts
+        self.max_memory = max_memory
+        self.threads = None
+        self.fds = None
+        self.read_rate = None
+        self.write_rate = None
+        self.ctx_rate = None
+        self.axm = {}
+        self.custom = {}
+
+    @classmethod
+    def from_pm2(cls, svc):
+        pm2_env = svc.get('pm2_env', {})
+        monit = svc.get('monit', {})
+        record = cls(
+            pm_id=svc.get('pm_id'),
+            name=svc.get('name') or '',
+            version=pm2_env.get('version'),
+            status=pm2_env.get('status'),
+            cpu=monit.get('cpu') or 0,
+            memory=monit.get('memory') or 0,
+            pm_uptime=pm2_env.get('pm_uptime'),
+            port=pm2_env.get('PORT'),
+            pid=svc.get('pid'),
+            out_log_path=pm2_env.get('pm_out_log_path', ''),
+            err_log_path=pm2_env.get('pm_err_log_path', ''),
+            restarts=pm2_env.get('restart_time') or 0,
+            unstable_restarts=pm2_env.get('unstable_restarts') or 0,
+            max_memory=parse_memory_limit(pm2_env.get('max_memory_restart'))
+        )
+        record.axm = {key: entry.get('value') for key, entry in (pm2_env.get('axm_monitor') or {}).items() if isinstance(entry, dict)}
+        return record
+
+    @classmethod
+    def from_delta(cls, record):
+        svc = cls(record['pm_id'], '', None, None, 0, 0, None, None, None, '', '')
+        svc.apply_delta(record)
+        return svc
+
+    def apply_delta(self, record):
+        for key, value in record.items():
+            attribute = DELTA_FIELDS.get(key)
+            if attribute is None:
+                continue
+            if attribute in DELTA_NUMERIC_FIELDS:
+                value = value or 0
+            elif attribute == 'max_memory':
+                # PM2 keeps the limit as given, e.g. "200M"; normalized like from_pm2.
+                value = parse_memory_limit(value)
+            elif attribute in DELTA_TEXT_FIELDS:
+                value = value or ''
+            elif attribute in DELTA_JSON_FIELDS:
+                value = json.loads(value) if value else {}
+            setattr(self, attribute, value)
+
+    @property
+    def memory_mb(self):
+        return round(self.memory / BYTES_PER_MB, 2)
+
+    @property
+    def uptime_seconds(self):
+        if not self.pm_uptime:
+            return 0
+        return max(0, int(time.time() - self.pm_uptime / 1000))
+
+    @property
+    def port_number(self):
+        try:
+            return int(self.port)
+        except (TypeError, ValueError):
+            return -1
+
+    def display_values(self):
+        return (
+            self.pm_id,
+            self.name,
+            self.version if self.version is not None else 'N/A',
+            self.port if self.port is not None else 'N/A',
+            self.status,
+            self.cpu,
+            self.memory_mb,
+            format_uptime(self.pm_uptime),
+            self.restarts,
+            format_optional(self.threads),
+            format_optional(self.fds),
+            format_optional(self.read_rate, 1024),
+            format_optional(self.write_rate, 1024),
+            format_optional(self.ctx_rate)
+        )
+
+MEMORY_LIMIT_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMG]?)B?\s*$', re.IGNORECASE)
+MEMORY_LIMIT_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+def parse_memory_limit(value):
+    if isinstance(value, (int, float)):
+        return max(0, int(value))
+    match = MEMORY_LIMIT_PATTERN.match(str(value or ''))
+    if not match:
+        return 0
+    return int(float(match.group(1)) * MEMORY_LIMIT_UNITS[match.group(2).upper()])
+
+def format_optional(value, divisor=1):
+    if value is None:
+        return 'N/A'
+    if divisor != 1 or isinstance(value, float):
+        return round(value / divisor, 1)
+    return value
+
+def optional_sort_key(value):
+    return value if value is not None else -1
+
+SERVICE_SORT_KEYS = {
+    'ID': lambda svc: svc.pm_id if svc.pm_id is not None else -1,
+    'App Name': lambda svc: svc.name.lower(),
+    'Version': lambda svc: str(svc.version).lower(),
+    'PORT': lambda svc: svc.port_number,
+    'Status': lambda svc: str(svc.status).lower(),
+    'CPU (%)': lambda svc: svc.cpu,
+    'Memory (MB)': lambda svc: svc.memory,
+    'Uptime': lambda svc: svc.uptime_seconds,
+    'Restarts': lambda svc: svc.restarts,
+    'Threads': lambda svc: optional_sort_key(svc.threads),
+    'FDs': lambda svc: optional_sort_key(svc.fds),
+    'Read (KB/s)': lambda svc: optional_sort_key(svc.read_rate),
+    'Write (KB/s)': lambda svc: optional_sort_key(svc.write_rate),
+    'Ctx Switches/s': lambda svc: optional_sort_key(svc.ctx_rate)
+}
+
+def parse_pm2_services(output):
+    return [ServiceRecord.from_pm2(svc) for svc in json.loads(output)]
+
+def index_services(services):
+    return {svc.pm_id: svc for svc in services}
+
+PM2_DESCRIBE_COMMAND = 'pm2 describe {pm_id}'
+ANSI_ESCAPE_PATTERN = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+TABLE_SEPARATORS = '│|'
+
+def parse_pm2_describe(output):
+    sections = []
+    current = None
+    title = ''
+    for raw_line in output.splitlines():
+        line = ANSI_ESCAPE_PATTERN.sub('', raw_line).strip()
+        if not line:
+            continue
+        if line[0] in TABLE_SEPARATORS:
+            cells = [cell.strip() for cell in re.split(r'[│|]', line.strip(TABLE_SEPARATORS))]
+            if len(cells) == 2 and cells[0]:
+                if current is None:
+                    current = (title, [])
+                    sections.append(current)
+                current[1].append((cells[0], cells[1]))
+        elif line[0] == '┌':
+            current = None
+        elif line[0] not in '└├+─':
+            title = line
+            current = None
+    return sections
+
+def get_pm2_description(ssh_client, pm_id):
+    processes = fetch_monitor_data(ssh_client)
+    if processes is not None:
+        process = next((process for process in processes if process.get('pm_id') == int(pm_id)), None)
+        return describe_process(process) if process is not None else []
+    output = ssh_client.read_command(PM2_DESCRIBE_COMMAND.format(pm_id=int(pm_id)), label='pm2 describe')
+    if output is None:
+        return None
+    return parse_pm2_describe(output)
+
+def parse_cpu_proc(cpu_output, ssh_client):
+    try:
+        values = [int(v) for v in cpu_output.split()[1:9]]
+        idle = values[3] + values[4]
+        total = sum(values)
+        previous = ssh_client.cpu_times
+        ssh_client.cpu_times = (idle, total)
+        if previous and total > previous[1]:
+            idle, total = idle - previous[0], total - previous[1]
+        cpu_usage = round(100 * (1 - idle / total), 2)
+        logger.debug(f"CPU Usage (/proc/stat): {cpu_usage}%")
+        return cpu_usage
+    except (ValueError, IndexError, ZeroDivisionError):
+        logger.warning("Failed to parse CPU usage from /proc/stat output.")
+        return "N/A"
+
+def parse_cpu_mpstat(cpu_output, ssh_client):
+    try:
+        cpu_usage = round(float(cpu_output.strip()), 2)
+        logger.debug(f"CPU Usage (mpstat): {cpu_usage}%")
+        return cpu_usage
+    except ValueError:
+        logger.warning("Failed to parse CPU usage from mpstat output.")
+        return "N/A"
+
+def parse_cpu_top(cpu_output, ssh_client):
+    match = re.search(r'(\d+\.\d+)\s*%?\s*id', cpu_output, re.IGNORECASE)
+    if match:
+        idle_percent = float(match.group(1))
+        cpu_usage = round(100 - idle_percent, 2)
+        logger.debug(f"CPU Usage (top): {cpu_usage}%")
+        return cpu_usage
+    logger.warning("Failed to parse CPU usage from top output.")
+    return "N/A"
+
+CPU_BACKEND_COMMANDS = {
+    'proc': CPU_USAGE_COMMAND_PROC,
+    'mpstat': CPU_USAGE_COMMAND_MPSTAT,
+    'top': CPU_USAGE_COMMAND_TOP
+}
+
+CPU_BACKEND_PARSERS = {
+    'proc': parse_cpu_proc,
+    'mpstat': parse_cpu_mpstat,
+    'top': parse_cpu_top
+}
+
+def get_cpu_backend(ssh_client):
+    return ssh_client.capabilities.get('cpu_backend') or 'mpstat'
+
+def parse_memory_values(mem_output):
+    try:
+        lines = mem_output.split('\n')
+        mem_line = next((line for line in lines if line.startswith('Mem:')), None)
+        if mem_line:
+            parts = mem_line.split()
+            return float(parts[2]), float(parts[1])
+    except Exception:
+        logger.warning("Failed to parse memory usage.")
+    return None, None
+
+def format_uptime(epoch_time):
+    try:
+        if not epoch_time:
+            return "N/A"
+        current_time = time.time()
+        uptime_seconds = current_time - (epoch_time / 1000)
+        if uptime_seconds < 0:
+            return "N/A"
+        days, remainder = divmod(int(uptime_seconds), 86400)
+        hours, remainder = divmod(remainder, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        return f"{days}d {hours}h {minutes}m {seconds}s"
+    except:
+        return "N/A"
+
+# -------------------- Host Metrics -------------------- #
+
+LOADAVG_COMMAND = 'cat /proc/loadavg'
+DISKSTATS_COMMAND = 'cat /proc/diskstats'
+NETDEV_COMMAND = 'cat /proc/net/dev'
+DISK_SECTOR_BYTES = 512
+VIRTUAL_DISK_PATTERN = re.compile(r'^(loop|ram|zram|sr|fd|dm-)')
+DISK_PARTITION_PATTERN = re.compile(r'^((?:[shv]|xv)d[a-z]+\d+|(?:nvme\d+n\d+|mmcblk\d+)p\d+)$')
+
+def build_df_command(directories):
+    quoted = ' '.join(shlex.quote(directory) for directory in directories)
+    return f'for d in {quoted}; do echo "dir $d"; df -Pk -- "$d" 2>/dev/null | tail -n +2; done'
+
+def log_directories(services):
+    directories = set()
+    for svc in services:
+        for path in (svc.out_log_path, svc.err_log_path):
+            if path and path != '/dev/null':
+                directories.add(posixpath.dirname(path) or '/')
+    return sorted(directories)
+
+def parse_loadavg(output):
+    try:
+        return tuple(float(value) for value in output.split()[:3])
+    except ValueError:
+        logger.warning("Failed to parse load average.")
+        return None
+
+def parse_diskstats(output):
+    disks = {}
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) < 14:
+            continue
+        name = parts[2]
+        if VIRTUAL_DISK_PATTERN.match(name) or DISK_PARTITION_PATTERN.match(name):
+            continue
+        try:
+            disks[name] = (int(parts[5]) * DISK_SECTOR_BYTES, int(parts[9]) * DISK_SECTOR_BYTES, int(parts[12]))
+        except ValueError:
+            continue
+    return disks
+
+def parse_net_dev(output):
+    interfaces = {}
+    for line in output.splitlines():
+        name, sep, counters = line.partition(':')
+        parts = counters.split()
+        if not sep or len(parts) < 9 or name.strip() == 'lo':
+            continue
+        try:
+            interfaces[name.strip()] = (int(parts[0]), int(parts[8]))
+        except ValueError:
+            continue
+    return interfaces
+
+def parse_swap_values(mem_output):
+    line = next((line for line in (mem_output or '').splitlines() if line.startswith('Swap:')), None)
+    if line is None:
+        return None, None
+    try:
+        parts = line.split()
+        return float(parts[2]), float(parts[1])
+    except (IndexError, ValueError):
+        logger.warning("Failed to parse swap usage.")
+        return None, None
+
+def parse_df(output):
+    filesystems = {}
+    directory = None
+    for line in output.splitlines():
+        if line.startswith('dir '):
+            directory = line[4:]
+            continue
+        parts = line.split(None, 5)
+        if directory is None or len(parts) < 6:
+            continue
+        try:
+            total_kb, used_kb, available_kb = int(parts[1]), int(parts[2]), int(parts[3])
+        except ValueError:
+            continue
+        mount = parts[5]
+        entry = filesystems.get(mount)
+        if entry is None:
+            capacity = used_kb + available_kb
+            entry = filesystems[mount] = {
+                'mount': mount,
+                'filesystem': parts[0],
+                'used_mb': round(used_kb / 1024, 1),
+                'total_mb': round(total_kb / 1024, 1),
+                'percent': round(100 * used_kb / capacity, 1) if capacity else 0.0,
+                'directories': []
+            }
+        entry['directories'].append(directory)
+    return sorted(filesystems.values(), key=lambda entry: entry['percent'], reverse=True)
+
+class HostMetricsTracker:
+    def __init__(self):
+        self.previous = None
+        self.directories = []
+
+    def sections(self, capabilities):
+        sections = []
+        if capabilities.get('proc_stat', False):
+            sections += [('loadavg', LOADAVG_COMMAND), ('diskstats', DISKSTATS_COMMAND), ('netdev', NETDEV_COMMAND)]
+        if self.directories:
+            sections.append(('df', build_df_command(self.directories)))
+        return sections
+
+    def apply(self, sections, mem_output, timestamp):
+        disks = parse_diskstats(sections['diskstats']) if 'diskstats' in sections else {}
+        interfaces = parse_net_dev(sections['netdev']) if 'netdev' in sections else {}
+        previous, self.previous = self.previous, (timestamp, disks, interfaces)
+        disk_rates = {}
+        interface_rates = {}
+        if previous is not None:
+            elapsed = timestamp - previous[0]
+            for name, counters in disks.items():
+                old = previous[1].get(name)
+                if old is not None:
+                    disk_rates[name] = tuple(counter_rate(counters[index], old[index], elapsed) for index in range(3))
+            for name, counters in interfaces.items():
+                old = previous[2].get(name)
+                if old is not None:
+                    interface_rates[name] = tuple(counter_rate(counters[index], old[index], elapsed) for index in range(2))
+        swap_used, swap_total = parse_swap_values(mem_output)
+        return {
+            'Load Average': parse_loadavg(sections['loadavg']) if 'loadavg' in sections else None,
+            'Disk Read (KB/s)': sum_rates(disk_rates.values(), 0, 1024),
+            'Disk Write (KB/s)': sum_rates(disk_rates.values(), 1, 1024),
+            'Network In (KB/s)': sum_rates(interface_rates.values(), 0, 1024),
+            'Network Out (KB/s)': sum_rates(interface_rates.values(), 1, 1024),
+            'Swap Used (MB)': swap_used,
+            'Swap Total (MB)': swap_total,
+            'Disks': disk_rates,
+            'Interfaces': interface_rates,
+            'Log Filesystems': parse_df(sections['df']) if 'df' in sections else []
+        }
+
+def sum_rates(rates, index, divisor):
+    values = [rate[index] for rate in rates if rate[index] is not None]
+    return round(sum(values) / divisor, 1) if values else None
+
+# -------------------- Custom Metrics -------------------- #
+
+CUSTOM_METRIC_SOURCES = ('shell', 'axm')
+CUSTOM_METRIC_COLUMN_PREFIX = 'custom:'
+CUSTOM_METRIC_MARKER = '@@PM2MON-METRIC:{index}:{status}@@'
+CUSTOM_METRIC_MARKER_PATTERN = re.compile(r'^@@PM2MON-METRIC:(\d+):(\d*)@@$', re.MULTILINE)
+CUSTOM_METRIC_PLACEHOLDER_PATTERN = re.compile(r'\{(pid|pm_id|name)\}')
+CUSTOM_METRIC_TIMEOUT_STATUSES = ('124', '137', '143')
+NUMBER_PATTERN = re.compile(r'^-?\d+(?:\.\d+)?$')
+
+class CustomMetric:
+    def __init__(self, definition):
+        if not isinstance(definition, dict):
+            raise ValueError("a metric must be an object")
+        self.name = str(definition.get('name') or '').strip()
+        if not self.name:
+            raise ValueError("every metric needs a name")
+        self.source = definition.get('source', 'shell')
+        if self.source not in CUSTOM_METRIC_SOURCES:
+            raise ValueError(f"{self.name}: source must be one of {', '.join(CUSTOM_METRIC_SOURCES)}")
+        self.command = str(definition.get('command') or '').strip()
+        self.key = str(definition.get('key') or '').strip()
+        if self.source == 'shell' and not self.command:
+            raise ValueError(f"{self.name}: a shell metric needs a command")
+        if self.source == 'axm' and not self.key:
+            raise ValueError(f"{self.name}: an axm metric needs a key")
+        try:
+            self.pattern = re.compile(definition['pattern']) if definition.get('pattern') else None
+        except re.error as e:
+            raise ValueError(f"{self.name}: invalid pattern ({e})")
+        try:
+            self.timeout = float(definition.get('timeout', CUSTOM_METRIC_TIMEOUT))
+        except (TypeError, ValueError):
+            raise ValueError(f"{self.name}: timeout must be a number")
+        if not 0 < self.timeout <= CUSTOM_METRIC_TIMEOUT_MAX:
+            raise ValueError(f"{self.name}: timeout must be between 0 and {CUSTOM_METRIC_TIMEOUT_MAX} seconds")
+        apps = definition.get('apps') or []
+        self.apps = [apps] if isinstance(apps, str) else [str(app) for app in apps]
+        self.per_service = bool(CUSTOM_METRIC_PLACEHOLDER_PATTERN.search(self.command))
+
+    @property
+    def column(self):
+        return f"{CUSTOM_METRIC_COLUMN_PREFIX}{self.name}"
+
+    def applies_to(self, name):
+        return not self.apps or any(fnmatch.fnmatchcase(name, app) for app in self.apps)
+
+    def command_for(self, target):
+        values = {'pm_id': target[0], 'name': target[1], 'pid': target[2]}
+        return CUSTOM_METRIC_PLACEHOLDER_PATTERN.sub(lambda match: shlex.quote(str(values[match.group(1)])), self.command)
+
+    def parse(self, value):
+        if value is None:
+            return None
+        text = str(value).strip()
+        if self.pattern is not None:
+            match = self.pattern.search(text)
+            if match is None:
+                return None
+            text = match.group(1) if self.pattern.groups else match.group(0)
+        text = text.strip().split('\n', 1)[0][:80]
+        if NUMBER_PATTERN.match(text):
+            number = float(text)
+            return int(number) if number.is_integer() and '.' not in text else number
+        return text or None
+
+def parse_custom_metrics(definitions):
+    if not isinstance(definitions, list):
+        raise ValueError("custom metrics must be a list")
+    metrics = [CustomMetric(definition) for definition in definitions]
+    names = [metric.name for metric in metrics]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"duplicate metric names: {', '.join(duplicates)}")
+    return metrics
+
+def build_probe_command(command, timeout, use_timeout):
+    quoted = shlex.quote(command)
+    if use_timeout:
+        return f"timeout {timeout:g} sh -c {quoted}"
+    # Without coreutils' timeout the probe is killed by a background watcher; its stdout is detached so
+    # it cannot hold the probe's output open. The watcher's sleep is a job it waits on, so the TERM trap
+    # runs at once and stops the sleep too instead of leaving it behind until the timeout.
+    return (
+        f"sh -c {quoted} & p=$!; "
+        f"(trap 'kill $w 2>/dev/null; exit 0' TERM; sleep {timeout:g} & w=$!; wait $w; kill $p) >/dev/null 2>&1 & k=$!; "
+        "wait $p; s=$?; kill $k 2>/dev/null; (exit $s)"
+    )
+
+def build_metrics_command(probes, use_timeout):
+    # Probes run in parallel, each into its own file, so the section takes as long as the slowest
+    # probe's timeout rather than the sum of all of them.
+    jobs = ''.join(
+        f'( ( {build_probe_command(command, metric.timeout, use_timeout)} ) >"$d/{index}" 2>/dev/null </dev/null; echo $? >"$d/{index}.rc" ) & '
+        for index, (metric, command, _) in enumerate(probes)
+    )
+    marker = CUSTOM_METRIC_MARKER.format(index='$i', status='$(cat "$d/$i.rc" 2>/dev/null)')
+    return (
+        f'( d=$(mktemp -d 2>/dev/null) || exit 0; {jobs}wait; '
+        f'i=0; while [ $i -lt {len(probes)} ]; do echo "{marker}"; head -c {CUSTOM_METRIC_OUTPUT_LIMIT} "$d/$i" 2>/dev/null; echo; i=$((i + 1)); done; '
+        'rm -rf "$d" )'
+    )
+
+def split_metric_outputs(output):
+    results = {}
+    matches = list(CUSTOM_METRIC_MARKER_PATTERN.finditer(output or ''))
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(output)
+        results[int(match.group(1))] = (match.group(2), output[match.end() + 1:end])
+    return results
+
+class CustomMetricsCollector:
+    def __init__(self):
+        self.metrics = []
+        self.targets = []
+        self.timed_out = set()
+
+    def configure(self, definitions):
+        try:
+            self.metrics = parse_custom_metrics(definitions)
+        except ValueError as e:
+            logger.warning(f"Ignoring custom metrics: {e}")
+            self.metrics = []
+        self.timed_out.clear()
+
+    @property
+    def columns(self):
+        return tuple(metric.column for metric in self.metrics)
+
+    def axm_keys(self):
+        return sorted({metric.key for metric in self.metrics if metric.source == 'axm'})
+
+    def plan(self):
+        # Per-service probes use the processes seen by the previous tick, as the process list is
+        # collected by the same command.
+        probes = []
+        for metric in self.metrics:
+            if metric.source != 'shell':
+                continue
+            if not metric.per_service:
+                probes.append((metric, metric.command, None))
+                continue
+            for target in self.targets:
+                if metric.applies_to(target[1]) and (target[2] or '{pid}' not in metric.command):
+                    probes.append((metric, metric.command_for(target), target[0]))
+        if len(probes) > CUSTOM_METRIC_MAX_PROBES:
+            logger.warning(f"Custom metrics need {len(probes)} probes per refresh; only the first {CUSTOM_METRIC_MAX_PROBES} are run.")
+            probes = probes[:CUSTOM_METRIC_MAX_PROBES]
+        return probes
+
+    def apply(self, services, output, probes):
+        self.targets = [(svc.pm_id, svc.name, svc.pid) for svc in services]
+        by_id = index_services(services)
+        for svc in services:
+            svc.custom = {}
+        for metric in self.metrics:
+            if metric.source == 'axm':
+                for svc in services:
+                    if metric.applies_to(svc.name):
+                        svc.custom[metric.name] = metric.parse(svc.axm.get(metric.key))
+        results = split_metric_outputs(output)
+        for index, (metric, _, pm_id) in enumerate(probes):
+            status, text = results.get(index, ('', None))
+            value = metric.parse(text) if status == '0' else None
+            self.track_timeout(metric, status)
+            if pm_id is None:
+                targets = [svc for svc in services if metric.applies_to(svc.name)]
+            else:
+                targets = [by_id[pm_id]] if pm_id in by_id else []
+            for svc in targets:
+                svc.custom[metric.name] = value
+
+    def track_timeout(self, metric, status):
+        if status in CUSTOM_METRIC_TIMEOUT_STATUSES:
+            if metric.name not in self.timed_out:
+                self.timed_out.add(metric.name)
+                logger.warning(f"Custom metric '{metric.name}' exceeded its {metric.timeout:g}s timeout.")
+        elif status == '0' and metric.name in self.timed_out:
+            self.timed_out.discard(metric.name)
+            logger.info(f"Custom metric '{metric.name}' is responding again.")
+
+def format_custom_metric(value):
+    if value is None:
+        return 'N/A'
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return value
+
+def column_heading(col):
+    if col.startswith(CUSTOM_METRIC_COLUMN_PREFIX):
+        return col[len(CUSTOM_METRIC_COLUMN_PREFIX):]
+    return translator.translate(col.lower().replace(" ", "_"))
+
+def custom_metric_sort_key(value):
+    if value is None:
+        return (0, 0, '')
+    if isinstance(value, str):
+        return (1, 0, value.lower())
+    return (2, value, '')
+
+def service_sort_key(col):
+    if col in SERVICE_SORT_KEYS:
+        return SERVICE_SORT_KEYS[col]
+    name = col[len(CUSTOM_METRIC_COLUMN_PREFIX):]
+    return lambda svc: custom_metric_sort_key(svc.custom.get(name))
+
+# -------------------- Batched Collection -------------------- #
+
+TICK_MARKER = '@@PM2MON:{name}@@'
+TICK_MARKER_PATTERN = re.compile(r'^@@PM2MON:(\w+)@@$', re.MULTILINE)
+PROC_METRICS_SCRIPT = (
+    'for p in {pids}; do '
+    '[ -d /proc/$p ] || continue; '
+    'echo "pid $p"; '
+    'while read -r k v rest; do case "$k" in Threads:|voluntary_ctxt_switches:|nonvoluntary_ctxt_switches:) echo "$k $v";; esac; done < /proc/$p/status; '
+    'while read -r k v; do case "$k" in read_bytes:|write_bytes:) echo "$k $v";; esac; done < /proc/$p/io; '
+    'set -- /proc/$p/fd/*; if [ -e "$1" ]; then echo "fds: $#"; else echo "fds: ?"; fi; '
+    'done'
+)
+PROC_METRIC_KEYS = {
+    'Threads:': 'threads',
+    'voluntary_ctxt_switches:': 'voluntary_ctxt',
+    'nonvoluntary_ctxt_switches:': 'nonvoluntary_ctxt',
+    'read_bytes:': 'read_bytes',
+    'write_bytes:': 'write_bytes',
+    'fds:': 'fds'
+}
+
+DELTA_KEYFRAME_INTERVAL = 60
+# Runs on the server: projects `pm2 jlist` to the fields the monitor uses, diffs it against the
+# snapshot stored by the previous tick and prints either a keyframe or the changed fields only.
+DELTA_SCRIPT = (
+    'const fs=require("fs"),os=require("os"),path=require("path");'
+    'const [token,base,key,axm]=process.argv.slice(1);const keys=JSON.parse(axm||"[]");'
+    'const file=path.join(os.tmpdir(),"pm2-monitor-"+token+".json");'
+    'const n=v=>v===undefined?null:v;'
+    'let input="";process.stdin.on("data",c=>input+=c).on("end",()=>{'
+    'const cur={};'
+    'for(const p of JSON.parse(input||"[]")){const e=p.pm2_env||{},m=p.monit||{};'
+    'cur[p.pm_id]={pm_id:p.pm_id,name:n(p.name),version:n(e.version),status:n(e.status),cpu:n(m.cpu),memory:n(m.memory),'
+    'pm_uptime:n(e.pm_uptime),port:n(e.PORT),pid:n(p.pid),out:n(e.pm_out_log_path),err:n(e.pm_err_log_path),'
+    'restarts:n(e.restart_time),unstable:n(e.unstable_restarts),maxmem:n(e.max_memory_restart)};'
+    'if(keys.length){const am=e.axm_monitor||{};cur[p.pm_id].axm=JSON.stringify(keys.reduce((o,k)=>(o[k]=am[k]?n(am[k].value):null,o),{}));}}'
+    'let prev=null;try{prev=JSON.parse(fs.readFileSync(file,"utf8"));}catch(x){}'
+    'const seq=(prev&&prev.seq||0)+1;let out;'
+    'if(key==="1"||!prev||String(prev.seq)!==base){out={seq:seq,full:1,procs:Object.values(cur)};}'
+    'else{const upsert=[],removed=[];'
+    'for(const id in cur){const a=cur[id],b=prev.procs[id];if(!b){upsert.push(a);continue;}'
+    'const c={pm_id:a.pm_id};let changed=0;for(const k in a){if(a[k]!==b[k]){c[k]=a[k];changed=1;}}if(changed)upsert.push(c);}'
+    'for(const id in prev.procs){if(!(id in cur))removed.push(Number(id));}'
+    'out={seq:seq,base:Number(base),upsert:upsert,removed:removed};}'
+    'fs.writeFileSync(file+".tmp",JSON.stringify({seq:seq,procs:cur}));fs.renameSync(file+".tmp",file);'
+    'process.stdout.write(JSON.stringify(out));});'
+)
+
+DELTA_CLEANUP_SCRIPT = (
+    'const fs=require("fs"),os=require("os"),path=require("path");'
+    'const file=path.join(os.tmpdir(),"pm2-monitor-"+process.argv[1]+".json");'
+    'for(const f of [file,file+".tmp"]){try{fs.unlinkSync(f);}catch(x){}}'
+)
+
+def build_delta_command(token, base_seq, keyframe, axm_keys=()):
+    return f"{PM2_LIST_COMMAND} | node -e {shlex.quote(DELTA_SCRIPT)} {token} {base_seq or 0} {1 if keyframe else 0} {shlex.quote(json.dumps(list(axm_keys)))}"
+
+def build_delta_cleanup_command(token):
+    return f"node -e {shlex.quote(DELTA_CLEANUP_SCRIPT)} {token}"
+
+class DeltaDecoder:
+    def __init__(self):
+        self.token = secrets.token_hex(8)
+        self.enabled = True
+        self.seq = None
+        self.records = {}
+        self.ticks_since_keyframe = 0
+        self.force_keyframe = True
+        self.axm_keys = []
+
+    def command(self):
+        keyframe = self.force_keyframe or self.seq is None or self.ticks_since_keyframe >= DELTA_KEYFRAME_INTERVAL
+        return build_delta_command(self.token, self.seq, keyframe, self.axm_keys)
+
+    def apply(self, output):
+        payload = json.loads(output)
+        if payload.get('full'):
+            self.records = {record['pm_id']: ServiceRecord.from_delta(record) for record in payload['procs']}
+            self.seq = payload['seq']
+            self.ticks_since_keyframe = 0
+            self.force_keyframe = False
+            return list(self.records.values()), None
+        if payload.get('base') != self.seq:
+            logger.warning(f"Delta base {payload.get('base')} does not match local sequence {self.seq}; requesting a keyframe.")
+            self.force_keyframe = True
+            return list(self.records.values()), set()
+        changed = set()
+        for pm_id in payload.get('removed', []):
+            if self.records.pop(pm_id, None) is not None:
+                changed.add(pm_id)
+        for record in payload.get('upsert', []):
+            svc = self.records.get(record['pm_id'])
+            if svc is None:
+                self.records[record['pm_id']] = ServiceRecord.from_delta(record)
+            else:
+                svc.apply_delta(record)
+            changed.add(record['pm_id'])
+        self.seq = payload['seq']
+        self.ticks_since_keyframe += 1
+        return list(self.records.values()), changed
+
+    def reset(self):
+        self.seq = None
+        self.force_keyframe = True
+
+def build_tick_command(sections):
+    # The leading echo keeps each marker on its own line even when a section's output has no trailing newline.
+    return '; '.join(f"echo; echo '{TICK_MARKER.format(name=name)}'; {{ {command}; }} 2>/dev/null" for name, command in sections)
+
+def split_tick_sections(output):
+    sections = {}
+    matches = list(TICK_MARKER_PATTERN.finditer(output))
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(output)
+        sections[match.group(1)] = output[match.end() + 1:end]
+    return sections
+
+def parse_proc_metrics(output):
+    metrics = {}
+    current = None
+    for line in output.splitlines():
+        key, _, value = line.strip().partition(' ')
+        if key == 'pid':
+            current = metrics.setdefault(int(value), {})
+        elif current is not None and key in PROC_METRIC_KEYS:
+            try:
+                current[PROC_METRIC_KEYS[key]] = int(value)
+            except ValueError:
+                pass
+    return metrics
+
+def counter_rate(current, previous, elapsed):
+    if current is None or previous is None or current < previous or elapsed <= 0:
+        return None
+    return (current - previous) / elapsed
+
+class ProcessMetricsTracker:
+    def __init__(self):
+        self.previous = {}
+
+    def apply(self, services, metrics, timestamp):
+        current = {}
+        for svc in services:
+            sample = metrics.get(svc.pid) if svc.pid else None
+            if not sample:
+                continue
+            svc.threads = sample.get('threads')
+            svc.fds = sample.get('fds')
+            ctx = None
+            if 'voluntary_ctxt' in sample and 'nonvoluntary_ctxt' in sample:
+                ctx = sample['voluntary_ctxt'] + sample['nonvoluntary_ctxt']
+            counters = (sample.get('read_bytes'), sample.get('write_bytes'), ctx)
+            current[svc.pid] = (timestamp, counters)
+            previous = self.previous.get(svc.pid)
+            if previous:
+                elapsed = timestamp - previous[0]
+                svc.read_rate = counter_rate(counters[0], previous[1][0], elapsed)
+                svc.write_rate = counter_rate(counters[1], previous[1][1], elapsed)
+                svc.ctx_rate = counter_rate(counters[2], previous[1][2], elapsed)
+        self.previous = current
+
+class TickCollector:
+    def __init__(self, ssh_client):
+        self.ssh_client = ssh_client
+        self.process_metrics = ProcessMetricsTracker()
+        self.collect_process_metrics = False
+        self.pids = []
+        self.delta = DeltaDecoder()
+        self.host_metrics = HostMetricsTracker()
+        self.custom_metrics = CustomMetricsCollector()
+
+    def configure_custom_metrics(self, definitions):
+        self.custom_metrics.configure(definitions)
+        if self.delta.axm_keys != self.custom_metrics.axm_keys():
+            self.delta.axm_keys = self.custom_metrics.axm_keys()
+            self.delta.reset()
+
+    def use_delta(self):
+        return self.delta.enabled and self.ssh_client.capabilities.get('node', False)
+
+    def build_sections(self, processes=True, probes=()):
+        sections = []
+        if processes and self.use_delta():
+            # The snapshot file holds the whole process list, so it is removed when the client closes.
+            self.ssh_client.add_cleanup_command(build_delta_cleanup_command(self.delta.token))
+            sections.append(('delta', self.delta.command()))
+        elif processes:
+            sections.append(('jlist', PM2_LIST_COMMAND))
+        sections.append(('cpu', CPU_BACKEND_COMMANDS[get_cpu_backend(self.ssh_client)]))
+        sections.append(('memory', MEMORY_USAGE_COMMAND))
+        if self.collect_process_metrics and self.pids:
+            sections.append(('procs', PROC_METRICS_SCRIPT.format(pids=' '.join(str(pid) for pid in self.pids))))
+        sections.extend(self.host_metrics.sections(self.ssh_client.capabilities))
+        if probes:
+            sections.append(('metrics', build_metrics_command(probes, self.ssh_client.capabilities.get('timeout', False))))
+        return sections
+
+    def request_processes(self):
+        # Over RPC the process list is requested from the daemon while the tick command runs.
+        rpc = pm2_rpc(self.ssh_client)
+        if rpc is None:
+            return None
+        try:
+            return rpc.request('getMonitorData', {})
+        except PM2RPCError:
+            return None
+
+    def parse_jlist(self, output):
+        try:
+            return parse_pm2_services(output)
+        except json.JSONDecodeError:
+            logger.error("Failed to parse PM2 JSON output.")
+            return None
+
+    def collect(self):
+        call = self.request_processes()
+        probes = self.custom_metrics.plan()
+        output = self.ssh_client.execute_command(build_tick_command(self.build_sections(processes=call is None, probes=probes)), label='collect tick')
+        if output is None:
+            return None
+        timestamp = time.time()
+        sections = split_tick_sections(output)
+
+        changed_ids = None
+        if call is not None:
+            try:
+                services = [ServiceRecord.from_pm2(process) for process in call.result()]
+            except PM2RPCError as e:
+                logger.warning(f"Failed to list PM2 processes over RPC ({e}); using pm2 jlist for this tick.")
+                output = self.ssh_client.execute_command(PM2_LIST_COMMAND, label='pm2 jlist')
+                services = self.parse_jlist(output) if output is not None else None
+        elif 'delta' in sections:
+            try:
+                services, changed_ids = self.delta.apply(sections['delta'])
+            except (json.JSONDecodeError, KeyError, TypeError):
+                logger.warning("Delta collection failed on the server; falling back to full PM2 snapshots.")
+                self.delta.enabled = False
+                self.delta.reset()
+                services = None
+        else:
+            services = self.parse_jlist(sections.get('jlist', ''))
+
+        cpu_output = sections.get('cpu')
+        backend = get_cpu_backend(self.ssh_client)
+        cpu_usage = CPU_BACKEND_PARSERS[backend](cpu_output, self.ssh_client) if cpu_output else "N/A"
+        mem_output = sections.get('memory')
+        memory_used, memory_total = parse_memory_values(mem_output) if mem_output else (None, None)
+        memory_usage = f"{memory_used} MB / {memory_total} MB" if memory_used is not None else "N/A"
+
+        if services is not None:
+            if 'procs' in sections:
+                self.process_metrics.apply(services, parse_proc_metrics(sections['procs']), timestamp)
+            self.pids = [svc.pid for svc in services if svc.pid]
+            self.host_metrics.directories = log_directories(services)
+            self.custom_metrics.apply(services, sections.get('metrics'), probes)
+        host = self.host_metrics.apply(sections, mem_output, timestamp)
+
+        return {
+            'timestamp': timestamp,
+            'services': services,
+            'changed_ids': changed_ids,
+            'resources': {
+                'CPU Usage (%)': cpu_usage,
+                'Memory Usage (MB)': memory_usage,
+                'Memory Used (MB)': memory_used,
+                'Memory Total (MB)': memory_total,
+                **host
+            }
+        }
+
+# -------------------- Restart Tracking -------------------- #
+
+class RestartEvent:
+    __slots__ = ('timestamp', 'delta', 'status', 'unstable')
+
+    def __init__(self, timestamp, delta, status, unstable):
+        self.timestamp = timestamp
+        self.delta = delta
+        self.status = status
+        self.unstable = unstable
+
+class RestartTracker:
+    def __init__(self, settings):
+        self.settings = settings
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.windows = {}
+        self.timelines = {}
+        self.crash_loops = set()
+        self.storm = False
+        self.window_total = 0
+
+    def update(self, services, timestamp):
+        window = float(self.settings['restart_window'])
+        crash_loop_restarts = max(1, int(self.settings['crash_loop_restarts']))
+        storm_restarts = max(1, int(self.settings['restart_storm_restarts']))
+        changed = set()
+        with self.lock:
+            current = set()
+            for svc in services:
+                current.add(svc.pm_id)
+                previous = self.counters.get(svc.pm_id)
+                self.counters[svc.pm_id] = (svc.restarts, svc.unstable_restarts)
+                if previous is None:
+                    continue
+                delta = svc.restarts - previous[0]
+                unstable = svc.unstable_restarts - previous[1]
+                if delta < 0 or unstable < 0:
+                    delta = max(delta, 0)
+                    unstable = max(unstable, 0)
+                if delta or unstable:
+                    event = RestartEvent(timestamp, delta, svc.status, unstable)
+                    self.windows.setdefault(svc.pm_id, deque()).append(event)
+                    self.timelines.setdefault(svc.pm_id, deque(maxlen=RESTART_TIMELINE_LIMIT)).append(event)
+                    changed.add(svc.pm_id)
+                    logger.info(f"Service {svc.name} (ID {svc.pm_id}) restarted {delta} time(s) since the last refresh.")
+
+            for pm_id in set(self.counters) - current:
+                self.counters.pop(pm_id, None)
+                self.windows.pop(pm_id, None)
+                self.timelines.pop(pm_id, None)
+
+            total = 0
+            crash_loops = set()
+            for pm_id, events in list(self.windows.items()):
+                while events and timestamp - events[0].timestamp > window:
+                    events.popleft()
+                if not events:
+                    del self.windows[pm_id]
+                    continue
+                restarts = sum(event.delta for event in events)
+                total += restarts
+                if restarts >= crash_loop_restarts or any(event.unstable for event in events):
+                    crash_loops.add(pm_id)
+            self.crash_loops = crash_loops
+            self.window_total = total
+            self.storm = total >= storm_restarts
+        return changed
+
+    def window_restarts(self, pm_id):
+        with self.lock:
+            return sum(event.delta for event in self.windows.get(pm_id, ()))
+
+    def timeline(self, pm_id):
+        with self.lock:
+            return list(self.timelines.get(pm_id, ()))
+
+# -------------------- Leak Detection -------------------- #
+
+class MemoryTrend:
+    # Least-squares fit of memory (MB) over time within a sliding window, kept as running sums so each
+    # sample costs O(1). Times are stored relative to `origin`, which is moved forward once per window
+    # to keep the sums small enough that evictions do not lose precision.
+    __slots__ = ('samples', 'origin', 'sum_t', 'sum_m', 'sum_tt', 'sum_tm', 'sum_mm', 'restarts', 'pm_uptime', 'pid')
+
+    def __init__(self, svc):
+        self.samples = deque()
+        self.origin = None
+        self.sum_t = self.sum_m = self.sum_tt = self.sum_tm = self.sum_mm = 0.0
+        self.restarts = svc.restarts
+        self.pm_uptime = svc.pm_uptime
+        self.pid = svc.pid
+
+    def same_process(self, svc):
+        return svc.restarts == self.restarts and svc.pm_uptime == self.pm_uptime and svc.pid == self.pid
+
+    def add(self, timestamp, memory_mb, window):
+        if self.origin is None:
+            self.origin = timestamp
+        elif timestamp - self.origin > window:
+            self.rebase(timestamp)
+        t = timestamp - self.origin
+        self.samples.append((t, memory_mb))
+        self.accumulate(t, memory_mb, 1)
+        while self.samples and t - self.samples[0][0] > window:
+            old_t, old_m = self.samples.popleft()
+            self.accumulate(old_t, old_m, -1)
+
+    def accumulate(self, t, m, sign):
+        self.sum_t += sign * t
+        self.sum_m += sign * m
+        self.sum_tt += sign * t * t
+        self.sum_tm += sign * t * m
+        self.sum_mm += sign * m * m
+
+    def rebase(self, origin):
+        shift = origin - self.origin
+        self.origin = origin
+        self.samples = deque((t - shift, m) for t, m in self.samples)
+        self.sum_t = self.sum_m = self.sum_tt = self.sum_tm = self.sum_mm = 0.0
+        for t, m in self.samples:
+            self.accumulate(t, m, 1)
+
+    @property
+    def span(self):
+        return self.samples[-1][0] - self.samples[0][0] if self.samples else 0
+
+    def fit(self):
+        n = len(self.samples)
+        if n < 2:
+            return None
+        var_t = n * self.sum_tt - self.sum_t * self.sum_t
+        if var_t <= 0:
+            return None
+        cov = n * self.sum_tm - self.sum_t * self.sum_m
+        var_m = n * self.sum_mm - self.sum_m * self.sum_m
+        slope = cov / var_t
+        r2 = cov * cov / (var_t * var_m) if var_m > 0 else 0.0
+        latest = self.sum_m / n + slope * (self.samples[-1][0] - self.sum_t / n)
+        return slope, r2, latest
+
+class LeakEstimate:
+    __slots__ = ('pm_id', 'slope', 'fit', 'memory_mb', 'limit_mb', 'eta', 'span')
+
+    def __init__(self, pm_id, slope, fit, memory_mb, limit_mb, eta, span):
+        self.pm_id = pm_id
+        self.slope = slope
+        self.fit = fit
+        self.memory_mb = memory_mb
+        self.limit_mb = limit_mb
+        self.eta = eta
+        self.span = span
+
+    @property
+    def mb_per_hour(self):
+        return round(self.slope * 3600, 1)
+
+class LeakDetector:
+    def __init__(self, settings):
+        self.settings = settings
+        self.lock = threading.Lock()
+        self.trends = {}
+        self.leaks = {}
+
+    def update(self, services, timestamp):
+        window = max(60.0, float(self.settings['leak_window']))
+        threshold = float(self.settings['leak_slope_mb_per_hour']) / 3600
+        with self.lock:
+            current = set()
+            leaks = {}
+            for svc in services:
+                current.add(svc.pm_id)
+                trend = self.trends.get(svc.pm_id)
+                if svc.status != 'online':
+                    self.trends.pop(svc.pm_id, None)
+                    continue
+                if trend is None or not trend.same_process(svc):
+                    trend = self.trends[svc.pm_id] = MemoryTrend(svc)
+                trend.add(timestamp, svc.memory / BYTES_PER_MB, window)
+                estimate = self.estimate(svc, trend, window, threshold)
+                if estimate is not None:
+                    leaks[svc.pm_id] = estimate
+            for pm_id in set(self.trends) - current:
+                del self.trends[pm_id]
+            self.leaks = leaks
+        return leaks
+
+    def estimate(self, svc, trend, window, threshold):
+        if threshold <= 0 or len(trend.samples) < LEAK_MIN_SAMPLES or trend.span < window / 2:
+            return None
+        result = trend.fit()
+        if result is None:
+            return None
+        slope, r2, latest = result
+        if slope < threshold or r2 < LEAK_MIN_FIT:
+            return None
+        limit_mb = svc.max_memory / BYTES_PER_MB if svc.max_memory else None
+        eta = max(0.0, (limit_mb - latest) / slope) if limit_mb else None
+        return LeakEstimate(svc.pm_id, slope, r2, latest, limit_mb, eta, trend.span)
+
+    def get(self, pm_id):
+        with self.lock:
+            return self.leaks.get(pm_id)
+
+def format_eta(seconds):
+    minutes = int(seconds // 60)
+    if minutes < 60:
+        return f"{minutes}m"
+    hours, minutes = divmod(minutes, 60)
+    if hours < 24:
+        return f"{hours}h {minutes}m"
+    days, hours = divmod(hours, 24)
+    return f"{days}d {hours}h"
+
+# -------------------- Cluster Grouping -------------------- #
+
+GROUP_IID_PREFIX = 'group:'
+
+class AppGroup:
+    def __init__(self, name):
+        self.name = name
+        self.members = {}
+        self.cpu = 0
+        self.memory = 0
+        self.restarts = 0
+        self.status_counts = {}
+        self.version_counts = {}
+        self.latest_start = None
+        self.threads = None
+        self.fds = None
+        self.read_rate = None
+        self.write_rate = None
+        self.ctx_rate = None
+        self.custom = {}
+
+    def __len__(self):
+        return len(self.members)
+
+    @property
+    def iid(self):
+        return f"{GROUP_IID_PREFIX}{self.name}"
+
+    @property
+    def pm_id(self):
+        return min(self.members)
+
+    @property
+    def version(self):
+        if len(self.version_counts) == 1:
+            return next(iter(self.version_counts))
+        return translator.translate("group_mixed")
+
+    @property
+    def status(self):
+        return ", ".join(f"{count} {status}" for status, count in sorted(self.status_counts.items(), key=lambda item: -item[1]))
+
+    @property
+    def port_number(self):
+        return -1
+
+    @property
+    def uptime_seconds(self):
+        if not self.latest_start:
+            return 0
+        return max(0, int(time.time() - self.latest_start / 1000))
+
+    @property
+    def memory_mb(self):
+        return round(self.memory / BYTES_PER_MB, 2)
+
+    def update(self, svc):
+        contribution = (svc.cpu, svc.memory, svc.restarts, svc.status, svc.version, svc.pm_uptime)
+        previous = self.members.get(svc.pm_id)
+        if previous == contribution:
+            return False
+        if previous is not None:
+            self.subtract(previous)
+        self.members[svc.pm_id] = contribution
+        self.cpu += svc.cpu
+        self.memory += svc.memory
+        self.restarts += svc.restarts
+        self.status_counts[svc.status] = self.status_counts.get(svc.status, 0) + 1
+        self.version_counts[svc.version] = self.version_counts.get(svc.version, 0) + 1
+        if svc.pm_uptime and (self.latest_start is None or svc.pm_uptime > self.latest_start):
+            self.latest_start = svc.pm_uptime
+        elif previous is not None and previous[5] == self.latest_start and svc.pm_uptime != self.latest_start:
+            self.latest_start = max((member[5] for member in self.members.values() if member[5]), default=None)
+        return True
+
+    def remove(self, pm_id):
+        previous = self.members.pop(pm_id, None)
+        if previous is None:
+            return
+        self.subtract(previous)
+        if previous[5] == self.latest_start:
+            self.latest_start = max((member[5] for member in self.members.values() if member[5]), default=None)
+
+    def subtract(self, contribution):
+        cpu, memory, restarts, status, version, _ = contribution
+        self.cpu -= cpu
+        self.memory -= memory
+        self.restarts -= restarts
+        for counts, key in ((self.status_counts, status), (self.version_counts, version)):
+            counts[key] -= 1
+            if not counts[key]:
+                del counts[key]
+
+    def display_values(self):
+        return (
+            translator.translate("group_instances", count=len(self.members)),
+            self.name,
+            self.version if self.version is not None else 'N/A',
+            '',
+            self.status,
+            round(self.cpu, 1),
+            self.memory_mb,
+            format_uptime(self.latest_start),
+            self.restarts,
+            '', '', '', '', ''
+        )
+
+class ServiceGroups:
+    def __init__(self):
+        self.groups = {}
+        self.membership = {}
+
+    def update(self, services):
+        changed = set()
+        seen = set()
+        for svc in services:
+            seen.add(svc.pm_id)
+            previous = self.membership.get(svc.pm_id)
+            if previous is not None and previous != svc.name:
+                self.groups[previous].remove(svc.pm_id)
+                changed.add(previous)
+            group = self.groups.get(svc.name)
+            if group is None:
+                group = self.groups[svc.name] = AppGroup(svc.name)
+            self.membership[svc.pm_id] = svc.name
+            if group.update(svc):
+                changed.add(svc.name)
+        for pm_id in set(self.membership) - seen:
+            name = self.membership.pop(pm_id)
+            self.groups[name].remove(pm_id)
+            changed.add(name)
+        for name in [name for name, group in self.groups.items() if not group.members]:
+            del self.groups[name]
+        return changed
+
+    def get(self, name):
+        return self.groups.get(name)
+
+# -------------------- History -------------------- #
+
+HOST_SERIES = 'host'
+METRIC_CPU = 'cpu'
+METRIC_MEMORY = 'memory'
+
+class MetricHistory:
+    # Samples older than the longest chart range are dropped; the capacity only caps very frequent refreshes.
+    def __init__(self, retention=HISTORY_RETENTION, capacity=HISTORY_CAPACITY):
+        self.retention = retention
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.times = array('d')
+        self.series = {}
+        self.names = {}
+        self.last_seen = {}
+        self.version = 0
+
+    def __len__(self):
+        return len(self.times)
+
+    def record(self, timestamp, services, resources):
+        samples = {}
+        cpu = resources.get('CPU Usage (%)')
+        if isinstance(cpu, (int, float)):
+            samples[(HOST_SERIES, METRIC_CPU)] = cpu
+        if resources.get('Memory Used (MB)') is not None:
+            samples[(HOST_SERIES, METRIC_MEMORY)] = resources['Memory Used (MB)']
+        for svc in services:
+            samples[(svc.pm_id, METRIC_CPU)] = svc.cpu
+            samples[(svc.pm_id, METRIC_MEMORY)] = svc.memory_mb
+        with self.lock:
+            for svc in services:
+                self.names[svc.pm_id] = svc.name
+            for key in samples:
+                if key not in self.series:
+                    self.series[key] = array('f', [math.nan]) * len(self.times)
+                self.last_seen[key] = timestamp
+            self.times.append(timestamp)
+            for key, values in self.series.items():
+                values.append(samples.get(key, math.nan))
+            self.trim(timestamp)
+            self.version += 1
+
+    def trim(self, now):
+        # Removing from the front moves the whole array, so samples are dropped in chunks of about 1%.
+        expired = max(self.first_index_since(now - self.retention), len(self.times) - self.capacity)
+        if expired < max(1, int(len(self.times) * HISTORY_TRIM_FRACTION)):
+            return
+        del self.times[:expired]
+        for values in self.series.values():
+            del values[:expired]
+        self.prune()
+
+    def prune(self):
+        # Series whose last sample has left the window hold only NaN; PM2 ids come and go, so they are dropped.
+        oldest = self.times[0] if self.times else math.inf
+        expired = [key for key, seen in self.last_seen.items() if seen < oldest]
+        for key in expired:
+            del self.series[key]
+            del self.last_seen[key]
+        if expired:
+            live = {pm_id for pm_id, metric in self.series}
+            for pm_id in [pm_id for pm_id in self.names if pm_id not in live]:
+                del self.names[pm_id]
+
+    def first_index_since(self, timestamp):
+        return bisect.bisect_left(self.times, timestamp)
+
+    def read(self, key, since, until=None):
+        with self.lock:
+            values = self.series.get(key)
+            if values is None:
+                return [], []
+            result_times = []
+            result_values = []
+            for index in range(self.first_index_since(since), len(self.times)):
+                timestamp = self.times[index]
+                if until is not None and timestamp > until:
+                    break
+                value = values[index]
+                if value == value:
+                    result_times.append(timestamp)
+                    result_values.append(value)
+            return result_times, result_values
+
+    def service_names(self):
+        with self.lock:
+            return dict(self.names)
+
+class LTTBDecimator:
+    def __init__(self):
+        self.key = None
+        self.bucket_seconds = None
+        self.buckets = []
+
+    def reset(self, key, bucket_seconds):
+        self.key = key
+        self.bucket_seconds = bucket_seconds
+        self.buckets = []
+
+    def update(self, history, key, start_time, bucket_seconds):
+        if key != self.key or bucket_seconds != self.bucket_seconds:
+            self.reset(key, bucket_seconds)
+        first_bucket = math.floor(start_time / bucket_seconds)
+        drop = 0
+        while drop < len(self.buckets) and self.buckets[drop][0] < first_bucket:
+            drop += 1
+        if drop:
+            del self.buckets[:drop]
+
+        # The last two selections depend on samples that may still arrive, so they are recomputed.
+        recompute = self.buckets[-2][0] if len(self.buckets) >= 2 else first_bucket
+        self.buckets = [bucket for bucket in self.buckets if bucket[0] < recompute]
+        times, values = history.read(key, max(start_time, recompute * bucket_seconds))
+
+        groups = []
+        for timestamp, value in zip(times, values):
+            bucket = math.floor(timestamp / bucket_seconds)
+            if groups and groups[-1][0] == bucket:
+                groups[-1][1].append((timestamp, value))
+            else:
+                groups.append((bucket, [(timestamp, value)]))
+
+        previous = self.buckets[-1][1:] if self.buckets else None
+        for index, (bucket, points) in enumerate(groups):
+            if previous is None:
+                selected = points[0]
+            elif index + 1 == len(groups):
+                selected = points[-1]
+            else:
+                selected = select_triangle_point(previous, points, groups[index + 1][1])
+            self.buckets.append((bucket, selected[0], selected[1]))
+            previous = selected
+        return [(timestamp, value) for _, timestamp, value in self.buckets]
+
+def select_triangle_point(previous, points, next_points):
+    average_time = sum(point[0] for point in next_points) / len(next_points)
+    average_value = sum(point[1] for point in next_points) / len(next_points)
+    previous_time, previous_value = previous
+    best = points[0]
+    best_area = -1
+    for point in points:
+        area = abs((previous_time - average_time) * (point[1] - previous_value) - (previous_time - point[0]) * (average_value - previous_value))
+        if area > best_area:
+            best_area = area
+            best = point
+    return best
+
+# -------------------- Alerting -------------------- #
+
+ALERT_RULE_CPU = 'cpu'
+ALERT_RULE_MEMORY = 'memory'
+ALERT_RULE_STATUS = 'status'
+ALERT_RULE_HOST_MEMORY = 'host_memory'
+ALERT_RULE_CRASH_LOOP = 'crash_loop'
+ALERT_RULE_RESTART_STORM = 'restart_storm'
+ALERT_RULE_MEMORY_LEAK = 'memory_leak'
+ALERT_RULE_LOG_DISK = 'log_disk'
+ALERT_STATUSES = ('errored', 'stopped')
+HOST_ALERT_ID = 'host'
+
+class Alert:
+    __slots__ = ('key', 'rule', 'pm_id', 'name', 'message', 'raised_at', 'cleared_at')
+
+    def __init__(self, key, rule, pm_id, name, message, raised_at):
+        self.key = key
+        self.rule = rule
+        self.pm_id = pm_id
+        self.name = name
+        self.message = message
+        self.raised_at = raised_at
+        self.cleared_at = None
+
+    def to_dict(self):
+        return {
+            'rule': self.rule,
+            'pm_id': self.pm_id,
+            'name': self.name,
+            'message': self.message,
+            'raised_at': self.raised_at,
+            'cleared_at': self.cleared_at
+        }
+
+class ThresholdState:
+    __slots__ = ('count',)
+
+    def __init__(self):
+        self.count = 0
+
+class AlertEngine:
+    def __init__(self, settings, notifier=None):
+        self.settings = settings
+        self.notifier = notifier
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.thresholds = {}
+        self.active = {}
+        self.watched = set()
+        self.history = deque(maxlen=ALERT_HISTORY_LIMIT)
+        self.listeners = []
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def active_ids(self):
+        with self.lock:
+            return {alert.pm_id for alert in self.active.values()}
+
+    def evaluate(self, services, resources, timestamp, changed_ids=None, restarts=None, leaks=None):
+        if not self.settings.get('enabled', True):
+            return []
+        events = []
+        with self.lock:
+            current = {svc.pm_id: svc for svc in services}
+            if changed_ids is None:
+                changed_ids = {pm_id for pm_id, svc in current.items() if self.samples.get(pm_id) != (svc.status, svc.cpu, svc.memory)}
+            for pm_id in set(self.samples) - set(current):
+                self.forget(pm_id, timestamp, events)
+            for pm_id in changed_ids | self.watched:
+                svc = current.get(pm_id)
+                if svc is not None:
+                    self.evaluate_service(svc, timestamp, events)
+            self.evaluate_host(resources, timestamp, events)
+            if restarts is not None:
+                self.evaluate_restarts(current, restarts, timestamp, events)
+            if leaks is not None:
+                self.evaluate_leaks(current, leaks, timestamp, events)
+        for event, alert in events:
+            self.dispatch(event, alert)
+        return events
+
+    def evaluate_service(self, svc, timestamp, events):
+        previous = self.samples.get(svc.pm_id)
+        self.samples[svc.pm_id] = (svc.status, svc.cpu, svc.memory)
+
+        sustain = max(1, int(self.settings['sustain_samples']))
+        self.check_threshold(
+            ALERT_RULE_CPU, svc.pm_id, svc.name, svc.cpu, float(self.settings['cpu_threshold']), sustain, timestamp, events,
+            lambda: translator.translate("alert_cpu_high", name=svc.name, pm_id=svc.pm_id, value=svc.cpu, samples=sustain, threshold=self.settings['cpu_threshold'])
+        )
+        self.check_threshold(
+            ALERT_RULE_MEMORY, svc.pm_id, svc.name, svc.memory_mb, float(self.settings['memory_threshold_mb']), sustain, timestamp, events,
+            lambda: translator.translate("alert_memory_high", name=svc.name, pm_id=svc.pm_id, value=svc.memory_mb, samples=sustain, threshold=self.settings['memory_threshold_mb'])
+        )
 
-# -------------------- Configuration Handling -------------------- #
+        key = f"{ALERT_RULE_STATUS}:{svc.pm_id}"
+        if svc.status in ALERT_STATUSES:
+            # The first sample is only a baseline, so services that were already down when monitoring started stay quiet.
+            if key not in self.active and previous is not None and previous[0] != svc.status:
+                self.raise_alert(key, ALERT_RULE_STATUS, svc.pm_id, svc.name, translator.translate("alert_status", name=svc.name, pm_id=svc.pm_id, status=svc.status), timestamp, events)
+        elif key in self.active:
+            self.clear_alert(key, timestamp, events)
+        self.update_watch(svc.pm_id)
+
+    def evaluate_host(self, resources, timestamp, events):
+        sustain = max(1, int(self.settings['sustain_samples']))
+        for filesystem in resources.get('Log Filesystems') or ():
+            self.check_threshold(
+                ALERT_RULE_LOG_DISK, f"{HOST_ALERT_ID}:{filesystem['mount']}", HOST_ALERT_ID, filesystem['percent'],
+                float(self.settings['log_disk_threshold']), sustain, timestamp, events,
+                lambda: translator.translate("alert_log_disk", mount=filesystem['mount'], value=filesystem['percent'], threshold=self.settings['log_disk_threshold'])
+            )
+        used = resources.get('Memory Used (MB)')
+        total = resources.get('Memory Total (MB)')
+        if not used or not total:
+            return
+        percent = round(100 * used / total, 1)
+        self.check_threshold(
+            ALERT_RULE_HOST_MEMORY, HOST_ALERT_ID, HOST_ALERT_ID, percent, float(self.settings['host_memory_threshold']),
+            sustain, timestamp, events,
+            lambda: translator.translate("alert_host_memory", value=percent, threshold=self.settings['host_memory_threshold'])
+        )
 
-class ConfigHandler:
-    def __init__(self, config_file=CONFIG_FILE):
-        self.config_file = config_file
-        self.config = {}
-        self.load_config()
-    
-    def load_config(self):
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r') as f:
-                    self.config = json.load(f)
-                print("Configuration loaded successfully.")
-            except json.JSONDecodeError:
-                print("Failed to parse 'config.json'. It might be corrupted.")
-                self.config = {}
+    def evaluate_restarts(self, current, restarts, timestamp, events):
+        crash_loops = restarts.crash_loops
+        for pm_id in crash_loops:
+            key = f"{ALERT_RULE_CRASH_LOOP}:{pm_id}"
+            svc = current.get(pm_id)
+            if key not in self.active and svc is not None:
+                message = translator.translate(
+                    "alert_crash_loop", name=svc.name, pm_id=pm_id,
+                    count=restarts.window_restarts(pm_id), window=self.settings['restart_window']
+                )
+                self.raise_alert(key, ALERT_RULE_CRASH_LOOP, pm_id, svc.name, message, timestamp, events)
+        for key in [key for key, alert in self.active.items() if alert.rule == ALERT_RULE_CRASH_LOOP and alert.pm_id not in crash_loops]:
+            self.clear_alert(key, timestamp, events)
+
+        key = f"{ALERT_RULE_RESTART_STORM}:{HOST_ALERT_ID}"
+        if restarts.storm and key not in self.active:
+            message = translator.translate("alert_restart_storm", count=restarts.window_total, window=self.settings['restart_window'])
+            self.raise_alert(key, ALERT_RULE_RESTART_STORM, HOST_ALERT_ID, HOST_ALERT_ID, message, timestamp, events)
+        elif not restarts.storm and key in self.active:
+            self.clear_alert(key, timestamp, events)
+
+    def evaluate_leaks(self, current, leaks, timestamp, events):
+        for pm_id, leak in leaks.items():
+            key = f"{ALERT_RULE_MEMORY_LEAK}:{pm_id}"
+            svc = current.get(pm_id)
+            if key not in self.active and svc is not None:
+                if leak.eta is not None:
+                    message = translator.translate("alert_memory_leak", name=svc.name, pm_id=pm_id, rate=leak.mb_per_hour, eta=format_eta(leak.eta))
+                else:
+                    message = translator.translate("alert_memory_leak_no_limit", name=svc.name, pm_id=pm_id, rate=leak.mb_per_hour)
+                self.raise_alert(key, ALERT_RULE_MEMORY_LEAK, pm_id, svc.name, message, timestamp, events)
+        for key in [key for key, alert in self.active.items() if alert.rule == ALERT_RULE_MEMORY_LEAK and alert.pm_id not in leaks]:
+            self.clear_alert(key, timestamp, events)
+
+    def check_threshold(self, rule, pm_id, name, value, threshold, sustain, timestamp, events, message):
+        key = f"{rule}:{pm_id}"
+        state = self.thresholds.get(key)
+        if value is None or threshold <= 0:
+            return
+        if key in self.active:
+            if value < threshold * ALERT_HYSTERESIS_RATIO:
+                self.clear_alert(key, timestamp, events)
+                self.thresholds.pop(key, None)
+            return
+        if value > threshold:
+            if state is None:
+                state = self.thresholds[key] = ThresholdState()
+            state.count += 1
+            if state.count >= sustain:
+                self.raise_alert(key, rule, pm_id, name, message(), timestamp, events)
+        elif state is not None:
+            del self.thresholds[key]
+
+    def update_watch(self, pm_id):
+        prefix = f":{pm_id}"
+        if any(key.endswith(prefix) for key in self.thresholds) or any(alert.pm_id == pm_id for alert in self.active.values()):
+            self.watched.add(pm_id)
         else:
-            print("'config.json' not found. A new one will be created after entering server details.")
-            self.config = {}
-    
-    def save_config(self):
+            self.watched.discard(pm_id)
+
+    def forget(self, pm_id, timestamp, events):
+        self.samples.pop(pm_id, None)
+        self.watched.discard(pm_id)
+        for key in [key for key, alert in self.active.items() if alert.pm_id == pm_id]:
+            self.clear_alert(key, timestamp, events)
+        for key in [key for key in self.thresholds if key.endswith(f":{pm_id}")]:
+            del self.thresholds[key]
+
+    def raise_alert(self, key, rule, pm_id, name, message, timestamp, events):
+        alert = Alert(key, rule, pm_id, name, message, timestamp)
+        self.active[key] = alert
+        self.history.append(alert)
+        events.append(('raised', alert))
+        logger.warning(f"Alert raised: {message}")
+
+    def clear_alert(self, key, timestamp, events):
+        alert = self.active.pop(key, None)
+        if alert is None:
+            return
+        alert.cleared_at = timestamp
+        events.append(('cleared', alert))
+        logger.info(f"Alert cleared: {alert.message}")
+
+    def dispatch(self, event, alert):
+        if self.notifier is not None:
+            self.notifier.notify(event, alert)
+        for callback in list(self.listeners):
+            try:
+                callback(event, alert)
+            except Exception as e:
+                logger.warning(f"Alert listener failed: {e}")
+
+class AlertNotifier:
+    def __init__(self, settings):
+        self.settings = settings
+
+    def notify(self, event, alert):
+        title = translator.translate("alerts") if event == 'raised' else translator.translate("alert_state_cleared")
+        message = alert.message if event == 'raised' else translator.translate("alert_cleared", message=alert.message)
+        threading.Thread(target=self.deliver, args=(event, alert, title, message), daemon=True).start()
+
+    def deliver(self, event, alert, title, message):
+        if self.settings.get('desktop_notifications'):
+            send_desktop_notification(title, message)
+        if self.settings.get('webhook_url'):
+            self.post_webhook(event, alert)
+        if self.settings.get('command_hook'):
+            self.run_command_hook(event, alert)
+
+    def post_webhook(self, event, alert):
+        payload = json.dumps({'event': event, 'alert': alert.to_dict()}).encode()
+        request = urllib.request.Request(self.settings['webhook_url'], data=payload, headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=ALERT_HOOK_TIMEOUT):
+                pass
+        except Exception as e:
+            logger.warning(f"Alert webhook failed: {e}")
+
+    def run_command_hook(self, event, alert):
+        env = dict(os.environ)
+        env.update({
+            'PM2_ALERT_EVENT': event,
+            'PM2_ALERT_RULE': alert.rule,
+            'PM2_ALERT_ID': str(alert.pm_id),
+            'PM2_ALERT_NAME': str(alert.name),
+            'PM2_ALERT_MESSAGE': alert.message
+        })
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=4)
-            print("Configuration saved successfully.")
+            subprocess.run(self.settings['command_hook'], shell=True, env=env, timeout=ALERT_HOOK_TIMEOUT, check=False)
         except Exception as e:
-            print(f"Failed to save configuration: {e}")
-    
-    def is_configured(self):
-        return all(key in self.config for key in ['host', 'port', 'username', 'password'])
-    
-    def get_server_details(self):
-        return self.config.get('host'), self.config.get('port', 22), self.config.get('username'), self.config.get('password')
-    
-    def set_server_details(self, host, port, username, password):
-        self.config['host'] = host
-        self.config['port'] = port
-        self.config['username'] = username
-        self.config['password'] = password
-        self.save_config()
-    
-    def get_preferences(self):
-        return {
-            'auto_refresh_interval': self.config.get('auto_refresh_interval', DEFAULT_AUTO_REFRESH_INTERVAL),
-            'theme': self.config.get('theme', DEFAULT_THEME),
-            'font_size': self.config.get('font_size', DEFAULT_FONT_SIZE)
-        }
-    
-    def set_preferences(self, auto_refresh_interval, theme):
-        self.config['auto_refresh_interval'] = auto_refresh_interval
-        self.config['theme'] = theme
-        self.save_config()
+            logger.warning(f"Alert command hook failed: {e}")
 
-config_handler = ConfigHandler()
+def send_desktop_notification(title, message):
+    try:
+        if platform.system() == 'Linux' and shutil.which('notify-send'):
+            subprocess.run(['notify-send', '--app-name', APP_NAME, title, message], timeout=ALERT_HOOK_TIMEOUT, check=False)
+        elif platform.system() == 'Darwin':
+            script = f'display notification {json.dumps(message)} with title {json.dumps(title)}'
+            subprocess.run(['osascript', '-e', script], timeout=ALERT_HOOK_TIMEOUT, check=False)
+        elif platform.system() == 'Windows':
+            script = (
+                '[reflection.assembly]::loadwithpartialname("System.Windows.Forms") | Out-Null; '
+                '$n = New-Object System.Windows.Forms.NotifyIcon; $n.Icon = [System.Drawing.SystemIcons]::Warning; $n.Visible = $true; '
+                f'$n.ShowBalloonTip(5000, {json.dumps(title)}, {json.dumps(message)}, "Warning"); Start-Sleep -Seconds 5; $n.Dispose()'
+            )
+            subprocess.run(['powershell', '-NoProfile', '-Command', script], timeout=ALERT_HOOK_TIMEOUT + 5, check=False)
+    except Exception as e:
+        logger.warning(f"Desktop notification failed: {e}")
+
+# -------------------- Log Streaming -------------------- #
+
+PM2_LOG_STREAM_COMMAND = "pm2 logs --json --lines 0"
+LOG_LEVELS = ('debug', 'info', 'warn', 'error')
+LOG_LEVEL_PATTERN = re.compile(r'\b(fatal|error|err|warn|warning|info|debug|trace)\b', re.IGNORECASE)
+LOG_LEVEL_NAMES = {
+    'fatal': 'error',
+    'error': 'error',
+    'err': 'error',
+    'warn': 'warn',
+    'warning': 'warn',
+    'info': 'info',
+    'debug': 'debug',
+    'trace': 'debug'
+}
+
+class LogLine:
+    __slots__ = ('timestamp', 'app', 'stream', 'level', 'message')
+
+    def __init__(self, timestamp, app, stream, level, message):
+        self.timestamp = timestamp
+        self.app = app
+        self.stream = stream
+        self.level = level
+        self.message = message
 
-# -------------------- SSH Client Wrapper -------------------- #
+def detect_log_level(message, stream):
+    match = LOG_LEVEL_PATTERN.search(message, 0, 200)
+    if match:
+        return LOG_LEVEL_NAMES[match.group(1).lower()]
+    return 'error' if stream == 'err' else 'info'
 
-class SSHClientWrapper:
-    def __init__(self, host, port, username, password):
-        self.host = host
-        self.port = port
-        self.username = username
-        self.password = password
-        self.client = None
+def parse_log_line(raw):
+    try:
+        event = json.loads(raw)
+    except json.JSONDecodeError:
+        event = None
+    if not isinstance(event, dict):
+        return LogLine('', '', 'out', detect_log_level(raw, 'out'), raw)
+    message = str(event.get('message', '')).rstrip('\n')
+    stream = 'err' if event.get('type') == 'err' else 'out'
+    return LogLine(event.get('timestamp') or '', event.get('app_name') or '', stream, detect_log_level(message, stream), message)
+
+class LogFilter:
+    def __init__(self, app=None, level=None, pattern=None):
+        self.app = app or None
+        self.minimum = LOG_LEVELS.index(level) if level in LOG_LEVELS else 0
+        self.pattern = re.compile(pattern, re.IGNORECASE) if pattern else None
+
+    def matches(self, line):
+        if self.app is not None and line.app != self.app:
+            return False
+        if LOG_LEVELS.index(line.level) < self.minimum:
+            return False
+        if self.pattern is not None and not self.pattern.search(line.message):
+            return False
+        return True
+
+class LogStream:
+    def __init__(self, ssh_client, command=PM2_LOG_STREAM_COMMAND):
+        self.ssh_client = ssh_client
+        self.command = command
         self.lock = threading.Lock()
-        self.connect()
-    
-    def connect(self):
-        try:
-            print(f"Attempting to connect to {self.host}:{self.port} as {self.username}...")
-            self.client = paramiko.SSHClient()
-            self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            self.client.connect(
-                hostname=self.host,
-                port=self.port,
-                username=self.username,
-                password=self.password,
-                timeout=10
-            )
-            self.client.get_transport().set_keepalive(30)
-            self.check_required_commands()
-        except paramiko.AuthenticationException:
-            messagebox.showerror(translator.translate("authentication_error"), translator.translate("auth_error_message"))
-            print("Authentication failed.")
-        except paramiko.SSHException as ssh_err:
-            messagebox.showerror(translator.translate("ssh_error"), translator.translate("ssh_error_message", error=ssh_err))
-            print(f"SSH connection failed: {ssh_err}")
-        except Exception as e:
-            messagebox.showerror(translator.translate("error"), translator.translate("unexpected_error", error=e))
-            print(f"An unexpected error occurred while connecting: {e}")
-    
-    def check_required_commands(self):
-        missing_commands = []
-        for cmd in REQUIRED_COMMANDS:
-            check_cmd = f'command -v {cmd}'
-            output = self.execute_command(check_cmd)
-            if not output or not output.strip():
-                missing_commands.append(cmd)
-        if missing_commands:
-            message = translator.translate("missing_command_message", command=", ".join(missing_commands))
-            messagebox.showwarning(translator.translate("missing_command"), message)
-            print(f"Missing commands: {', '.join(missing_commands)}")
-    
-    def execute_command(self, command):
-        with self.lock:
+        self.buffer = deque(maxlen=LOG_STREAM_BUFFER)
+        self.pending = deque(maxlen=LOG_STREAM_BUFFER)
+        self.stopped = threading.Event()
+        self.channel = None
+        self.connected = False
+        self.received = 0
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+        return self
+
+    def run(self):
+        while not self.stopped.is_set():
+            channel = self.ssh_client.open_stream(self.command)
+            if channel is None:
+                self.stopped.wait(LOG_STREAM_RETRY)
+                continue
+            self.channel = channel
+            self.connected = True
             try:
-                if self.client is None or not self.client.get_transport().is_active():
-                    print("SSH connection is not active. Attempting to reconnect...")
-                    self.connect()
-                if self.client is None or not self.client.get_transport().is_active():
-                    print("Reconnection failed.")
-                    return None
-                print(f"Executing command: {command}")
-                stdin, stdout, stderr = self.client.exec_command(command)
-                output = stdout.read().decode()
-                error = stderr.read().decode()
-                if error and not command.startswith('pm2 '):
-                    print(f"Error executing command '{command}': {error}")
-                    raise Exception(error)
-                print(f"Command output: {output.strip()}")
-                return output
-            except (paramiko.SSHException, Exception) as e:
-                print(f"Error executing command '{command}': {e}")
-                try:
-                    print("Attempting to reconnect and retry the command...")
-                    self.connect()
-                    if self.client is None or not self.client.get_transport().is_active():
-                        print("Reconnection failed.")
-                        return None
-                    stdin, stdout, stderr = self.client.exec_command(command)
-                    output = stdout.read().decode()
-                    error = stderr.read().decode()
-                    if error and not command.startswith('pm2 '):
-                        print(f"Error executing command '{command}' after reconnecting: {error}")
-                        raise Exception(error)
-                    print(f"Command output after reconnecting: {output.strip()}")
-                    return output
-                except Exception as e:
-                    messagebox.showerror(translator.translate("ssh_error"), translator.translate("ssh_error_message", error=e))
-                    print(f"SSH command execution failed after reconnecting: {e}")
-                    return None
-    
-    def close(self):
-        if self.client:
-            self.client.close()
-            self.client = None
-            print("SSH connection closed.")
+                self.read(channel)
+            except (paramiko.SSHException, EOFError, OSError) as e:
+                logger.warning(f"Log stream interrupted: {e}")
+            finally:
+                self.connected = False
+                self.channel = None
+                channel.close()
+            if not self.stopped.is_set():
+                logger.info("Log stream closed by the server, reopening.")
+                self.stopped.wait(LOG_STREAM_RETRY)
+
+    def read(self, channel):
+        channel.settimeout(1.0)
+        partial = b''
+        while not self.stopped.is_set():
+            try:
+                chunk = channel.recv(RECV_CHUNK_SIZE)
+            except socket.timeout:
+                continue
+            if not chunk:
+                return
+            raw_lines = (partial + chunk).split(b'\n')
+            partial = raw_lines.pop()
+            lines = [parse_log_line(raw.decode(errors='replace')) for raw in raw_lines if raw.strip()]
+            if lines:
+                with self.lock:
+                    self.buffer.extend(lines)
+                    self.pending.extend(lines)
+                    self.received += len(lines)
+
+    def drain(self):
+        with self.lock:
+            lines = list(self.pending)
+            self.pending.clear()
+        return lines
 
-# -------------------- PM2 and System Resource Retrieval -------------------- #
+    def snapshot(self):
+        with self.lock:
+            return list(self.buffer)
 
-PM2_LIST_COMMAND = 'pm2 jlist'
-CPU_USAGE_COMMAND_MPSTAT = "mpstat 1 1 | awk '/Average/ {print 100 - $12}'"
-CPU_USAGE_COMMAND_TOP = 'top -bn1 | grep -i "Cpu(s)"'
-MEMORY_USAGE_COMMAND = 'free -m'
+    def clear(self):
+        with self.lock:
+            self.buffer.clear()
+            self.pending.clear()
+
+    def stop(self):
+        self.stopped.set()
+        channel = self.channel
+        if channel is not None:
+            channel.close()
+
+# -------------------- Log Bundles -------------------- #
+
+DEFAULT_LOG_BUNDLE_LINES = 1000
+LOG_BUNDLE_STREAMS = (('out', 'out_log_path'), ('err', 'err_log_path'))
+
+def build_log_bundle_command(services, lines, compress):
+    sections = []
+    for svc in services:
+        for stream, attribute in LOG_BUNDLE_STREAMS:
+            path = getattr(svc, attribute)
+            if path:
+                sections.append((f"{stream}_{svc.pm_id}", f"tail -n {int(lines)} -- {shlex.quote(path)} 2>/dev/null"))
+    command = build_tick_command(sections)
+    if compress:
+        command = f"{{ {command}; }} | gzip -c | base64"
+    return command
+
+def decode_log_bundle(output, compress):
+    if compress:
+        output = gzip.decompress(base64.b64decode(output)).decode(errors='replace')
+    logs = {}
+    for name, text in split_tick_sections(output).items():
+        stream, _, pm_id = name.partition('_')
+        logs.setdefault(int(pm_id), {})[stream] = text.rstrip('\n') + '\n' if text.strip() else ''
+    return logs
+
+def collect_log_bundle(ssh_client, services, lines=DEFAULT_LOG_BUNDLE_LINES, compress=None, handle=None):
+    if compress is None:
+        compress = ssh_client.capabilities.get('gzip', False)
+    command = build_log_bundle_command(services, lines, compress)
+    output = ssh_client.execute_command(command, label='collect logs', timeout=TERMINAL_COMMAND_TIMEOUT, handle=handle)
+    if output is None:
+        return None
+    try:
+        return decode_log_bundle(output, compress)
+    except (ValueError, OSError, EOFError) as e:
+        logger.error(f"Failed to decode the log bundle: {e}")
+        return None
+
+def log_bundle_folder(svc):
+    name = re.sub(r'[^\w.-]', '_', svc.name) or 'app'
+    return f"{name}-{svc.pm_id}"
+
+def save_log_bundle(path, services, logs, host=None, lines=None):
+    manifest = {'host': host, 'collected_at': datetime.now().isoformat(timespec='seconds'), 'lines': lines, 'services': []}
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+        for svc in services:
+            entry = logs.get(svc.pm_id, {})
+            folder = log_bundle_folder(svc)
+            for stream, attribute in LOG_BUNDLE_STREAMS:
+                if stream in entry:
+                    bundle.writestr(f"{folder}/{stream}.log", entry[stream])
+            manifest['services'].append({
+                'pm_id': svc.pm_id, 'name': svc.name, 'status': svc.status, 'folder': folder,
+                'out_log_path': svc.out_log_path, 'err_log_path': svc.err_log_path
+            })
+        bundle.writestr('manifest.json', json.dumps(manifest, indent=4))
+    return len(manifest['services'])
+
+# -------------------- Export -------------------- #
+
+EXPORT_FIELDS = ('timestamp', 'time', 'pm_id', 'name', 'status', 'cpu', 'memory_mb', 'restarts', 'version', 'port', 'pid')
+HISTORY_FILE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})\.jsonl$')
+RELATIVE_TIME_PATTERN = re.compile(r'^(\d+)([smhd])$')
+RELATIVE_TIME_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+def service_rows(services, timestamp):
+    for svc in services:
+        yield {
+            'timestamp': round(timestamp, 3),
+            'pm_id': svc.pm_id,
+            'name': svc.name,
+            'status': svc.status,
+            'cpu': svc.cpu,
+            'memory_mb': svc.memory_mb,
+            'restarts': svc.restarts,
+            'version': svc.version,
+            'port': svc.port,
+            'pid': svc.pid
+        }
 
-def get_pm2_services(ssh_client):
-    output = ssh_client.execute_command(PM2_LIST_COMMAND)
-    if output:
-        try:
-            services_json = json.loads(output)
-            services = []
-            for svc in services_json:
-                memory_bytes = svc.get('monit', {}).get('memory', 0)
-                memory_mb = round(memory_bytes / (1024 * 1024), 2)
-                port = svc.get('pm2_env', {}).get('PORT', 'N/A')
-                pm_uptime = svc.get('pm2_env', {}).get('pm_uptime')
-                services.append({
-                    'ID': svc.get('pm_id'),
-                    'App Name': svc.get('name'),
-                    'Version': svc.get('pm2_env', {}).get('version', 'N/A'),
-                    'Status': svc.get('pm2_env', {}).get('status'),
-                    'CPU (%)': svc.get('monit', {}).get('cpu', 0),
-                    'Memory (MB)': memory_mb,
-                    'Uptime': format_uptime(pm_uptime),
-                    'Out Log Path': svc.get('pm2_env', {}).get('pm_out_log_path', ''),
-                    'Error Log Path': svc.get('pm2_env', {}).get('pm_err_log_path', ''),
-                    'PORT': port
-                })
-            print(f"Retrieved {len(services)} PM2 services.")
-            return services
-        except json.JSONDecodeError:
-            messagebox.showerror(translator.translate("json_error"), translator.translate("json_error_message"))
-            print("Failed to parse PM2 JSON output.")
-    return []
-
-def get_system_resources(ssh_client):
-    cpu_usage = "N/A"
-    cpu_command_mpstat = CPU_USAGE_COMMAND_MPSTAT
-    cpu_output = ssh_client.execute_command(cpu_command_mpstat)
-    if cpu_output:
-        try:
-            cpu_usage = round(float(cpu_output.strip()), 2)
-            print(f"CPU Usage (mpstat): {cpu_usage}%")
-        except ValueError:
-            cpu_usage = "N/A"
-            print("Failed to parse CPU usage from mpstat output.")
+class HistoryJournal:
+    def __init__(self, directory=HISTORY_DIR, retention_days=DEFAULT_HISTORY_RETENTION_DAYS):
+        self.directory = directory
+        self.retention_days = retention_days
+        self.lock = threading.Lock()
+        self.handle = None
+        self.day = None
 
-    if cpu_usage == "N/A":
-        cpu_command_top = CPU_USAGE_COMMAND_TOP
-        cpu_output = ssh_client.execute_command(cpu_command_top)
-        if cpu_output:
+    def append(self, timestamp, services):
+        if self.retention_days <= 0:
+            return
+        day = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
+        with self.lock:
             try:
-                match = re.search(r'(\d+\.\d+)\s*%id', cpu_output, re.IGNORECASE)
-                if match:
-                    idle_percent = float(match.group(1))
-                    cpu_usage = round(100 - idle_percent, 2)
-                    print(f"CPU Usage (top): {cpu_usage}%")
-            except Exception:
-                print("Failed to parse CPU usage from top output.")
-                pass
-
-    mem_output = ssh_client.execute_command(MEMORY_USAGE_COMMAND)
-    memory_usage = "N/A"
-    if mem_output:
-        try:
-            lines = mem_output.split('\n')
-            mem_line = next((line for line in lines if line.startswith('Mem:')), None)
-            if mem_line:
-                parts = mem_line.split()
-                total = float(parts[1])
-                used = float(parts[2])
-                memory_usage = f"{used} MB / {total} MB"
-                print(f"Memory Usage: {memory_usage}")
-        except Exception:
-            print("Failed to parse memory usage.")
-            pass
+                if day != self.day:
+                    self.rotate(day)
+                for row in service_rows(services, timestamp):
+                    self.handle.write(json.dumps(row, separators=(',', ':')) + '\n')
+                self.handle.flush()
+            except OSError as e:
+                logger.warning(f"Failed to write history journal: {e}")
+
+    def rotate(self, day):
+        if self.handle is not None:
+            self.handle.close()
+        os.makedirs(self.directory, exist_ok=True)
+        self.handle = open(os.path.join(self.directory, f"{day}.jsonl"), 'a', encoding='utf-8')
+        self.day = day
+        cutoff = (datetime.fromtimestamp(time.time() - self.retention_days * 86400)).strftime('%Y-%m-%d')
+        for day_file, path in history_files(self.directory):
+            if day_file < cutoff:
+                try:
+                    os.remove(path)
+                    logger.info(f"Removed expired history file '{path}'.")
+                except OSError as e:
+                    logger.warning(f"Failed to remove history file '{path}': {e}")
 
-    return {
-        'CPU Usage (%)': cpu_usage,
-        'Memory Usage (MB)': memory_usage
-    }
+    def close(self):
+        with self.lock:
+            if self.handle is not None:
+                self.handle.close()
+                self.handle = None
+                self.day = None
 
-def format_uptime(epoch_time):
+def history_files(directory=HISTORY_DIR):
     try:
-        if not epoch_time:
-            return "N/A"
-        current_time = time.time()
-        uptime_seconds = current_time - (epoch_time / 1000)
-        if uptime_seconds < 0:
-            return "N/A"
-        days, remainder = divmod(int(uptime_seconds), 86400)
-        hours, remainder = divmod(remainder, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        return f"{days}d {hours}h {minutes}m {seconds}s"
-    except:
-        return "N/A"
+        names = sorted(os.listdir(directory))
+    except OSError:
+        return []
+    return [(match.group(1), os.path.join(directory, name)) for name in names for match in [HISTORY_FILE_PATTERN.match(name)] if match]
+
+def iter_history(since, until=None, directory=HISTORY_DIR):
+    first_day = datetime.fromtimestamp(since).strftime('%Y-%m-%d')
+    last_day = datetime.fromtimestamp(until).strftime('%Y-%m-%d') if until is not None else None
+    for day, path in history_files(directory):
+        if day < first_day or (last_day is not None and day > last_day):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                timestamp = row.get('timestamp', 0)
+                if timestamp < since:
+                    continue
+                if until is not None and timestamp > until:
+                    break
+                yield row
+
+def filter_rows(rows, names=None, statuses=None):
+    names = [name.lower() for name in names or []]
+    statuses = {status.lower() for status in statuses or []}
+    for row in rows:
+        if names and not any(fnmatch.fnmatchcase(str(row.get('name', '')).lower(), name) for name in names):
+            continue
+        if statuses and str(row.get('status', '')).lower() not in statuses:
+            continue
+        yield row
+
+def with_time(rows):
+    for row in rows:
+        row['time'] = datetime.fromtimestamp(row['timestamp']).isoformat(timespec='seconds')
+        yield row
+
+def write_csv(rows, stream):
+    writer = csv.DictWriter(stream, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+def write_jsonl(rows, stream):
+    count = 0
+    for row in rows:
+        stream.write(json.dumps(row, separators=(',', ':')) + '\n')
+        count += 1
+    return count
+
+EXPORT_WRITERS = {
+    'csv': write_csv,
+    'jsonl': write_jsonl
+}
+
+def export_format_for(path, default='csv'):
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    return extension if extension in EXPORT_WRITERS else default
+
+def export_rows(rows, path, export_format):
+    writer = EXPORT_WRITERS[export_format]
+    rows = with_time(rows)
+    if path == '-':
+        return writer(rows, sys.stdout)
+    with open(path, 'w', encoding='utf-8', newline='') as stream:
+        return writer(rows, stream)
+
+def parse_time_argument(value, now=None):
+    value = value.strip()
+    match = RELATIVE_TIME_PATTERN.match(value)
+    if match:
+        return (now if now is not None else time.time()) - int(match.group(1)) * RELATIVE_TIME_UNITS[match.group(2)]
+    return datetime.fromisoformat(value).timestamp()
 
 # -------------------- Service Control -------------------- #
 
@@ -367,8 +4074,11 @@ def control_service(action, app_id=None, ssh_client=None, refresh_callback=None)
     if not confirmation:
         return
 
-    output = ssh_client.execute_command(command)
-    if output is not None:
+    succeeded = control_service_rpc(ssh_client, action, app_id)
+    if succeeded is None:
+        succeeded = ssh_client.execute_command(command) is not None
+    ssh_client.invalidate_reads()
+    if succeeded:
         messagebox.showinfo(translator.translate("action_successful"), translator.translate("action_success_message", action=action))
         if callable(refresh_callback):
             refresh_callback()
@@ -377,6 +4087,45 @@ def control_service(action, app_id=None, ssh_client=None, refresh_callback=None)
 
 # -------------------- GUI Setup -------------------- #
 
+class FrameJob:
+    # Runs a generator of small render steps across `after` callbacks, yielding to the event loop once
+    # a frame's budget is used up so large updates do not freeze the window.
+    def __init__(self, widget, steps, label, budget_ms=FRAME_BUDGET_MS):
+        self.widget = widget
+        self.steps = iter(steps)
+        self.label = label
+        self.budget = budget_ms / 1000
+        self.after_id = None
+        self.done = False
+
+    def run(self):
+        self.after_id = None
+        deadline = time.perf_counter() + self.budget
+        try:
+            with instrumentation.watchdog.track(self.label):
+                for _ in self.steps:
+                    if time.perf_counter() >= deadline:
+                        self.after_id = self.widget.after(1, self.run)
+                        return self
+        except Exception as e:
+            logger.exception(f"{self.label} failed: {e}")
+        self.done = True
+        return self
+
+    def finish(self):
+        self.cancel()
+        try:
+            for _ in self.steps:
+                pass
+        except Exception as e:
+            logger.exception(f"{self.label} failed: {e}")
+        self.done = True
+
+    def cancel(self):
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+            self.after_id = None
+
 class LogWindow:
     def __init__(self, master, app_name, app_id, ssh_client, out_log_path, error_log_path):
         self.master = master
@@ -386,9 +4135,18 @@ class LogWindow:
         self.out_log_path = out_log_path
         self.error_log_path = error_log_path
 
+        self.operations = HandleGroup(ssh_client)
+
         self.window = tk.Toplevel(master)
         self.window.title(translator.translate("logs_for", app_name=self.app_name))
         self.window.geometry("800x600")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.window.bind('<Escape>', lambda event: self.close())
+
+        self.top_frame = Frame(self.window, padding=(10, 10, 10, 0))
+        self.top_frame.pack(side=tk.TOP, fill=tk.X)
+        self.older_button = Button(self.top_frame, text=translator.translate("load_older_lines"), command=self.load_older, state=tk.DISABLED)
+        self.older_button.pack(side=tk.RIGHT)
 
         self.notebook = ttk.Notebook(self.window)
         self.notebook.pack(fill=tk.BOTH, expand=True)
@@ -421,19 +4179,58 @@ class LogWindow:
         self.stderr_text.configure(xscrollcommand=self.stderr_scrollbar_x.set)
         self.stderr_scrollbar_x.pack(side=tk.BOTTOM, fill=tk.X)
 
-        threading.Thread(target=self.fetch_logs, args=('out', self.stdout_text, self.out_log_path), daemon=True).start()
-        threading.Thread(target=self.fetch_logs, args=('error', self.stderr_text, self.error_log_path), daemon=True).start()
+        self.logs = {
+            'out': {'text': self.stdout_text, 'path': self.out_log_path, 'shown': 0, 'more': False, 'loading': False},
+            'error': {'text': self.stderr_text, 'path': self.error_log_path, 'shown': 0, 'more': False, 'loading': False}
+        }
+        self.notebook.bind("<<NotebookTabChanged>>", lambda event: self.update_older_button())
+        self.fetch_logs('out')
+        self.fetch_logs('error')
+
+    def fetch_logs(self, log_type):
+        log = self.logs[log_type]
+        if not log['path']:
+            self.append_text(log['text'], translator.translate("log_not_found", log_type=log_type.upper()))
+            return
+        path, skip = log['path'], log['shown']
+        log['loading'] = True
+        self.update_older_button()
+        self.operations.start_task(
+            'tail',
+            lambda handle: self.ssh_client.read_log(path, LOG_PAGE_LINES, skip, handle),
+            lambda result: self.window.after(0, self.show_logs, log_type, result)
+        )
+
+    def show_logs(self, log_type, result):
+        log = self.logs[log_type]
+        log['loading'] = False
+        text, more = result or ('', log['more'])
+        if text and log['shown']:
+            self.prepend_text(log['text'], text)
+        elif text:
+            self.append_text(log['text'], text)
+        elif not log['shown']:
+            self.append_text(log['text'], translator.translate("no_logs"))
+        log['shown'] += text.count('\n')
+        log['more'] = more
+        self.update_older_button()
+
+    def current_log_type(self):
+        return 'out' if self.notebook.index(self.notebook.select()) == 0 else 'error'
+
+    def load_older(self):
+        log = self.logs[self.current_log_type()]
+        if log['more'] and not log['loading']:
+            self.fetch_logs(self.current_log_type())
+
+    def update_older_button(self):
+        log = self.logs[self.current_log_type()]
+        enabled = log['more'] and not log['loading']
+        self.older_button.configure(state=tk.NORMAL if enabled else tk.DISABLED)
 
-    def fetch_logs(self, log_type, text_widget, log_path):
-        if log_path:
-            command = f'tail -n 100 "{log_path}"'
-            output = self.ssh_client.execute_command(command)
-            if output:
-                self.append_text(text_widget, output)
-            else:
-                self.append_text(text_widget, translator.translate("no_logs"))
-        else:
-            self.append_text(text_widget, translator.translate("log_not_found", log_type=log_type.upper()))
+    def close(self):
+        self.operations.cancel()
+        self.window.destroy()
 
     def append_text(self, text_widget, text):
         text_widget.config(state=tk.NORMAL)
@@ -441,6 +4238,415 @@ class LogWindow:
         text_widget.see(tk.END)
         text_widget.config(state=tk.DISABLED)
 
+    def prepend_text(self, text_widget, text):
+        text_widget.config(state=tk.NORMAL)
+        text_widget.insert('1.0', text)
+        text_widget.see('1.0')
+        text_widget.config(state=tk.DISABLED)
+
+class MergedLogWindow:
+    def __init__(self, master, ssh_client, app_names):
+        self.master = master
+        self.stream = LogStream(ssh_client).start()
+        self.filter = LogFilter()
+        self.after_id = None
+        self.filter_after_id = None
+        self.paused = False
+        self.shown = 0
+        self.pending = deque(maxlen=LOG_VIEW_LINES)
+
+        self.window = tk.Toplevel(master)
+        self.window.title(translator.translate("all_logs_title"))
+        self.window.geometry("1100x650")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.window.bind('<Escape>', lambda event: self.close())
+
+        self.top_frame = Frame(self.window, padding=10)
+        self.top_frame.pack(side=tk.TOP, fill=tk.X)
+
+        self.all_apps = translator.translate("log_all_apps")
+        self.app_label = Label(self.top_frame, text=translator.translate("log_app_filter"))
+        self.app_label.pack(side=tk.LEFT, padx=(0, 5))
+        self.app_var = tk.StringVar(value=self.all_apps)
+        self.app_menu = ttk.Combobox(self.top_frame, textvariable=self.app_var, values=[self.all_apps] + sorted(set(app_names)), state='readonly', width=20)
+        self.app_menu.pack(side=tk.LEFT, padx=(0, 15))
+        self.app_menu.bind("<<ComboboxSelected>>", lambda event: self.apply_filter())
+
+        self.level_label = Label(self.top_frame, text=translator.translate("log_level_filter"))
+        self.level_label.pack(side=tk.LEFT, padx=(0, 5))
+        self.level_var = tk.StringVar(value=LOG_LEVELS[0])
+        self.level_menu = ttk.Combobox(self.top_frame, textvariable=self.level_var, values=LOG_LEVELS, state='readonly', width=8)
+        self.level_menu.pack(side=tk.LEFT, padx=(0, 15))
+        self.level_menu.bind("<<ComboboxSelected>>", lambda event: self.apply_filter())
+
+        self.regex_label = Label(self.top_frame, text=translator.translate("log_regex_filter"))
+        self.regex_label.pack(side=tk.LEFT, padx=(0, 5))
+        self.regex_var = tk.StringVar()
+        self.regex_entry = Entry(self.top_frame, textvariable=self.regex_var, width=25)
+        self.regex_entry.pack(side=tk.LEFT, padx=(0, 15))
+        self.regex_entry.bind("<KeyRelease>", lambda event: self.schedule_filter())
+
+        self.clear_button = Button(self.top_frame, text=translator.translate("clear"), command=self.clear)
+        self.clear_button.pack(side=tk.RIGHT)
+        self.pause_button = Button(self.top_frame, text=translator.translate("pause"), command=self.toggle_pause)
+        self.pause_button.pack(side=tk.RIGHT, padx=(0, 10))
+
+        self.text_frame = Frame(self.window, padding=(10, 0))
+        self.text_frame.pack(fill=tk.BOTH, expand=True)
+        self.text = tk.Text(self.text_frame, wrap=tk.NONE, state=tk.DISABLED)
+        self.text.tag_configure('error', foreground='#d9534f')
+        self.text.tag_configure('warn', foreground='#f0ad4e')
+        self.text.tag_configure('debug', foreground='grey')
+        self.text.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+        self.scrollbar = Scrollbar(self.text_frame, orient=tk.VERTICAL, command=self.text.yview)
+        self.text.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.status_var = tk.StringVar()
+        self.status_label = Label(self.window, textvariable=self.status_var, padding=10)
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X)
+
+        self.render()
+
+    def render(self):
+        with instrumentation.watchdog.track('log render'):
+            lines = self.stream.drain()
+            if not self.paused:
+                self.pending.extend(line for line in lines if self.filter.matches(line))
+                self.append([self.pending.popleft() for _ in range(min(len(self.pending), LOG_RENDER_CHUNK_LINES))])
+            state = translator.translate("log_stream_connected") if self.stream.connected else translator.translate("log_stream_disconnected")
+            self.status_var.set(translator.translate("log_stream_status", state=state, received=self.stream.received, shown=self.shown))
+        self.after_id = self.window.after(1 if self.pending and not self.paused else LOG_RENDER_MS, self.render)
+
+    def append(self, lines):
+        if not lines:
+            return
+        follow = self.text.yview()[1] >= 0.999
+        chunks = []
+        for line in lines[-LOG_VIEW_LINES:]:
+            chunks.append(f"{line.timestamp} [{line.app}] {line.message}\n")
+            chunks.append((line.level,))
+        self.text.config(state=tk.NORMAL)
+        self.text.insert(tk.END, *chunks)
+        line_count = int(self.text.index('end-1c').split('.')[0]) - 1
+        if line_count > LOG_VIEW_LINES:
+            self.text.delete('1.0', f"{line_count - LOG_VIEW_LINES + 1}.0")
+        self.shown = min(line_count, LOG_VIEW_LINES)
+        self.text.config(state=tk.DISABLED)
+        if follow:
+            self.text.see(tk.END)
+
+    def schedule_filter(self):
+        if self.filter_after_id is not None:
+            self.window.after_cancel(self.filter_after_id)
+        self.filter_after_id = self.window.after(LOG_FILTER_DEBOUNCE_MS, self.apply_filter)
+
+    def apply_filter(self):
+        self.filter_after_id = None
+        app = self.app_var.get()
+        try:
+            self.filter = LogFilter(None if app == self.all_apps else app, self.level_var.get(), self.regex_var.get())
+        except re.error:
+            self.regex_entry.configure(bootstyle='danger')
+            return
+        self.regex_entry.configure(bootstyle='default')
+        self.rerender()
+
+    def rerender(self):
+        matching = deque(maxlen=LOG_VIEW_LINES)
+        for line in self.stream.snapshot():
+            if self.filter.matches(line):
+                matching.append(line)
+        self.text.config(state=tk.NORMAL)
+        self.text.delete('1.0', tk.END)
+        self.text.config(state=tk.DISABLED)
+        self.shown = 0
+        self.pending = matching
+
+    def toggle_pause(self):
+        self.paused = not self.paused
+        self.pause_button.configure(text=translator.translate("resume") if self.paused else translator.translate("pause"))
+        if not self.paused:
+            self.rerender()
+
+    def clear(self):
+        self.stream.clear()
+        self.rerender()
+
+    def close(self):
+        self.stream.stop()
+        for after_id in (self.after_id, self.filter_after_id):
+            if after_id is not None:
+                self.window.after_cancel(after_id)
+        self.window.destroy()
+
+class DiagnosticsWindow:
+    COLUMNS = (
+        ('diag_command', None),
+        ('diag_count', 'count'),
+        ('diag_errors', 'errors'),
+        ('diag_reused', 'reused'),
+        ('diag_retries', 'retries'),
+        ('diag_lock_wait', 'lock_wait_ms_avg'),
+        ('diag_channel_open', 'channel_open_ms_avg'),
+        ('diag_first_byte', 'first_byte_ms_avg'),
+        ('diag_p50', 'total_ms_p50'),
+        ('diag_p95', 'total_ms_p95'),
+        ('diag_p99', 'total_ms_p99'),
+        ('diag_max', 'total_ms_max'),
+        ('diag_bytes_in', 'bytes_in'),
+        ('diag_bytes_out', 'bytes_out')
+    )
+    STALL_COLUMNS = ('diag_stall_time', 'diag_stall_duration', 'diag_stall_handler')
+
+    def __init__(self, master):
+        self.master = master
+        self.after_id = None
+
+        self.window = tk.Toplevel(master)
+        self.window.title(translator.translate("diagnostics_title"))
+        self.window.geometry("1200x760")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.top_frame = Frame(self.window, padding=10)
+        self.top_frame.pack(side=tk.TOP, fill=tk.X)
+
+        self.export_button = Button(
+            self.top_frame,
+            text=translator.translate("export_json"),
+            command=self.export_json
+        )
+        self.export_button.pack(side=tk.LEFT)
+
+        self.tree_frame = Frame(self.window, padding=(10, 0))
+        self.tree_frame.pack(fill=tk.BOTH, expand=True)
+
+        self.columns = tuple(key for key, _ in self.COLUMNS)
+        self.tree = Treeview(self.tree_frame, columns=self.columns, show='headings', height=10)
+        for key in self.columns:
+            self.tree.heading(key, text=translator.translate(key))
+            self.tree.column(key, anchor='center', width=85, stretch=True)
+        self.tree.column('diag_command', anchor='w', width=160)
+        self.tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+        self.tree.bind("<<TreeviewSelect>>", lambda event: self.draw_histogram())
+
+        self.scrollbar = Scrollbar(self.tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.histogram_canvas = tk.Canvas(self.window, height=160, highlightthickness=0)
+        self.histogram_canvas.pack(fill=tk.X, padx=10, pady=10)
+
+        self.ui_frame = ttk.LabelFrame(self.window, text=translator.translate("diag_ui"), padding=10)
+        self.ui_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        self.ui_var = tk.StringVar()
+        self.ui_label = Label(self.ui_frame, textvariable=self.ui_var)
+        self.ui_label.pack(side=tk.TOP, fill=tk.X)
+        self.stall_tree = Treeview(self.ui_frame, columns=self.STALL_COLUMNS, show='headings', height=4)
+        for key in self.STALL_COLUMNS:
+            self.stall_tree.heading(key, text=translator.translate(key))
+            self.stall_tree.column(key, anchor='center', width=160, stretch=True)
+        self.stall_tree.column('diag_stall_handler', anchor='w', width=400)
+        self.stall_tree.pack(fill=tk.X, pady=(5, 0))
+
+        self.snapshot = {}
+        self.refresh()
+
+    def refresh(self):
+        snapshot = instrumentation.snapshot()
+        self.snapshot = snapshot['commands']
+        for label, stats in sorted(self.snapshot.items()):
+            values = [label] + [stats[field] for _, field in self.COLUMNS[1:]]
+            if self.tree.exists(label):
+                self.tree.item(label, values=values)
+            else:
+                self.tree.insert('', 'end', iid=label, values=values)
+        self.draw_histogram()
+        self.render_ui_stats(snapshot['ui'])
+        self.after_id = self.window.after(DIAGNOSTICS_REFRESH_MS, self.refresh)
+
+    def render_ui_stats(self, ui):
+        slowest = max(ui['handlers'].items(), key=lambda item: item[1]['max_ms'], default=None)
+        self.ui_var.set(translator.translate(
+            "diag_ui_summary", p50=ui['lateness_ms_p50'], p95=ui['lateness_ms_p95'], max=ui['lateness_ms_max'],
+            stalls=ui['stalls'], total=ui['stalled_ms_total'],
+            slowest=f"{slowest[0]} ({slowest[1]['max_ms']} ms)" if slowest else "-"
+        ))
+        self.stall_tree.delete(*self.stall_tree.get_children())
+        for stall in reversed(ui['recent_stalls']):
+            self.stall_tree.insert('', 'end', values=(format_timestamp(stall['timestamp']), stall['duration_ms'], stall['handler']))
+
+    def draw_histogram(self):
+        canvas = self.histogram_canvas
+        canvas.delete('all')
+        selection = self.tree.selection()
+        stats = self.snapshot.get(selection[0]) if selection else None
+        if not stats:
+            canvas.create_text(10, 80, anchor='w', text=translator.translate("diag_select_command"), fill='grey')
+            return
+        buckets = stats['buckets']
+        labels = [f"<={bound}" for bound in stats['bucket_bounds_ms']] + [f">{stats['bucket_bounds_ms'][-1]}"]
+        width = max(canvas.winfo_width(), 400)
+        bar_width = width / len(buckets)
+        peak = max(buckets) or 1
+        for index, count in enumerate(buckets):
+            x0 = index * bar_width + 4
+            x1 = (index + 1) * bar_width - 4
+            y1 = 130
+            y0 = y1 - (110 * count / peak)
+            canvas.create_rectangle(x0, y0, x1, y1, fill='#4c9be8', outline='')
+            canvas.create_text((x0 + x1) / 2, y0 - 8, text=str(count), fill='grey')
+            canvas.create_text((x0 + x1) / 2, 145, text=f"{labels[index]} ms", fill='grey')
+
+    def export_json(self):
+        path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension='.json',
+            initialfile='pm2-monitor-diagnostics.json',
+            filetypes=[('JSON', '*.json')]
+        )
+        if not path:
+            return
+        try:
+            instrumentation.dump_json(path)
+            messagebox.showinfo(translator.translate("success"), translator.translate("export_success", path=path), parent=self.window)
+        except OSError as e:
+            messagebox.showerror(translator.translate("error"), translator.translate("export_failed", error=e), parent=self.window)
+            logger.error(f"Failed to write diagnostics: {e}")
+
+    def close(self):
+        if self.after_id:
+            self.window.after_cancel(self.after_id)
+            self.after_id = None
+        self.window.destroy()
+
+class DetailPane:
+    def __init__(self, pane, app):
+        self.pane = pane
+        self.app = app
+        self.visible = False
+        self.service = None
+        self.after_id = None
+        self.loading = set()
+        self.rendered = None
+        self.cache = TTLCache(DETAIL_CACHE_SIZE, DETAIL_CACHE_TTL)
+
+        self.frame = Frame(pane, padding=(10, 0, 0, 0))
+
+        self.title_var = tk.StringVar(value=translator.translate("details_select_service"))
+        self.title_label = Label(self.frame, textvariable=self.title_var)
+        self.title_label.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
+
+        self.tree = Treeview(self.frame, columns=('value',), show='tree headings', style='Custom.Treeview')
+        self.tree.heading('#0', text=translator.translate("details_field"))
+        self.tree.heading('value', text=translator.translate("details_value"))
+        self.tree.column('#0', width=180, stretch=True)
+        self.tree.column('value', width=220, stretch=True)
+        self.tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+
+        self.scrollbar = Scrollbar(self.frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    def show(self):
+        if self.visible:
+            return
+        self.pane.add(self.frame, weight=1)
+        self.visible = True
+        self.app.on_selection_changed()
+
+    def hide(self):
+        if not self.visible:
+            return
+        self.cancel_refresh()
+        self.pane.forget(self.frame)
+        self.visible = False
+
+    def select(self, service):
+        if service is None or not self.visible:
+            self.service = service
+            self.cancel_refresh()
+            if self.visible:
+                self.title_var.set(translator.translate("details_select_service"))
+                self.tree.delete(*self.tree.get_children())
+                self.rendered = None
+            return
+        changed = self.service is None or self.service.pm_id != service.pm_id
+        self.service = service
+        if changed:
+            self.cancel_refresh()
+            self.title_var.set(translator.translate("details_for", app_name=service.name, pm_id=service.pm_id))
+            self.tree.delete(*self.tree.get_children())
+            self.rendered = None
+            self.load()
+
+    def load(self):
+        self.after_id = None
+        if not self.visible or self.service is None:
+            return
+        pm_id = self.service.pm_id
+        cached = self.cache.get(pm_id)
+        if cached is not None:
+            self.render(pm_id, cached)
+        elif pm_id not in self.loading:
+            self.loading.add(pm_id)
+            threading.Thread(target=self.fetch, args=(pm_id,), daemon=True).start()
+        self.after_id = self.frame.after(DETAIL_REFRESH_MS, self.load)
+
+    def fetch(self, pm_id):
+        sections = None
+        try:
+            sections = get_pm2_description(self.app.ssh_client, pm_id)
+            if sections is not None:
+                self.cache.set(pm_id, sections)
+        finally:
+            self.loading.discard(pm_id)
+        if sections is not None:
+            self.frame.after(0, lambda: self.render(pm_id, sections))
+
+    def render(self, pm_id, sections):
+        if not self.visible or self.service is None or self.service.pm_id != pm_id:
+            return
+        timeline = self.app.restart_tracker.timeline(pm_id)
+        leak = self.app.leak_detector.get(pm_id)
+        if self.rendered is not None and self.rendered[0] is sections and self.rendered[1] == timeline and self.rendered[2] is leak:
+            return
+        self.rendered = (sections, timeline, leak)
+        self.tree.delete(*self.tree.get_children())
+        for index, (title, rows) in enumerate(sections):
+            parent = self.tree.insert('', 'end', iid=f"section:{index}", text=title, open=True)
+            for key, value in rows:
+                self.tree.insert(parent, 'end', text=key, values=(value,))
+        parent = self.tree.insert('', 'end', iid="section:restarts", text=translator.translate("restart_timeline"), open=True)
+        if not timeline:
+            self.tree.insert(parent, 'end', text=translator.translate("restart_timeline_empty"), values=("",))
+        for event in reversed(timeline):
+            text = translator.translate("restart_event", count=event.delta, status=event.status)
+            if event.unstable:
+                text = f"{text} - {translator.translate('restart_event_unstable', count=event.unstable)}"
+            self.tree.insert(parent, 'end', text=format_timestamp(event.timestamp), values=(text,))
+        if leak is not None:
+            parent = self.tree.insert('', 'end', iid="section:leak", text=translator.translate("memory_trend"), open=True)
+            rows = [
+                (translator.translate("memory_trend_rate"), f"{leak.mb_per_hour} MB/h"),
+                (translator.translate("memory_trend_fit"), round(leak.fit, 2)),
+                (translator.translate("memory_trend_window"), format_eta(leak.span)),
+                (translator.translate("memory_trend_limit"), f"{round(leak.limit_mb)} MB" if leak.limit_mb else 'N/A'),
+                (translator.translate("memory_trend_eta"), format_eta(leak.eta) if leak.eta is not None else 'N/A')
+            ]
+            for key, value in rows:
+                self.tree.insert(parent, 'end', text=key, values=(value,))
+
+    def cancel_refresh(self):
+        if self.after_id:
+            self.frame.after_cancel(self.after_id)
+            self.after_id = None
+
+def browse_key_file(var):
+    path = filedialog.askopenfilename(title=translator.translate("private_key"), initialdir=os.path.expanduser('~/.ssh'))
+    if path:
+        var.set(path)
+
 class ConfigWindow:
     def __init__(self, master, app):
         self.master = master
@@ -448,7 +4654,7 @@ class ConfigWindow:
 
         self.window = tk.Toplevel(master)
         self.window.title(translator.translate("config_title"))
-        self.window.geometry("450x400")
+        self.window.geometry("450x960")
         self.window.grab_set()
 
         self.window.columnconfigure(0, weight=1)
@@ -459,33 +4665,58 @@ class ConfigWindow:
 
         self.server_frame.columnconfigure(1, weight=1)
 
+        self.profile_label = Label(self.server_frame, text=translator.translate("profile"))
+        self.profile_label.grid(row=0, column=0, padx=5, pady=5, sticky='e')
+
+        self.profile_var = tk.StringVar(value=config_handler.active_profile_name() or self.app.ssh_details['host'] or '')
+        self.profile_menu = ttk.Combobox(self.server_frame, textvariable=self.profile_var, values=config_handler.profile_names())
+        self.profile_menu.grid(row=0, column=1, padx=5, pady=5, sticky='ew')
+        self.profile_menu.bind("<<ComboboxSelected>>", lambda event: self.load_profile(self.profile_var.get()))
+
+        self.delete_profile_button = Button(self.server_frame, text=translator.translate("delete_profile"), command=self.delete_profile, bootstyle='secondary')
+        self.delete_profile_button.grid(row=0, column=2, padx=5, pady=5)
+
         self.host_label = Label(self.server_frame, text=translator.translate("host"))
-        self.host_label.grid(row=0, column=0, padx=5, pady=5, sticky='e')
+        self.host_label.grid(row=1, column=0, padx=5, pady=5, sticky='e')
 
         self.host_var = tk.StringVar(value=self.app.ssh_details['host'])
         self.host_entry = Entry(self.server_frame, textvariable=self.host_var)
-        self.host_entry.grid(row=0, column=1, padx=5, pady=5, sticky='ew')
+        self.host_entry.grid(row=1, column=1, columnspan=2, padx=5, pady=5, sticky='ew')
 
         self.port_label = Label(self.server_frame, text=translator.translate("port"))
-        self.port_label.grid(row=1, column=0, padx=5, pady=5, sticky='e')
+        self.port_label.grid(row=2, column=0, padx=5, pady=5, sticky='e')
 
         self.port_var = tk.IntVar(value=self.app.ssh_details['port'])
         self.port_entry = Entry(self.server_frame, textvariable=self.port_var)
-        self.port_entry.grid(row=1, column=1, padx=5, pady=5, sticky='ew')
+        self.port_entry.grid(row=2, column=1, columnspan=2, padx=5, pady=5, sticky='ew')
 
         self.username_label = Label(self.server_frame, text=translator.translate("username"))
-        self.username_label.grid(row=2, column=0, padx=5, pady=5, sticky='e')
+        self.username_label.grid(row=3, column=0, padx=5, pady=5, sticky='e')
 
         self.username_var = tk.StringVar(value=self.app.ssh_details['username'])
         self.username_entry = Entry(self.server_frame, textvariable=self.username_var)
-        self.username_entry.grid(row=2, column=1, padx=5, pady=5, sticky='ew')
+        self.username_entry.grid(row=3, column=1, columnspan=2, padx=5, pady=5, sticky='ew')
 
         self.password_label = Label(self.server_frame, text=translator.translate("password"))
-        self.password_label.grid(row=3, column=0, padx=5, pady=5, sticky='e')
+        self.password_label.grid(row=4, column=0, padx=5, pady=5, sticky='e')
 
-        self.password_var = tk.StringVar(value=self.app.ssh_details['password'])
+        self.password_var = tk.StringVar(value=self.app.ssh_details['password'] or '')
         self.password_entry = Entry(self.server_frame, textvariable=self.password_var, show='*')
-        self.password_entry.grid(row=3, column=1, padx=5, pady=5, sticky='ew')
+        self.password_entry.grid(row=4, column=1, columnspan=2, padx=5, pady=5, sticky='ew')
+
+        self.key_label = Label(self.server_frame, text=translator.translate("private_key"))
+        self.key_label.grid(row=5, column=0, padx=5, pady=5, sticky='e')
+
+        self.key_var = tk.StringVar(value=self.app.ssh_details['key_filename'] or '')
+        self.key_entry = Entry(self.server_frame, textvariable=self.key_var)
+        self.key_entry.grid(row=5, column=1, padx=5, pady=5, sticky='ew')
+
+        self.key_button = Button(self.server_frame, text=translator.translate("browse"), command=lambda: browse_key_file(self.key_var), bootstyle='secondary')
+        self.key_button.grid(row=5, column=2, padx=5, pady=5)
+
+        self.server_entries = (self.host_entry, self.port_entry, self.username_entry, self.password_entry, self.key_entry, self.key_button)
+        self.local = isinstance(self.app.ssh_client, LocalClient)
+        self.set_server_state()
 
         self.pref_frame = Frame(self.window, padding=10)
         self.pref_frame.grid(row=1, column=0, columnspan=2, sticky='ew')
@@ -507,19 +4738,88 @@ class ConfigWindow:
         self.theme_menu = ttk.Combobox(self.pref_frame, textvariable=self.theme_var, values=self.theme_options, state='readonly')
         self.theme_menu.grid(row=1, column=1, padx=5, pady=5, sticky='ew')
 
+        self.alert_frame = ttk.LabelFrame(self.window, text=translator.translate("alerts"), padding=10)
+        self.alert_frame.grid(row=2, column=0, columnspan=2, sticky='ew', padx=10)
+
+        self.alert_frame.columnconfigure(1, weight=1)
+
+        alert_settings = config_handler.get_alert_settings()
+        self.alert_vars = {}
+        for row, (key, var_type) in enumerate((
+            ('cpu_threshold', tk.DoubleVar),
+            ('memory_threshold_mb', tk.DoubleVar),
+            ('sustain_samples', tk.IntVar),
+            ('host_memory_threshold', tk.DoubleVar),
+            ('log_disk_threshold', tk.DoubleVar),
+            ('crash_loop_restarts', tk.IntVar),
+            ('restart_window', tk.IntVar),
+            ('restart_storm_restarts', tk.IntVar),
+            ('leak_slope_mb_per_hour', tk.DoubleVar),
+            ('leak_window', tk.IntVar),
+            ('webhook_url', tk.StringVar),
+            ('command_hook', tk.StringVar)
+        )):
+            label = Label(self.alert_frame, text=translator.translate(f"alert_{key}"))
+            label.grid(row=row, column=0, padx=5, pady=5, sticky='e')
+            self.alert_vars[key] = var_type(value=alert_settings[key])
+            entry = Entry(self.alert_frame, textvariable=self.alert_vars[key])
+            entry.grid(row=row, column=1, padx=5, pady=5, sticky='ew')
+
+        self.alert_vars['desktop_notifications'] = tk.BooleanVar(value=alert_settings['desktop_notifications'])
+        self.notifications_check = ttk.Checkbutton(
+            self.alert_frame,
+            text=translator.translate("alert_desktop_notifications"),
+            variable=self.alert_vars['desktop_notifications']
+        )
+        self.notifications_check.grid(row=12, column=1, padx=5, pady=5, sticky='w')
+
         self.save_button = Button(self.window, text=translator.translate("save"), command=self.save_config)
-        self.save_button.grid(row=2, column=0, columnspan=2, pady=10)
+        self.save_button.grid(row=3, column=0, columnspan=2, pady=10)
+
+    def set_server_state(self):
+        for widget in self.server_entries:
+            widget.configure(state='disabled' if self.local else 'normal')
+
+    def load_profile(self, name):
+        profile = config_handler.get_profile(name)
+        if profile is None:
+            return
+        host, port, username, password = config_handler.get_server_details(name)
+        self.host_var.set(host or '')
+        self.port_var.set(port or 22)
+        self.username_var.set(username or '')
+        self.password_var.set(password or '')
+        self.key_var.set(profile.get('key_filename') or '')
+        self.local = profile.get('backend') == 'local'
+        self.set_server_state()
+
+    def delete_profile(self):
+        name = self.profile_var.get().strip()
+        if not name or name not in config_handler.profile_names():
+            return
+        if name == config_handler.active_profile_name():
+            messagebox.showwarning(translator.translate("delete_profile"), translator.translate("delete_active_profile"), parent=self.window)
+            return
+        if not messagebox.askyesno(translator.translate("delete_profile"), translator.translate("delete_profile_confirm", profile=name), parent=self.window):
+            return
+        config_handler.delete_profile(name)
+        self.profile_menu.configure(values=config_handler.profile_names())
+        self.profile_var.set(config_handler.active_profile_name() or '')
+        self.load_profile(self.profile_var.get())
+        self.app.refresh_profiles()
 
     def save_config(self):
+        name = self.profile_var.get().strip()
         host = self.host_var.get().strip()
-        port = self.port_var.get()
         username = self.username_var.get().strip()
         password = self.password_var.get().strip()
+        key_filename = self.key_var.get().strip()
+        try:
+            port = self.port_var.get()
+        except tk.TclError:
+            port = 0
 
-        if not host or not username or not password:
-            messagebox.showerror(translator.translate("invalid_input"), translator.translate("invalid_input_message"))
-            return
-        if not (0 < port <= 65535):
+        if not self.local and (not host or not username or not (0 < port <= 65535)):
             messagebox.showerror(translator.translate("invalid_input"), translator.translate("invalid_input_message"))
             return
 
@@ -536,13 +4836,71 @@ class ConfigWindow:
             messagebox.showerror(translator.translate("invalid_theme"), translator.translate("invalid_theme_message"))
             return
 
-        config_handler.set_server_details(host, port, username, password)
+        try:
+            alert_settings = {**config_handler.get_alert_settings(), **{key: var.get() for key, var in self.alert_vars.items()}}
+            if min(alert_settings['sustain_samples'], alert_settings['crash_loop_restarts'], alert_settings['restart_window'], alert_settings['restart_storm_restarts'], alert_settings['leak_window']) < 1 or min(alert_settings['cpu_threshold'], alert_settings['memory_threshold_mb'], alert_settings['host_memory_threshold'], alert_settings['log_disk_threshold'], alert_settings['leak_slope_mb_per_hour']) < 0:
+                raise ValueError
+        except (tk.TclError, ValueError):
+            messagebox.showerror(translator.translate("invalid_input"), translator.translate("invalid_input_message"))
+            return
+        alert_settings['webhook_url'] = alert_settings['webhook_url'].strip()
+        alert_settings['command_hook'] = alert_settings['command_hook'].strip()
+
+        reconnect = False
+        if not self.local:
+            name = name or host
+            reconnect = name != config_handler.active_profile_name() or (host, port, username, password, key_filename or None) != (
+                self.app.ssh_details['host'], self.app.ssh_details['port'], self.app.ssh_details['username'], self.app.ssh_details['password'] or '', self.app.ssh_details['key_filename'])
+            config_handler.set_server_details(host, port, username, password, key_filename, name=name)
+        elif name in config_handler.profile_names() and name != config_handler.active_profile_name():
+            reconnect = True
         config_handler.set_preferences(interval, selected_theme)
+        config_handler.set_alert_settings(alert_settings)
 
+        self.app.refresh_profiles()
+        if reconnect:
+            self.app.switch_profile(name)
         self.app.apply_preferences()
         messagebox.showinfo(translator.translate("success"), translator.translate("save_success"))
         self.window.destroy()
 
+class CustomMetricsWindow:
+    def __init__(self, master, app):
+        self.master = master
+        self.app = app
+
+        self.window = tk.Toplevel(master)
+        self.window.title(translator.translate("custom_metrics"))
+        self.window.geometry("700x500")
+        self.window.grab_set()
+        self.window.bind('<Escape>', lambda event: self.window.destroy())
+
+        self.help_label = Label(self.window, text=translator.translate("custom_metrics_help"), padding=10, wraplength=680, justify=tk.LEFT)
+        self.help_label.pack(side=tk.TOP, fill=tk.X)
+
+        self.text_frame = Frame(self.window, padding=(10, 0))
+        self.text_frame.pack(fill=tk.BOTH, expand=True)
+        self.text = tk.Text(self.text_frame, wrap=tk.NONE, undo=True, font=("Courier", 10))
+        self.text.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+        self.scrollbar = Scrollbar(self.text_frame, orient=tk.VERTICAL, command=self.text.yview)
+        self.text.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text.insert('1.0', json.dumps(config_handler.get_custom_metrics(), indent=4))
+
+        self.save_button = Button(self.window, text=translator.translate("save"), command=self.save)
+        self.save_button.pack(side=tk.BOTTOM, pady=10)
+
+    def save(self):
+        try:
+            definitions = json.loads(self.text.get('1.0', tk.END).strip() or '[]')
+            parse_custom_metrics(definitions)
+        except ValueError as e:
+            messagebox.showerror(translator.translate("invalid_input"), translator.translate("custom_metrics_invalid", error=e), parent=self.window)
+            return
+        config_handler.set_custom_metrics(definitions)
+        self.app.apply_custom_metrics()
+        self.window.destroy()
+
 class ConfigWindowInitial:
     def __init__(self, master, app):
         self.master = master
@@ -584,16 +4942,53 @@ class ConfigWindowInitial:
         self.password_entry = Entry(self.window, textvariable=self.password_var, show='*')
         self.password_entry.grid(row=3, column=1, padx=5, pady=5, sticky='ew')
 
+        self.key_label = Label(self.window, text=translator.translate("private_key"))
+        self.key_label.grid(row=4, column=0, padx=5, pady=5, sticky='e')
+
+        key_frame = Frame(self.window)
+        key_frame.grid(row=4, column=1, padx=5, pady=5, sticky='ew')
+        key_frame.columnconfigure(0, weight=1)
+        self.key_var = tk.StringVar()
+        self.key_entry = Entry(key_frame, textvariable=self.key_var)
+        self.key_entry.grid(row=0, column=0, sticky='ew')
+        self.key_button = Button(key_frame, text=translator.translate("browse"), command=lambda: browse_key_file(self.key_var))
+        self.key_button.grid(row=0, column=1, padx=(5, 0))
+
+        self.local_var = tk.BooleanVar(value=False)
+        self.local_check = ttk.Checkbutton(
+            self.window,
+            text=translator.translate("monitor_this_machine"),
+            variable=self.local_var,
+            command=self.toggle_local,
+            state='normal' if LOCAL_MODE_SUPPORTED else 'disabled'
+        )
+        self.local_check.grid(row=5, column=1, padx=5, pady=5, sticky='w')
+
         self.save_button = Button(self.window, text=translator.translate("save_and_connect"), command=self.save_and_connect)
-        self.save_button.grid(row=4, column=0, columnspan=2, pady=20)
+        self.save_button.grid(row=6, column=0, columnspan=2, pady=20)
+
+    def toggle_local(self):
+        state = 'disabled' if self.local_var.get() else 'normal'
+        for entry in (self.host_entry, self.port_entry, self.username_entry, self.password_entry, self.key_entry, self.key_button):
+            entry.configure(state=state)
 
     def save_and_connect(self):
+        if self.local_var.get():
+            config_handler.set_backend('local')
+            config_handler.set_preferences(DEFAULT_AUTO_REFRESH_INTERVAL, DEFAULT_THEME)
+            self.app.initialize_application()
+            if self.app.ssh_client.client is not None:
+                self.window.destroy()
+            return
+
         host = self.host_var.get().strip()
         port = self.port_var.get()
         username = self.username_var.get().strip()
         password = self.password_var.get().strip()
+        key_filename = self.key_var.get().strip()
 
-        if not host or not username or not password:
+        # The password may stay empty for key-based authentication.
+        if not host or not username:
             messagebox.showerror(
                 translator.translate("invalid_input"),
                 translator.translate("invalid_input_message")
@@ -609,7 +5004,8 @@ class ConfigWindowInitial:
         interval = DEFAULT_AUTO_REFRESH_INTERVAL
         selected_theme = DEFAULT_THEME
 
-        config_handler.set_server_details(host, port, username, password)
+        config_handler.set_server_details(host, port, username, password, key_filename, name=host)
+        config_handler.select_profile(host)
         config_handler.set_preferences(interval, selected_theme)
 
         self.app.initialize_application()
@@ -631,9 +5027,13 @@ class TerminalWindow:
         self.master = master
         self.ssh_client = ssh_client
 
+        self.operations = HandleGroup(ssh_client)
+
         self.window = tk.Toplevel(master)
         self.window.title("SSH Terminal")
         self.window.geometry("800x400")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.window.bind('<Escape>', self.cancel_commands)
 
         style = ttk.Style()
         style.configure("Terminal.TText", background="black", foreground="green", font=("Courier", 10))
@@ -677,29 +5077,524 @@ class TerminalWindow:
             return
         self.append_terminal_output(f"> {command}\n")
         self.terminal_input.delete("1.0", tk.END)
-        threading.Thread(target=self.execute_terminal_command, args=(command,), daemon=True).start()
+        self.operations.start(command, lambda output: self.window.after(0, self.show_terminal_output, output), timeout=TERMINAL_COMMAND_TIMEOUT)
         return "break"
 
     def insert_newline(self, event=None):
         self.terminal_input.insert(tk.END, "\n")
         return "break"
 
-    def execute_terminal_command(self, command):
-        output = self.ssh_client.execute_command(command)
+    def show_terminal_output(self, output):
+        # Terminal commands may change PM2 state, so nothing read before them can be reused.
+        self.ssh_client.invalidate_reads()
         if output is not None:
             self.append_terminal_output(output + "\n")
         else:
             self.append_terminal_output("Command execution failed.\n")
 
+    def cancel_commands(self, event=None):
+        if any(not handle.done.is_set() for handle in self.operations.handles):
+            self.operations.cancel()
+            self.append_terminal_output("Command cancelled.\n")
+        return "break"
+
+    def close(self):
+        self.operations.cancel()
+        self.window.destroy()
+
     def append_terminal_output(self, text):
         self.terminal_display.config(state=tk.NORMAL)
         self.terminal_display.insert(tk.END, text)
         self.terminal_display.see(tk.END)
         self.terminal_display.config(state=tk.DISABLED)
 
+class AlertsWindow:
+    COLUMNS = ('alert_raised_time', 'alert_cleared_time', 'alert_rule', 'app_name', 'alert_message')
+
+    def __init__(self, master, engine):
+        self.master = master
+        self.engine = engine
+        self.after_id = None
+        self.rendered = 0
+
+        self.window = tk.Toplevel(master)
+        self.window.title(translator.translate("alerts"))
+        self.window.geometry("1000x450")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.tree_frame = Frame(self.window, padding=10)
+        self.tree_frame.pack(fill=tk.BOTH, expand=True)
+
+        self.tree = Treeview(self.tree_frame, columns=self.COLUMNS, show='headings')
+        for key in self.COLUMNS:
+            self.tree.heading(key, text=translator.translate(key))
+            self.tree.column(key, anchor='center', width=140, stretch=True)
+        self.tree.column('alert_message', anchor='w', width=420)
+        self.tree.tag_configure('active', foreground='#d9534f')
+        self.tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+
+        self.scrollbar = Scrollbar(self.tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.refresh()
+
+    def refresh(self):
+        with self.engine.lock:
+            history = list(self.engine.history)
+        for index, alert in enumerate(reversed(history)):
+            iid = f"{alert.key}@{alert.raised_at}"
+            values = (
+                format_timestamp(alert.raised_at),
+                format_timestamp(alert.cleared_at) if alert.cleared_at else "-",
+                translator.translate(f"alert_rule_{alert.rule}"),
+                alert.name,
+                alert.message
+            )
+            tags = () if alert.cleared_at else ('active',)
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=values, tags=tags)
+            else:
+                self.tree.insert('', index, iid=iid, values=values, tags=tags)
+        known = {f"{alert.key}@{alert.raised_at}" for alert in history}
+        for iid in self.tree.get_children():
+            if iid not in known:
+                self.tree.delete(iid)
+        self.after_id = self.window.after(DIAGNOSTICS_REFRESH_MS, self.refresh)
+
+    def close(self):
+        if self.after_id is not None:
+            self.window.after_cancel(self.after_id)
+        self.window.destroy()
+
+def format_timestamp(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+class ChartPanel:
+    MARGIN_LEFT = 60
+    MARGIN_RIGHT = 15
+    MARGIN_TOP = 25
+    MARGIN_BOTTOM = 25
+
+    def __init__(self, master, title, unit, minimum_scale):
+        self.title = title
+        self.unit = unit
+        self.minimum_scale = minimum_scale
+        self.decimator = LTTBDecimator()
+        self.layout = None
+        self.canvas = tk.Canvas(master, height=220, highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.line = self.canvas.create_line(0, 0, 0, 0, fill='#4c9be8', width=1.5, state='hidden')
+        self.empty_text = self.canvas.create_text(0, 0, text=translator.translate("chart_no_data"), fill='grey', state='hidden')
+
+    def update(self, history, key, now, range_seconds):
+        width = max(self.canvas.winfo_width(), 200)
+        height = max(self.canvas.winfo_height(), 120)
+        plot_width = width - self.MARGIN_LEFT - self.MARGIN_RIGHT
+        plot_height = height - self.MARGIN_TOP - self.MARGIN_BOTTOM
+        start_time = now - range_seconds
+        points = self.decimator.update(history, key, start_time, range_seconds / plot_width)
+
+        peak = max((value for _, value in points), default=0)
+        scale = self.minimum_scale
+        while scale < peak:
+            scale *= 2
+        layout = (width, height, scale, range_seconds)
+        if layout != self.layout:
+            self.layout = layout
+            self.draw_axes(width, height, plot_width, plot_height, scale, range_seconds)
+
+        if len(points) < 2:
+            self.canvas.itemconfigure(self.line, state='hidden')
+            self.canvas.coords(self.empty_text, self.MARGIN_LEFT + plot_width / 2, self.MARGIN_TOP + plot_height / 2)
+            self.canvas.itemconfigure(self.empty_text, state='normal')
+            return
+        coords = []
+        for timestamp, value in points:
+            coords.append(self.MARGIN_LEFT + (timestamp - start_time) / range_seconds * plot_width)
+            coords.append(self.MARGIN_TOP + (1 - value / scale) * plot_height)
+        self.canvas.coords(self.line, *coords)
+        self.canvas.itemconfigure(self.line, state='normal')
+        self.canvas.itemconfigure(self.empty_text, state='hidden')
+        self.canvas.tag_raise(self.line)
+
+    def draw_axes(self, width, height, plot_width, plot_height, scale, range_seconds):
+        self.canvas.delete('axis')
+        self.canvas.create_text(self.MARGIN_LEFT, 12, anchor='w', text=self.title, fill='grey', tags='axis')
+        bottom = self.MARGIN_TOP + plot_height
+        for step in range(5):
+            y = self.MARGIN_TOP + plot_height * step / 4
+            self.canvas.create_line(self.MARGIN_LEFT, y, width - self.MARGIN_RIGHT, y, fill='#555555', dash=(2, 4), tags='axis')
+            label = scale * (4 - step) / 4
+            self.canvas.create_text(self.MARGIN_LEFT - 5, y, anchor='e', text=f"{label:g} {self.unit}", fill='grey', tags='axis')
+        for step in range(5):
+            x = self.MARGIN_LEFT + plot_width * step / 4
+            offset = range_seconds * (4 - step) / 4
+            label = translator.translate("chart_now") if offset == 0 else f"-{format_duration(offset)}"
+            self.canvas.create_text(x, bottom + 12, text=label, fill='grey', tags='axis')
+
+    def reset(self):
+        self.decimator.reset(None, None)
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 86400 and seconds % 86400 == 0:
+        return f"{seconds // 86400}d"
+    if seconds >= 3600:
+        return f"{seconds / 3600:g}h"
+    if seconds >= 60:
+        return f"{seconds / 60:g}m"
+    return f"{seconds}s"
+
+class ChartWindow:
+    def __init__(self, master, history, pm_id=None):
+        self.master = master
+        self.history = history
+        self.after_id = None
+        self.drawn = None
+
+        self.window = tk.Toplevel(master)
+        self.window.title(translator.translate("charts_title"))
+        self.window.geometry("1000x600")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.top_frame = Frame(self.window, padding=10)
+        self.top_frame.pack(side=tk.TOP, fill=tk.X)
+
+        self.series_label = Label(self.top_frame, text=translator.translate("chart_series"))
+        self.series_label.pack(side=tk.LEFT, padx=(0, 5))
+        self.series_var = tk.StringVar(value=translator.translate("chart_host"))
+        self.series_menu = ttk.Combobox(self.top_frame, textvariable=self.series_var, state='readonly', width=30, postcommand=self.update_series_options)
+        self.series_menu.pack(side=tk.LEFT, padx=(0, 20))
+        self.series_menu.bind("<<ComboboxSelected>>", lambda event: self.redraw())
+
+        self.range_label = Label(self.top_frame, text=translator.translate("chart_range"))
+        self.range_label.pack(side=tk.LEFT, padx=(0, 5))
+        self.ranges = {translator.translate(key): seconds for key, seconds in CHART_RANGES}
+        self.range_var = tk.StringVar(value=translator.translate(CHART_RANGES[0][0]))
+        self.range_menu = ttk.Combobox(self.top_frame, textvariable=self.range_var, values=list(self.ranges), state='readonly', width=12)
+        self.range_menu.pack(side=tk.LEFT)
+        self.range_menu.bind("<<ComboboxSelected>>", lambda event: self.redraw())
+
+        self.cpu_panel = ChartPanel(self.window, translator.translate("chart_cpu"), "%", 100)
+        self.memory_panel = ChartPanel(self.window, translator.translate("chart_memory"), "MB", 64)
+        self.window.bind("<Configure>", lambda event: self.redraw() if event.widget is self.window else None)
+
+        self.series_options = {}
+        self.update_series_options()
+        for label, series in self.series_options.items():
+            if pm_id is not None and series == pm_id:
+                self.series_var.set(label)
+        self.refresh()
+
+    def update_series_options(self):
+        self.series_options = {translator.translate("chart_host"): HOST_SERIES}
+        for pm_id, name in sorted(self.history.service_names().items(), key=lambda item: item[0]):
+            self.series_options[f"{name} (ID {pm_id})"] = pm_id
+        self.series_menu.configure(values=list(self.series_options))
+
+    def redraw(self):
+        self.drawn = None
+        self.refresh(reschedule=False)
+
+    def refresh(self, reschedule=True):
+        series = self.series_options.get(self.series_var.get(), HOST_SERIES)
+        range_seconds = self.ranges.get(self.range_var.get(), CHART_RANGES[0][1])
+        state = (self.history.version, series, range_seconds, self.window.winfo_width(), self.window.winfo_height())
+        if state != self.drawn:
+            self.drawn = state
+            now = time.time()
+            self.cpu_panel.update(self.history, (series, METRIC_CPU), now, range_seconds)
+            self.memory_panel.update(self.history, (series, METRIC_MEMORY), now, range_seconds)
+        if reschedule:
+            self.after_id = self.window.after(CHART_REFRESH_MS, self.refresh)
+
+    def close(self):
+        if self.after_id is not None:
+            self.window.after_cancel(self.after_id)
+        self.window.destroy()
+
+class HostWindow:
+    def __init__(self, master, app):
+        self.master = master
+        self.app = app
+        self.after_id = None
+        self.rendered = None
+
+        self.window = tk.Toplevel(master)
+        self.window.title(translator.translate("host_metrics"))
+        self.window.geometry("700x500")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.tree_frame = Frame(self.window, padding=10)
+        self.tree_frame.pack(fill=tk.BOTH, expand=True)
+
+        self.tree = Treeview(self.tree_frame, columns=('value',), show='tree headings')
+        self.tree.heading('#0', text=translator.translate("host_metric"))
+        self.tree.heading('value', text=translator.translate("host_value"))
+        self.tree.column('#0', width=260, stretch=True)
+        self.tree.column('value', anchor='w', width=400, stretch=True)
+        self.tree.tag_configure('full', foreground='#d9534f')
+        self.tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+
+        self.scrollbar = Scrollbar(self.tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.refresh()
+
+    def refresh(self):
+        resources = self.app.host_resources
+        if resources is not None and resources is not self.rendered:
+            self.rendered = resources
+            self.render(resources)
+        self.after_id = self.window.after(DIAGNOSTICS_REFRESH_MS, self.refresh)
+
+    def render(self, resources):
+        open_sections = {iid for iid in self.tree.get_children() if self.tree.item(iid, 'open')}
+        self.tree.delete(*self.tree.get_children())
+        threshold = float(self.app.alert_engine.settings['log_disk_threshold'])
+
+        def section(iid, title):
+            return self.tree.insert('', 'end', iid=iid, text=translator.translate(title), open=not open_sections or iid in open_sections)
+
+        parent = section('load', "host_load")
+        load = resources.get('Load Average')
+        for label, value in zip(('1m', '5m', '15m'), load or ()):
+            self.tree.insert(parent, 'end', text=label, values=(value,))
+
+        parent = section('swap', "host_swap")
+        used, total = resources.get('Swap Used (MB)'), resources.get('Swap Total (MB)')
+        self.tree.insert(parent, 'end', text=translator.translate("host_swap"), values=(f"{used} MB / {total} MB" if used is not None else 'N/A',))
+
+        parent = section('disks', "host_disks")
+        for name, (read, write, busy) in sorted(resources.get('Disks', {}).items()):
+            text = translator.translate("host_disk_rates", read=format_rate(read), write=format_rate(write), busy=round(busy / 10, 1) if busy is not None else 'N/A')
+            self.tree.insert(parent, 'end', text=name, values=(text,))
+
+        parent = section('network', "host_network")
+        for name, (received, sent) in sorted(resources.get('Interfaces', {}).items()):
+            text = translator.translate("host_network_rates", received=format_rate(received), sent=format_rate(sent))
+            self.tree.insert(parent, 'end', text=name, values=(text,))
+
+        parent = section('filesystems', "host_log_filesystems")
+        for filesystem in resources.get('Log Filesystems', []):
+            text = translator.translate(
+                "host_filesystem_usage", percent=filesystem['percent'], used=filesystem['used_mb'],
+                total=filesystem['total_mb'], directories=", ".join(filesystem['directories'])
+            )
+            tags = ('full',) if threshold > 0 and filesystem['percent'] >= threshold else ()
+            self.tree.insert(parent, 'end', text=filesystem['mount'], values=(text,), tags=tags)
+
+    def close(self):
+        if self.after_id is not None:
+            self.window.after_cancel(self.after_id)
+        self.window.destroy()
+
+def format_rate(value):
+    return round(value / 1024, 1) if value is not None else 'N/A'
+
+class ExportWindow:
+    STATUSES = ('', 'online', 'stopping', 'stopped', 'launching', 'errored', 'one-launch-status')
+
+    def __init__(self, master, app):
+        self.master = master
+        self.app = app
+
+        self.window = tk.Toplevel(master)
+        self.window.title(translator.translate("export_title"))
+        self.window.geometry("450x330")
+        self.window.grab_set()
+
+        self.window.columnconfigure(1, weight=1)
+
+        self.scope_var = tk.StringVar(value='snapshot')
+        self.snapshot_radio = ttk.Radiobutton(self.window, text=translator.translate("export_snapshot"), variable=self.scope_var, value='snapshot')
+        self.snapshot_radio.grid(row=0, column=0, columnspan=2, padx=10, pady=(10, 5), sticky='w')
+        self.history_radio = ttk.Radiobutton(self.window, text=translator.translate("export_history"), variable=self.scope_var, value='history')
+        self.history_radio.grid(row=1, column=0, columnspan=2, padx=10, pady=5, sticky='w')
+
+        now = datetime.now()
+        self.since_label = Label(self.window, text=translator.translate("export_since"))
+        self.since_label.grid(row=2, column=0, padx=10, pady=5, sticky='e')
+        self.since_var = tk.StringVar(value=datetime.fromtimestamp(now.timestamp() - 86400).strftime('%Y-%m-%d %H:%M'))
+        self.since_entry = Entry(self.window, textvariable=self.since_var)
+        self.since_entry.grid(row=2, column=1, padx=10, pady=5, sticky='ew')
+
+        self.until_label = Label(self.window, text=translator.translate("export_until"))
+        self.until_label.grid(row=3, column=0, padx=10, pady=5, sticky='e')
+        self.until_var = tk.StringVar(value=now.strftime('%Y-%m-%d %H:%M'))
+        self.until_entry = Entry(self.window, textvariable=self.until_var)
+        self.until_entry.grid(row=3, column=1, padx=10, pady=5, sticky='ew')
+
+        self.name_label = Label(self.window, text=translator.translate("export_name_filter"))
+        self.name_label.grid(row=4, column=0, padx=10, pady=5, sticky='e')
+        self.name_var = tk.StringVar()
+        self.name_entry = Entry(self.window, textvariable=self.name_var)
+        self.name_entry.grid(row=4, column=1, padx=10, pady=5, sticky='ew')
+
+        self.status_label = Label(self.window, text=translator.translate("export_status_filter"))
+        self.status_label.grid(row=5, column=0, padx=10, pady=5, sticky='e')
+        self.status_var = tk.StringVar()
+        self.status_menu = ttk.Combobox(self.window, textvariable=self.status_var, values=self.STATUSES, state='readonly')
+        self.status_menu.grid(row=5, column=1, padx=10, pady=5, sticky='ew')
+
+        self.export_button = Button(self.window, text=translator.translate("export"), command=self.export)
+        self.export_button.grid(row=6, column=0, columnspan=2, pady=15)
+
+    def export(self):
+        try:
+            if self.scope_var.get() == 'history':
+                since = parse_time_argument(self.since_var.get())
+                until = parse_time_argument(self.until_var.get()) if self.until_var.get().strip() else None
+            else:
+                since = until = None
+        except ValueError:
+            messagebox.showerror(translator.translate("invalid_input"), translator.translate("export_invalid_time"))
+            return
+
+        file_path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")]
+        )
+        if not file_path:
+            return
+
+        if since is None:
+            rows = service_rows(list(self.app.all_services), self.app.last_tick_timestamp or time.time())
+        else:
+            rows = iter_history(since, until)
+        names = [self.name_var.get().strip()] if self.name_var.get().strip() else None
+        statuses = [self.status_var.get()] if self.status_var.get() else None
+        rows = filter_rows(rows, names, statuses)
+
+        self.export_button.config(state='disabled')
+        threading.Thread(target=self.write, args=(rows, file_path), daemon=True).start()
+
+    def write(self, rows, file_path):
+        try:
+            count = export_rows(rows, file_path, export_format_for(file_path))
+        except OSError as e:
+            logger.error(f"Export to '{file_path}' failed: {e}")
+            self.window.after(0, lambda: messagebox.showerror(translator.translate("error"), translator.translate("export_failed", error=e), parent=self.window))
+        else:
+            logger.info(f"Exported {count} rows to '{file_path}'.")
+            self.window.after(0, lambda: messagebox.showinfo(translator.translate("success"), translator.translate("export_rows_success", count=count, path=file_path), parent=self.window))
+        self.window.after(0, lambda: self.export_button.config(state='normal'))
+
+class LogBundleWindow:
+    def __init__(self, master, app, selected):
+        self.master = master
+        self.app = app
+        self.selected = selected
+        self.handle = None
+
+        self.window = tk.Toplevel(master)
+        self.window.title(translator.translate("collect_logs"))
+        self.window.geometry("450x250")
+        self.window.grab_set()
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.window.bind('<Escape>', lambda event: self.close())
+
+        self.window.columnconfigure(1, weight=1)
+
+        self.scope_var = tk.StringVar(value='selected' if selected else 'all')
+        self.selected_radio = ttk.Radiobutton(
+            self.window, text=translator.translate("collect_logs_selected", count=len(selected)), variable=self.scope_var, value='selected',
+            state='normal' if selected else 'disabled'
+        )
+        self.selected_radio.grid(row=0, column=0, columnspan=2, padx=10, pady=(10, 5), sticky='w')
+        self.all_radio = ttk.Radiobutton(
+            self.window, text=translator.translate("collect_logs_all", count=len(app.all_services)), variable=self.scope_var, value='all'
+        )
+        self.all_radio.grid(row=1, column=0, columnspan=2, padx=10, pady=5, sticky='w')
+
+        self.lines_label = Label(self.window, text=translator.translate("collect_logs_lines"))
+        self.lines_label.grid(row=2, column=0, padx=10, pady=5, sticky='e')
+        self.lines_var = tk.IntVar(value=DEFAULT_LOG_BUNDLE_LINES)
+        self.lines_entry = Entry(self.window, textvariable=self.lines_var)
+        self.lines_entry.grid(row=2, column=1, padx=10, pady=5, sticky='ew')
+
+        compress_available = app.ssh_client.capabilities.get('gzip', False)
+        self.compress_var = tk.BooleanVar(value=compress_available)
+        self.compress_check = ttk.Checkbutton(
+            self.window, text=translator.translate("collect_logs_compress"), variable=self.compress_var,
+            state='normal' if compress_available else 'disabled'
+        )
+        self.compress_check.grid(row=3, column=1, padx=10, pady=5, sticky='w')
+
+        self.collect_button = Button(self.window, text=translator.translate("collect_logs"), command=self.collect)
+        self.collect_button.grid(row=4, column=0, columnspan=2, pady=15)
+
+    def collect(self):
+        try:
+            lines = self.lines_var.get()
+            if lines < 1:
+                raise ValueError
+        except (tk.TclError, ValueError):
+            messagebox.showerror(translator.translate("invalid_input"), translator.translate("invalid_input_message"), parent=self.window)
+            return
+        services = self.selected if self.scope_var.get() == 'selected' else list(self.app.all_services)
+        if not services:
+            messagebox.showwarning(translator.translate("no_selection"), translator.translate("select_service_warning"), parent=self.window)
+            return
+
+        file_path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension=".zip",
+            initialfile=f"pm2-logs-{datetime.now().strftime('%Y%m%d-%H%M%S')}.zip",
+            filetypes=[("ZIP", "*.zip")]
+        )
+        if not file_path:
+            return
+
+        self.collect_button.config(state='disabled')
+        self.handle = CommandHandle('collect logs')
+        threading.Thread(target=self.write, args=(services, lines, self.compress_var.get(), file_path, self.handle), daemon=True).start()
+
+    def write(self, services, lines, compress, file_path, handle):
+        logs = collect_log_bundle(self.app.ssh_client, services, lines, compress, handle)
+        if handle.cancelled.is_set():
+            return
+        if logs is None:
+            self.window.after(0, lambda: messagebox.showerror(translator.translate("error"), translator.translate("collect_logs_failed"), parent=self.window))
+        else:
+            try:
+                count = save_log_bundle(file_path, services, logs, host=self.app.ssh_client.host, lines=lines)
+            except OSError as e:
+                logger.error(f"Saving the log bundle to '{file_path}' failed: {e}")
+                self.window.after(0, lambda: messagebox.showerror(translator.translate("error"), translator.translate("export_failed", error=e), parent=self.window))
+            else:
+                logger.info(f"Saved logs of {count} services to '{file_path}'.")
+                self.window.after(0, lambda: messagebox.showinfo(translator.translate("success"), translator.translate("collect_logs_success", count=count, path=file_path), parent=self.window))
+        self.window.after(0, lambda: self.collect_button.config(state='normal'))
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.cancel()
+        self.window.destroy()
+
+CONNECTION_STATE_STYLES = {
+    STATE_CONNECTED: 'success',
+    STATE_DEGRADED: 'warning',
+    STATE_RECONNECTING: 'warning',
+    STATE_DISCONNECTED: 'danger'
+}
+
+def client_details(ssh_client):
+    return {
+        'host': ssh_client.host,
+        'port': ssh_client.port,
+        'username': ssh_client.username,
+        'password': ssh_client.password,
+        'key_filename': ssh_client.key_filename
+    }
+
 class PM2MonitorApp:
-    def __init__(self, root):
+    def __init__(self, root, ssh_client=None, recorder=None):
         self.root = root
+        self.recorder = recorder
         self.initialized = False
         self.root.title(translator.translate("title"))
         self.root.geometry("1400x800")
@@ -708,47 +5603,136 @@ class PM2MonitorApp:
         self.auto_refresh_interval = self.preferences['auto_refresh_interval']
         self.theme = self.preferences['theme']
         self.font_size = self.preferences.get('font_size', DEFAULT_FONT_SIZE)
+        self.optional_columns = [col for col in self.preferences['optional_columns'] if col in PROCESS_METRIC_COLUMNS]
+        self.group_by_app = config_handler.config.get('group_by_app', False)
 
         self.style = Style(theme=self.theme)
 
         self.font_family = "Helvetica"
 
-        if not config_handler.is_configured():
-            print("Server configuration not found. Prompting user to enter server details.")
+        if ssh_client is not None:
+            self.initialize_application(ssh_client)
+        elif not config_handler.is_configured():
+            logger.info("Server configuration not found. Prompting user to enter server details.")
             self.prompt_server_config()
         else:
             self.initialize_application()
 
-    def initialize_application(self):
-        self.ssh_details = {
-            'host': config_handler.config.get('host'),
-            'port': config_handler.config.get('port', 22),
-            'username': config_handler.config.get('username'),
-            'password': config_handler.config.get('password')
-        }
-
-        self.ssh_client = SSHClientWrapper(
-            self.ssh_details['host'],
-            self.ssh_details['port'],
-            self.ssh_details['username'],
-            self.ssh_details['password']
-        )
+    def initialize_application(self, ssh_client=None):
+        self.ssh_client = ssh_client if ssh_client is not None else self.open_profile_client(recorder=self.recorder)
+        self.ssh_details = client_details(self.ssh_client)
         if self.ssh_client.client is None:
-            print("SSH connection failed during initialization.")
-            messagebox.showerror(
-                translator.translate("error"),
-                translator.translate("ssh_error_message", error="SSH connection failed during initialization.")
-            )
+            logger.error("SSH connection failed during initialization.")
+            self.show_connection_error(self.ssh_client)
+            self.ssh_client.close()
             return
 
+        if self.ssh_client.missing_commands:
+            messagebox.showwarning(
+                translator.translate("missing_command"),
+                translator.translate("missing_command_message", command=", ".join(self.ssh_client.missing_commands))
+            )
+
         self.initialized = True
 
+        self.journal = HistoryJournal(retention_days=config_handler.config.get('history_retention_days', DEFAULT_HISTORY_RETENTION_DAYS))
+        self.tick_lock = threading.Lock()
+        self.switching_to = None
+        self.reset_host_state()
+
         self.setup_ui()
         self.apply_preferences()
         self.refresh_services()
+        instrumentation.watchdog.start(self.root)
 
         self.bind_zoom_controls()
 
+    def open_profile_client(self, name=None, recorder=None):
+        profile = config_handler.get_profile(name) or {}
+        if profile.get('backend') == 'local':
+            return LocalClient(recorder=recorder)
+        host, port, username, password = config_handler.get_server_details(name)
+        return SSHClientWrapper(host, port, username, password, recorder=recorder, key_filename=config_handler.get_key_filename(name))
+
+    def show_connection_error(self, ssh_client):
+        if ssh_client.last_error_kind == 'auth':
+            messagebox.showerror(translator.translate("authentication_error"), translator.translate("auth_error_message"))
+        else:
+            messagebox.showerror(
+                translator.translate("ssh_error"),
+                translator.translate("ssh_error_message", error=ssh_client.last_error or "SSH connection failed during initialization.")
+            )
+
+    def reset_host_state(self):
+        # Everything that describes one host; rebuilt when switching to another profile.
+        self.collector = TickCollector(self.ssh_client)
+        self.collector.configure_custom_metrics(config_handler.get_custom_metrics())
+
+        alert_settings = config_handler.get_alert_settings()
+        self.alert_engine = AlertEngine(alert_settings, AlertNotifier(alert_settings))
+        self.alert_engine.add_listener(lambda event, alert: self.root.after(0, self.update_alert_indicator))
+        self.restart_tracker = RestartTracker(alert_settings)
+        self.leak_detector = LeakDetector(alert_settings)
+        self.history = MetricHistory()
+        self.groups = ServiceGroups()
+        self.last_tick_timestamp = None
+        self.alerted_ids = set()
+        self.crash_loop_ids = set()
+        self.leak_ids = set()
+        self.host_resources = None
+        self.ssh_client.add_state_listener(lambda state, detail: self.root.after(0, self.update_connection_state))
+
+    def switch_profile(self, name):
+        self.switching_to = name
+        self.status_var.set(translator.translate("switching_profile", profile=name))
+        threading.Thread(target=lambda: self.root.after(0, self.finish_profile_switch, name, self.open_profile_client(name)), daemon=True).start()
+
+    def finish_profile_switch(self, name, ssh_client):
+        if name != self.switching_to:
+            threading.Thread(target=ssh_client.close, daemon=True).start()
+            return
+        self.switching_to = None
+        if ssh_client.client is None:
+            logger.error(f"Connecting to profile '{name}' failed.")
+            threading.Thread(target=ssh_client.close, daemon=True).start()
+            self.profile_var.set(config_handler.active_profile_name() or '')
+            self.status_var.set(self.last_updated_text("Never"))
+            self.show_connection_error(ssh_client)
+            return
+        logger.info(f"Switched to profile '{name}'.")
+        config_handler.select_profile(name)
+        previous, self.ssh_client = self.ssh_client, ssh_client
+        self.ssh_details = client_details(ssh_client)
+        threading.Thread(target=previous.close, daemon=True).start()
+        with self.tick_lock:
+            self.reset_host_state()
+        if self.render_job is not None:
+            self.render_job.cancel()
+            self.render_job = None
+        self.tree.delete(*self.tree.get_children())
+        self.all_services = []
+        self.filtered_services = []
+        self.services_by_id = {}
+        self.rendered_values = {}
+        self.detail_pane.cache.invalidate()
+        for var in (self.cpu_var, self.memory_var, self.host_var, self.log_disk_var):
+            var.set("")
+        self.profile_var.set(name)
+        self.apply_optional_columns()
+        self.update_connection_state()
+        self.update_alert_indicator()
+        self.status_var.set(self.last_updated_text("Never"))
+        self.refresh_services()
+
+    def refresh_profiles(self):
+        self.profile_menu.configure(values=config_handler.profile_names())
+        self.profile_var.set(config_handler.active_profile_name() or '')
+
+    def on_profile_selected(self):
+        name = self.profile_var.get()
+        if name != (self.switching_to or config_handler.active_profile_name()):
+            self.switch_profile(name)
+
     def bind_zoom_controls(self):
         self.root.bind('<Control-MouseWheel>', self.zoom_with_mousewheel)
         self.root.bind('<Control-Key-minus>', self.zoom_out)
@@ -812,8 +5796,7 @@ class PM2MonitorApp:
         self.tree_style.configure('Custom.Treeview.Heading', font=new_font)
 
         for col in self.columns:
-            translated_col = translator.translate(col.lower().replace(" ", "_"))
-            self.tree.heading(col, text=translated_col)
+            self.tree.heading(col, text=column_heading(col))
 
         self.tree.configure(style='Custom.Treeview')
 
@@ -865,6 +5848,66 @@ class PM2MonitorApp:
         )
         self.terminal_button.pack(side=tk.RIGHT, padx=(0, 10))
 
+        self.columns_button = ttk.Menubutton(self.top_frame, text=translator.translate("columns"))
+        self.columns_menu = tk.Menu(self.columns_button, tearoff=0)
+        self.columns_button['menu'] = self.columns_menu
+        self.optional_column_vars = {}
+        for col in PROCESS_METRIC_COLUMNS:
+            var = tk.BooleanVar(value=col in self.optional_columns)
+            self.optional_column_vars[col] = var
+            self.columns_menu.add_checkbutton(
+                label=translator.translate(col.lower().replace(" ", "_")),
+                variable=var,
+                command=self.toggle_optional_columns
+            )
+        self.columns_menu.add_command(
+            label=translator.translate("custom_metrics"),
+            command=self.open_custom_metrics_window
+        )
+        self.columns_menu.add_separator()
+        self.group_by_app_var = tk.BooleanVar(value=self.group_by_app)
+        self.columns_menu.add_checkbutton(
+            label=translator.translate("group_by_app"),
+            variable=self.group_by_app_var,
+            command=self.toggle_grouping
+        )
+        self.columns_button.pack(side=tk.RIGHT, padx=(0, 10))
+
+        self.details_button = Button(
+            self.top_frame,
+            text=translator.translate("details"),
+            command=self.toggle_detail_pane
+        )
+        self.details_button.pack(side=tk.RIGHT, padx=(0, 10))
+
+        self.export_button = Button(
+            self.top_frame,
+            text=translator.translate("export"),
+            command=self.open_export_window
+        )
+        self.export_button.pack(side=tk.RIGHT, padx=(0, 10))
+
+        self.all_logs_button = Button(
+            self.top_frame,
+            text=translator.translate("all_logs"),
+            command=self.open_merged_logs
+        )
+        self.all_logs_button.pack(side=tk.RIGHT, padx=(0, 10))
+
+        self.charts_button = Button(
+            self.top_frame,
+            text=translator.translate("charts"),
+            command=self.open_chart_window
+        )
+        self.charts_button.pack(side=tk.RIGHT, padx=(0, 10))
+
+        self.diagnostics_button = Button(
+            self.top_frame,
+            text=translator.translate("diagnostics"),
+            command=self.open_diagnostics_window
+        )
+        self.diagnostics_button.pack(side=tk.RIGHT, padx=(0, 10))
+
         self.config_button = Button(
             self.top_frame,
             text=translator.translate("config"),
@@ -875,14 +5918,20 @@ class PM2MonitorApp:
         self.middle_frame = Frame(self.root, padding=10)
         self.middle_frame.pack(fill=tk.BOTH, expand=True)
 
-        self.columns = ('ID', 'App Name', 'Version', 'PORT', 'Status', 'CPU (%)', 'Memory (MB)', 'Uptime')
+        self.middle_pane = ttk.PanedWindow(self.middle_frame, orient=tk.HORIZONTAL)
+        self.middle_pane.pack(fill=tk.BOTH, expand=True)
+
+        self.tree_frame = Frame(self.middle_pane)
+        self.middle_pane.add(self.tree_frame, weight=3)
+
+        self.columns = SERVICE_COLUMNS + PROCESS_METRIC_COLUMNS + self.collector.custom_metrics.columns
 
         self.tree_style = ttk.Style()
         self.tree_style.configure('Custom.Treeview', font=(self.font_family, self.font_size), rowheight=max(int(self.font_size * 1.5), 20))
         self.tree_style.configure('Custom.Treeview.Heading', font=(self.font_family, self.font_size))
 
         self.tree = Treeview(
-            self.middle_frame,
+            self.tree_frame,
             columns=self.columns,
             show='headings',
             style='Custom.Treeview'
@@ -891,24 +5940,26 @@ class PM2MonitorApp:
 
         self.tree.bind("<Button-3>", self.show_context_menu)
         self.tree.bind("<Button-2>", self.show_context_menu)
+        self.tree.bind("<<TreeviewSelect>>", lambda event: self.on_selection_changed())
+        self.tree.tag_configure('alert', background='#d9534f', foreground='white')
+        self.tree.tag_configure('crash_loop', background='#f0ad4e', foreground='black')
+        self.tree.tag_configure('leak', background='#f7e1a1', foreground='black')
 
-        for col in self.columns:
-            translated_col = translator.translate(col.lower().replace(" ", "_"))
-            self.tree.heading(
-                col,
-                text=translated_col,
-                command=lambda _col=col: self.sort_column(_col, False)
-            )
-            self.tree.column(col, anchor='center', width=120, stretch=True)
+        self.configure_headings()
 
         self.scrollbar = Scrollbar(
-            self.middle_frame,
+            self.tree_frame,
             orient=tk.VERTICAL,
             command=self.tree.yview
         )
         self.tree.configure(yscrollcommand=self.scrollbar.set)
         self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
+        self.apply_optional_columns()
+        self.apply_grouping()
+
+        self.detail_pane = DetailPane(self.middle_pane, self)
+
         self.resource_frame = Frame(self.root, padding=10)
         self.resource_frame.pack(fill=tk.X)
 
@@ -926,6 +5977,28 @@ class PM2MonitorApp:
         )
         self.memory_label.pack(side=tk.LEFT, padx=(0, 20))
 
+        self.host_var = tk.StringVar()
+        self.host_label = Label(
+            self.resource_frame,
+            textvariable=self.host_var,
+        )
+        self.host_label.pack(side=tk.LEFT, padx=(0, 20))
+
+        self.log_disk_var = tk.StringVar()
+        self.log_disk_label = Label(
+            self.resource_frame,
+            textvariable=self.log_disk_var,
+        )
+        self.log_disk_label.pack(side=tk.LEFT, padx=(0, 20))
+
+        self.host_button = Button(
+            self.resource_frame,
+            text=translator.translate("host_metrics"),
+            command=self.open_host_window,
+            bootstyle='secondary'
+        )
+        self.host_button.pack(side=tk.RIGHT)
+
         self.bottom_frame = Frame(self.root, padding=10)
         self.bottom_frame.pack(side=tk.BOTTOM, fill=tk.X)
 
@@ -937,15 +6010,50 @@ class PM2MonitorApp:
         self.refresh_button.pack(side=tk.LEFT, padx=(0, 10))
 
         self.status_var = tk.StringVar()
-        self.status_var.set(translator.translate("last_updated", time="Never", host=self.ssh_details['host'], port=self.ssh_details['port']))
+        self.status_var.set(self.last_updated_text("Never"))
         self.status_label = Label(
             self.bottom_frame,
             textvariable=self.status_var,
         )
         self.status_label.pack(side=tk.LEFT, padx=(0, 10))
 
+        self.alerts_button = Button(
+            self.bottom_frame,
+            text=translator.translate("alerts_count", count=0),
+            command=self.open_alerts_window,
+            bootstyle='secondary'
+        )
+        self.alerts_button.pack(side=tk.RIGHT, padx=(10, 0))
+
+        self.profile_var = tk.StringVar(value=config_handler.active_profile_name() or '')
+        self.profile_menu = ttk.Combobox(
+            self.bottom_frame,
+            textvariable=self.profile_var,
+            values=config_handler.profile_names(),
+            state='disabled' if isinstance(self.ssh_client, ReplayClient) else 'readonly',
+            width=18
+        )
+        self.profile_menu.pack(side=tk.RIGHT, padx=(10, 0))
+        self.profile_menu.bind("<<ComboboxSelected>>", lambda event: self.on_profile_selected())
+        self.profile_label = Label(self.bottom_frame, text=translator.translate("profile"))
+        self.profile_label.pack(side=tk.RIGHT)
+
+        self.connection_var = tk.StringVar()
+        self.connection_label = Label(
+            self.bottom_frame,
+            textvariable=self.connection_var,
+        )
+        self.connection_label.pack(side=tk.RIGHT, padx=(10, 0))
+        self.connection_label.bind("<Button-1>", lambda event: self.retry_connection())
+        self.connection_state = None
+        self.update_connection_state()
+
         self.all_services = []
         self.filtered_services = []
+        self.services_by_id = {}
+        self.rendered_values = {}
+        self.render_job = None
+        self.sort_state = None
 
         if self.auto_refresh_interval > 0:
             self.auto_refresh()
@@ -961,15 +6069,15 @@ class PM2MonitorApp:
         self.context_menu.add_command(label=translator.translate("restart_service"), command=self.restart_selected_service)
         self.context_menu.add_separator()
         self.context_menu.add_command(label=translator.translate("view_logs"), command=self.view_logs)
+        self.context_menu.add_command(label=translator.translate("collect_logs"), command=self.open_log_bundle_window)
+        self.context_menu.add_command(label=translator.translate("details"), command=lambda: self.toggle_detail_pane(True))
 
     def start_selected_service(self):
         selected_items = self.tree.selection()
         if not selected_items:
             messagebox.showwarning(translator.translate("no_selection"), translator.translate("select_service_warning"))
             return
-        for item in selected_items:
-            svc = self.tree.item(item, 'values')
-            app_id = svc[0]
+        for app_id in self.control_targets(selected_items):
             threading.Thread(
                 target=self.control_service_thread, 
                 args=('start', app_id), 
@@ -981,9 +6089,7 @@ class PM2MonitorApp:
         if not selected_items:
             messagebox.showwarning(translator.translate("no_selection"), translator.translate("select_service_warning"))
             return
-        for item in selected_items:
-            svc = self.tree.item(item, 'values')
-            app_id = svc[0]
+        for app_id in self.control_targets(selected_items):
             threading.Thread(
                 target=self.control_service_thread, 
                 args=('stop', app_id), 
@@ -995,9 +6101,7 @@ class PM2MonitorApp:
         if not selected_items:
             messagebox.showwarning(translator.translate("no_selection"), translator.translate("select_service_warning"))
             return
-        for item in selected_items:
-            svc = self.tree.item(item, 'values')
-            app_id = svc[0]
+        for app_id in self.control_targets(selected_items):
             threading.Thread(
                 target=self.control_service_thread, 
                 args=('restart', app_id), 
@@ -1013,6 +6117,100 @@ class PM2MonitorApp:
     def open_terminal_window(self):
         TerminalWindow(self.root, self.ssh_client)
 
+    def configure_headings(self):
+        for col in self.columns:
+            self.tree.heading(
+                col,
+                text=column_heading(col),
+                command=lambda _col=col: self.sort_column(_col, False)
+            )
+            self.tree.column(col, anchor='center', width=120, stretch=True)
+
+    def apply_optional_columns(self):
+        self.tree.configure(displaycolumns=SERVICE_COLUMNS + tuple(col for col in PROCESS_METRIC_COLUMNS if col in self.optional_columns) + self.collector.custom_metrics.columns)
+        self.collector.collect_process_metrics = bool(self.optional_columns)
+
+    def toggle_optional_columns(self):
+        self.optional_columns = [col for col in PROCESS_METRIC_COLUMNS if self.optional_column_vars[col].get()]
+        self.apply_optional_columns()
+        config_handler.config['optional_columns'] = self.optional_columns
+        config_handler.save_config()
+
+    def open_custom_metrics_window(self):
+        CustomMetricsWindow(self.root, self)
+
+    def apply_custom_metrics(self):
+        self.collector.configure_custom_metrics(config_handler.get_custom_metrics())
+        self.columns = SERVICE_COLUMNS + PROCESS_METRIC_COLUMNS + self.collector.custom_metrics.columns
+        if self.sort_state and self.sort_state[0] not in self.columns:
+            self.sort_state = None
+        self.tree.configure(columns=self.columns)
+        self.configure_headings()
+        self.apply_optional_columns()
+        self.apply_grouping()
+        self.rendered_values = {}
+        self.refresh_services()
+
+    def apply_grouping(self):
+        self.tree.configure(show='tree headings' if self.group_by_app else 'headings')
+        self.tree.column('#0', width=30, minwidth=30, stretch=False)
+
+    def toggle_grouping(self):
+        self.group_by_app = self.group_by_app_var.get()
+        self.apply_grouping()
+        self.update_treeview()
+        config_handler.config['group_by_app'] = self.group_by_app
+        config_handler.save_config()
+
+    def toggle_detail_pane(self, show=None):
+        if show is None:
+            show = not self.detail_pane.visible
+        if show:
+            self.detail_pane.show()
+        else:
+            self.detail_pane.hide()
+
+    def on_selection_changed(self):
+        selection = self.tree.selection()
+        service = self.get_service_for_item(selection[0]) if len(selection) == 1 else None
+        self.detail_pane.select(service)
+
+    def open_diagnostics_window(self):
+        DiagnosticsWindow(self.root)
+
+    def open_host_window(self):
+        HostWindow(self.root, self)
+
+    def open_merged_logs(self):
+        MergedLogWindow(self.root, self.ssh_client, [svc.name for svc in self.all_services])
+
+    def open_export_window(self):
+        ExportWindow(self.root, self)
+
+    def open_log_bundle_window(self):
+        LogBundleWindow(self.root, self, self.selected_services(self.tree.selection()))
+
+    def open_chart_window(self):
+        selection = self.tree.selection()
+        service = self.get_service_for_item(selection[0]) if len(selection) == 1 else None
+        ChartWindow(self.root, self.history, service.pm_id if service else None)
+
+    def open_alerts_window(self):
+        AlertsWindow(self.root, self.alert_engine)
+
+    def update_alert_indicator(self):
+        with self.alert_engine.lock:
+            count = len(self.alert_engine.active)
+        self.alerts_button.configure(
+            text=translator.translate("alerts_count", count=count),
+            bootstyle='danger' if count else 'secondary'
+        )
+
+    def last_updated_text(self, time):
+        if isinstance(self.ssh_client, LocalClient):
+            return translator.translate("last_updated_local", time=time, host=self.ssh_details['host'])
+        return translator.translate("last_updated", time=time, host=self.ssh_details['host'], port=self.ssh_details['port'])
+
     def prompt_server_config(self):
         config_window = ConfigWindowInitial(self.root, self)
         self.root.wait_window(config_window.window)
@@ -1024,150 +6222,255 @@ class PM2MonitorApp:
         self.auto_refresh_interval = config_handler.config.get('auto_refresh_interval', DEFAULT_AUTO_REFRESH_INTERVAL)
         self.theme = config_handler.config.get('theme', DEFAULT_THEME)
         self.style.theme_use(self.theme)
+        alert_settings = config_handler.get_alert_settings()
+        self.alert_engine.settings = alert_settings
+        self.alert_engine.notifier.settings = alert_settings
+        self.restart_tracker.settings = alert_settings
+        self.leak_detector.settings = alert_settings
         self.update_fonts()
         self.refresh_services()
 
+    def update_connection_state(self):
+        state = self.ssh_client.state
+        detail = self.ssh_client.state_detail
+        text = translator.translate("connection_state", state=translator.translate(f"state_{state}"))
+        if detail:
+            text = f"{text} ({detail})"
+        self.connection_var.set(text)
+        self.connection_label.configure(bootstyle=CONNECTION_STATE_STYLES.get(state, 'default'))
+        previous, self.connection_state = self.connection_state, state
+        if state == STATE_CONNECTED and previous in (STATE_RECONNECTING, STATE_DISCONNECTED):
+            self.refresh_services()
+
+    def retry_connection(self):
+        if self.ssh_client.state == STATE_DISCONNECTED:
+            self.ssh_client.request_reconnect()
+
     def refresh_services(self):
         self.refresh_button.config(state='disabled')
         threading.Thread(target=self.fetch_and_display, daemon=True).start()
 
     def fetch_and_display(self):
-        services = get_pm2_services(self.ssh_client)
-        system_resources = get_system_resources(self.ssh_client)
-        if services is not None:
+        # Refreshes that overlap (manual, automatic, after a control action) share a single tick.
+        ssh_client = self.ssh_client
+        tick = ssh_client.reads.get('collect tick', self.collector.collect)
+        with self.tick_lock:
+            fresh = tick is not None and ssh_client is self.ssh_client and tick['timestamp'] != self.last_tick_timestamp
+            if fresh:
+                self.last_tick_timestamp = tick['timestamp']
+        if fresh and tick['services'] is not None:
+            services = tick['services']
             self.all_services = services
-            self.filter_services()
-            cpu = system_resources.get('CPU Usage (%)', "N/A")
-            memory = system_resources.get('Memory Usage (MB)', "N/A")
-            self.cpu_var.set(translator.translate("cpu_usage", cpu=cpu))
-            self.memory_var.set(translator.translate("memory_usage", memory=memory))
-            self.status_var.set(translator.translate("last_updated", time=datetime.now().strftime('%Y-%m-%d %H:%M:%S'), host=self.ssh_details['host'], port=self.ssh_details['port']))
+            self.services_by_id = index_services(services)
+            self.groups.update(services)
+            self.history.record(tick['timestamp'], services, tick['resources'])
+            self.journal.append(tick['timestamp'], services)
+            self.restart_tracker.update(services, tick['timestamp'])
+            leaks = self.leak_detector.update(services, tick['timestamp'])
+            self.alert_engine.evaluate(services, tick['resources'], tick['timestamp'], changed_ids=tick['changed_ids'], restarts=self.restart_tracker, leaks=leaks)
+            self.alerted_ids = self.alert_engine.active_ids()
+            self.crash_loop_ids = set(self.restart_tracker.crash_loops)
+            self.leak_ids = set(leaks)
+            # Everything that touches widgets, including the FrameJob that renders the tree, runs on the Tk thread.
+            self.root.after(0, self.display_tick, ssh_client, tick['resources'])
+        else:
+            self.root.after(0, lambda: self.refresh_button.config(state='normal'))
+
+    def display_tick(self, ssh_client, resources):
         self.refresh_button.config(state='normal')
+        if ssh_client is not self.ssh_client:
+            return
+        self.filter_services()
+        cpu = resources.get('CPU Usage (%)', "N/A")
+        memory = resources.get('Memory Usage (MB)', "N/A")
+        self.cpu_var.set(translator.translate("cpu_usage", cpu=cpu))
+        self.memory_var.set(translator.translate("memory_usage", memory=memory))
+        self.update_host_summary(resources)
+        self.status_var.set(self.last_updated_text(datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+
+    def update_host_summary(self, resources):
+        self.host_resources = resources
+        value = lambda key: resources.get(key) if resources.get(key) is not None else 'N/A'
+        load = resources.get('Load Average')
+        self.host_var.set(translator.translate(
+            "host_summary",
+            load=" ".join(str(average) for average in load) if load else 'N/A',
+            read=value('Disk Read (KB/s)'),
+            write=value('Disk Write (KB/s)'),
+            received=value('Network In (KB/s)'),
+            sent=value('Network Out (KB/s)'),
+            swap=f"{value('Swap Used (MB)')} / {value('Swap Total (MB)')}"
+        ))
+        filesystems = resources.get('Log Filesystems')
+        if not filesystems:
+            self.log_disk_var.set("")
+            return
+        fullest = filesystems[0]
+        threshold = float(self.alert_engine.settings['log_disk_threshold'])
+        self.log_disk_var.set(translator.translate("log_disk_usage", percent=fullest['percent'], mount=fullest['mount']))
+        self.log_disk_label.configure(bootstyle='danger' if threshold > 0 and fullest['percent'] >= threshold else 'default')
+
+    def get_service_for_item(self, item):
+        try:
+            return self.services_by_id.get(int(item))
+        except (TypeError, ValueError):
+            return None
 
     def filter_services(self):
         search_query = self.search_var.get().lower()
         if search_query == self.placeholder_text.lower():
             search_query = ""
         if not search_query:
-            self.filtered_services = self.all_services
+            filtered = list(self.all_services)
         else:
-            self.filtered_services = [
-                svc for svc in self.all_services 
-                if search_query in svc['App Name'].lower()
-            ]
+            filtered = [svc for svc in self.all_services if search_query in svc.name.lower()]
+        if self.sort_state:
+            col, reverse = self.sort_state
+            filtered.sort(key=service_sort_key(col), reverse=reverse)
+        self.filtered_services = filtered
         self.update_treeview()
 
+    def service_tags(self, svc):
+        if svc.pm_id in self.crash_loop_ids:
+            return ('crash_loop',)
+        if svc.pm_id in self.alerted_ids:
+            return ('alert',)
+        if svc.pm_id in self.leak_ids:
+            return ('leak',)
+        return ()
+
+    def group_tags(self, group):
+        if any(pm_id in self.crash_loop_ids for pm_id in group.members):
+            return ('crash_loop',)
+        if any(pm_id in self.alerted_ids for pm_id in group.members):
+            return ('alert',)
+        if any(pm_id in self.leak_ids for pm_id in group.members):
+            return ('leak',)
+        return ()
+
+    def build_rows(self):
+        if not self.group_by_app:
+            return [(str(svc.pm_id), '', self.row_values(svc), self.service_tags(svc)) for svc in self.filtered_services]
+
+        entries = []
+        children = {}
+        for svc in self.filtered_services:
+            group = self.groups.get(svc.name)
+            if group is None or len(group) < 2:
+                entries.append(svc)
+                continue
+            if svc.name not in children:
+                children[svc.name] = []
+                entries.append(group)
+            children[svc.name].append(svc)
+        if self.sort_state:
+            col, reverse = self.sort_state
+            entries.sort(key=service_sort_key(col), reverse=reverse)
+
+        rows = []
+        for entry in entries:
+            if isinstance(entry, AppGroup):
+                rows.append((entry.iid, '', self.row_values(entry), self.group_tags(entry)))
+                for svc in children[entry.name]:
+                    rows.append((str(svc.pm_id), entry.iid, self.row_values(svc), self.service_tags(svc)))
+            else:
+                rows.append((str(entry.pm_id), '', self.row_values(entry), self.service_tags(entry)))
+        return rows
+
+    def row_values(self, entry):
+        metrics = self.collector.custom_metrics.metrics
+        if isinstance(entry, AppGroup):
+            return entry.display_values() + ('',) * len(metrics)
+        return entry.display_values() + tuple(format_custom_metric(entry.custom.get(metric.name)) for metric in metrics)
+
     def update_treeview(self):
-        print("Treeview update started")
-        try:
-            existing_items = {self.tree.item(item)['values'][0]: item for item in self.tree.get_children()}
-            print(f"Existing items: {existing_items}")
-            new_ids = set()
-
-            for svc in self.filtered_services:
-                app_id = svc['ID']
-                new_ids.add(app_id)
-                print(f"Processing service: {svc}")
-                if app_id in existing_items:
-                    print(f"Updating item with ID: {app_id}")
-                    self.tree.item(existing_items[app_id], values=(
-                        svc['ID'],
-                        svc['App Name'],
-                        svc['Version'],
-                        svc['PORT'],
-                        svc['Status'],
-                        svc['CPU (%)'],
-                        svc['Memory (MB)'],
-                        svc['Uptime']
-                    ))
-                else:
-                    print(f"Inserting new item with ID: {app_id}")
-                    self.tree.insert('', 'end', iid=app_id, values=(
-                        svc['ID'],
-                        svc['App Name'],
-                        svc['Version'],
-                        svc['PORT'],
-                        svc['Status'],
-                        svc['CPU (%)'],
-                        svc['Memory (MB)'],
-                        svc['Uptime']
-                    ))
-
-            for app_id, item in existing_items.items():
-                if app_id not in new_ids:
-                    print(f"Deleting item with ID: {app_id}")
-                    self.tree.delete(item)
-        except Exception as e:
-            print(f"Exception occurred: {e}")
-        finally:
-            print("Treeview update finished")
+        if self.render_job is not None:
+            self.render_job.cancel()
+        self.render_job = FrameJob(self.tree, self.treeview_steps(), 'update_treeview').run()
+
+    def treeview_steps(self):
+        existing_items = set(self.tree.get_children())
+        for item in list(existing_items):
+            if item.startswith(GROUP_IID_PREFIX):
+                existing_items.update(self.tree.get_children(item))
+        layout = {'': []}
+        new_ids = set()
+
+        for iid, parent, values, tags in self.build_rows():
+            layout.setdefault(parent, []).append(iid)
+            new_ids.add(iid)
+            if iid in existing_items:
+                if self.rendered_values.get(iid) != (values, tags):
+                    self.tree.item(iid, values=values, tags=tags)
+                    yield
+            else:
+                if parent and not self.tree.exists(parent):
+                    continue
+                self.tree.insert(parent, 'end', iid=iid, values=values, tags=tags)
+                yield
+            self.rendered_values[iid] = (values, tags)
+
+        for parent, order in layout.items():
+            if parent and not self.tree.exists(parent):
+                continue
+            if list(self.tree.get_children(parent)) != order:
+                for index, iid in enumerate(order):
+                    if self.tree.exists(iid):
+                        self.tree.move(iid, parent, index)
+                        yield
+
+        for iid in existing_items - new_ids:
+            if self.tree.exists(iid):
+                self.tree.delete(iid)
+                yield
+            self.rendered_values.pop(iid, None)
 
     def sort_column(self, col, reverse):
         try:
-            if col in ['CPU (%)', 'Memory (MB)', 'PORT']:
-                sorted_data = sorted(
-                    self.filtered_services, 
-                    key=lambda x: float(x[col]) if isinstance(x[col], (int, float, str)) and x[col] != 'N/A' else -1, 
-                    reverse=reverse
-                )
-            elif col == 'ID':
-                sorted_data = sorted(
-                    self.filtered_services, 
-                    key=lambda x: int(x[col]) if isinstance(x[col], (int, float, str)) and x[col] != 'N/A' else -1, 
-                    reverse=reverse
-                )
-            elif col == 'Uptime':
-                sorted_data = sorted(
-                    self.filtered_services, 
-                    key=lambda x: self.parse_uptime(x[col]), 
-                    reverse=reverse
-                )
-            else:
-                sorted_data = sorted(
-                    self.filtered_services, 
-                    key=lambda x: x[col].lower() if isinstance(x[col], str) else str(x[col]).lower(), 
-                    reverse=reverse
-                )
-            self.filtered_services = sorted_data
+            self.sort_state = (col, reverse)
+            self.filtered_services = sorted(self.filtered_services, key=service_sort_key(col), reverse=reverse)
             self.update_treeview()
             self.tree.heading(col, command=lambda: self.sort_column(col, not reverse))
         except Exception as e:
             messagebox.showerror(translator.translate("error"), f"{translator.translate('sort_error')}: {e}")
-            print(f"Error sorting column '{col}': {e}")
-
-    def parse_uptime(self, uptime_str):
-        try:
-            days, hours, minutes, seconds = 0, 0, 0, 0
-            if 'd' in uptime_str:
-                days = int(uptime_str.split('d')[0])
-                uptime_str = uptime_str.split('d')[1]
-            if 'h' in uptime_str:
-                hours = int(uptime_str.split('h')[0])
-                uptime_str = uptime_str.split('h')[1]
-            if 'm' in uptime_str:
-                minutes = int(uptime_str.split('m')[0])
-                uptime_str = uptime_str.split('m')[1]
-            if 's' in uptime_str:
-                seconds = int(uptime_str.split('s')[0])
-            total_seconds = days * 86400 + hours * 3600 + minutes * 60 + seconds
-            return total_seconds
-        except:
-            return 0
+            logger.error(f"Error sorting column '{col}': {e}")
 
     def service_control(self, action):
         selected_items = self.tree.selection()
         if not selected_items:
             messagebox.showwarning(translator.translate("no_selection"), translator.translate("select_service_warning"))
             return
-        for item in selected_items:
-            svc = self.tree.item(item, 'values')
-            app_id = svc[0]
+        for app_id in self.control_targets(selected_items):
             threading.Thread(
                 target=self.control_service_thread, 
                 args=(action, app_id), 
                 daemon=True
             ).start()
 
+    def control_targets(self, items):
+        groups = {item for item in items if item.startswith(GROUP_IID_PREFIX)}
+        targets = []
+        for item in items:
+            if item in groups:
+                targets.append(shlex.quote(item[len(GROUP_IID_PREFIX):]))
+            elif self.tree.parent(item) not in groups:
+                targets.append(item)
+        return targets
+
+    def selected_services(self, items):
+        services = {}
+        for item in items:
+            if item.startswith(GROUP_IID_PREFIX):
+                group = self.groups.get(item[len(GROUP_IID_PREFIX):])
+                members = group.members if group is not None else ()
+            else:
+                members = (item,)
+            for member in members:
+                svc = self.get_service_for_item(member)
+                if svc is not None:
+                    services[svc.pm_id] = svc
+        return list(services.values())
+
     def control_service_thread(self, action, app_id):
         control_service(
             action=action, 
@@ -1199,6 +6502,8 @@ class PM2MonitorApp:
     def on_closing(self):
         if messagebox.askokcancel(translator.translate("quit"), translator.translate("quit_message")):
             self.ssh_client.close()
+            self.journal.close()
+            config_handler.flush()
             self.root.destroy()
 
     def clear_placeholder(self, event):
@@ -1216,35 +6521,121 @@ class PM2MonitorApp:
         if not selected_items:
             messagebox.showwarning(translator.translate("no_selection"), translator.translate("select_service_warning"))
             return
-        svc = self.tree.item(selected_items[0], 'values')
-        app_id = svc[0]
-        app_name = svc[1]
-
-        service = next((s for s in self.all_services if str(s['ID']) == str(app_id)), None)
+        service = self.get_service_for_item(selected_items[0])
         if service:
-            out_log_path = service.get('Out Log Path', '')
-            error_log_path = service.get('Error Log Path', '')
-            LogWindow(self.root, app_name, app_id, self.ssh_client, out_log_path, error_log_path)
+            LogWindow(self.root, service.name, service.pm_id, self.ssh_client, service.out_log_path, service.err_log_path)
         else:
             messagebox.showerror(translator.translate("error"), translator.translate("service_not_found_message"))
-            print("Selected service details could not be found.")
+            logger.warning("Selected service details could not be found.")
 
 # -------------------- Main Execution -------------------- #
 
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Monitor and manage PM2 services on a remote server.")
+    parser.add_argument('--export', metavar='PATH', help="export services to PATH ('-' for stdout) and exit without opening the GUI")
+    parser.add_argument('--format', choices=sorted(EXPORT_WRITERS), help="export format (default: from the file extension, else csv)")
+    parser.add_argument('--since', help="export collected history from this time (ISO 8601 or relative such as 30m, 12h, 7d) instead of the current snapshot")
+    parser.add_argument('--until', help="end of the history range (ISO 8601 or relative, default: now)")
+    parser.add_argument('--name', action='append', help="only export services whose name matches this pattern (repeatable, wildcards allowed)")
+    parser.add_argument('--status', action='append', help="only export services with this status (repeatable)")
+    parser.add_argument('--record', metavar='PATH', help="record every remote command and its output to a session file (.jsonl.gz)")
+    parser.add_argument('--replay', metavar='PATH', help="replay a recorded session file instead of connecting to a server")
+    parser.add_argument('--replay-speed', type=float, default=1.0, help="timing scale for --replay (2 = twice as fast, 0 = no delays)")
+    parser.add_argument('--local', action='store_true', help="monitor PM2 on this machine by running commands directly instead of over SSH")
+    parser.add_argument('--profile', help="connect with this saved server profile instead of the last one used")
+    return parser.parse_args(argv)
+
+def open_ssh_client(args, host, port, username, password):
+    if args.replay:
+        return ReplayClient(args.replay, args.replay_speed)
+    recorder = SessionRecorder(args.record) if args.record else None
+    if args.local or config_handler.is_local():
+        return LocalClient(recorder=recorder)
+    return SSHClientWrapper(host, port, username, password, recorder=recorder, key_filename=config_handler.get_key_filename())
+
+def run_export(args):
+    try:
+        since = parse_time_argument(args.since) if args.since else None
+        until = parse_time_argument(args.until) if args.until else None
+    except ValueError as e:
+        logger.error(f"Invalid time range: {e}")
+        return 2
+
+    ssh_client = None
+    if since is not None:
+        rows = iter_history(since, until)
+    else:
+        if not args.replay and not args.local and not config_handler.is_configured():
+            logger.error("Server configuration not found. Run the GUI once to enter server details.")
+            return 1
+        try:
+            ssh_client = open_ssh_client(args, *config_handler.get_server_details())
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load session file '{args.replay}': {e}")
+            return 1
+        if ssh_client.client is None:
+            logger.error(f"SSH connection failed: {ssh_client.last_error}")
+            ssh_client.close()
+            return 1
+        tick = TickCollector(ssh_client).collect()
+        if tick is None or tick['services'] is None:
+            logger.error("Failed to retrieve PM2 services.")
+            ssh_client.close()
+            return 1
+        rows = service_rows(tick['services'], tick['timestamp'])
+
+    try:
+        count = export_rows(filter_rows(rows, args.name, args.status), args.export, args.format or export_format_for(args.export))
+    except OSError as e:
+        logger.error(f"Export to '{args.export}' failed: {e}")
+        return 1
+    finally:
+        if ssh_client is not None:
+            ssh_client.close()
+    logger.info(f"Exported {count} rows to '{args.export}'.")
+    return 0
+
+def use_profile(name):
+    if name not in config_handler.profile_names():
+        logger.error(f"Unknown profile '{name}'. Saved profiles: {', '.join(config_handler.profile_names()) or 'none'}.")
+        return False
+    config_handler.select_profile(name)
+    return True
+
 def main():
+    args = parse_arguments()
+    if args.profile and not use_profile(args.profile):
+        sys.exit(1)
+    if args.local and not LOCAL_MODE_SUPPORTED:
+        logger.error("--local is not supported on Windows; connect over SSH instead.")
+        sys.exit(2)
+    if args.export:
+        sys.exit(run_export(args))
+
     if not os.path.exists(TRANSLATIONS_DIR):
-        print(f"Translations directory '{TRANSLATIONS_DIR}' not found. Please create it and add the necessary translation JSON files.")
+        logger.error(f"Translations directory '{TRANSLATIONS_DIR}' not found. Please create it and add the necessary translation JSON files.")
         sys.exit(1)
     
     en_translation_path = os.path.join(TRANSLATIONS_DIR, "en.json")
     if not os.path.exists(en_translation_path):
-        print(f"English translation file 'en.json' not found in '{TRANSLATIONS_DIR}'. Please add it.")
+        logger.error(f"English translation file 'en.json' not found in '{TRANSLATIONS_DIR}'. Please add it.")
         sys.exit(1)
     
+    ssh_client = None
+    recorder = SessionRecorder(args.record) if args.record else None
+    if args.replay:
+        try:
+            ssh_client = ReplayClient(args.replay, args.replay_speed)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load session file '{args.replay}': {e}")
+            sys.exit(1)
+    elif args.local:
+        ssh_client = LocalClient(recorder=recorder)
+
     root = tk.Tk()
-    app = PM2MonitorApp(root)
+    app = PM2MonitorApp(root, ssh_client=ssh_client, recorder=recorder)
     if not app.initialized:
-        print("Application failed to initialize. Exiting.")
+        logger.error("Application failed to initialize. Exiting.")
         root.destroy()
         return
     root.protocol("WM_DELETE_WINDOW", app.on_closing)